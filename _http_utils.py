@@ -0,0 +1,80 @@
+"""
+HTTP スクレイパー共通の部品
+（レート制限・Retry-After の解釈・上限付きの本文読み込み）
+"""
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+
+
+class RateLimiter:
+    """スレッドセーフなトークンバケット（rate 件/秒、最大 burst 件まで貯まる）"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """トークンを1つ取得（なければ補充されるまで待機）"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_sec = (1 - self._tokens) / self.rate
+            time.sleep(wait_sec)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """レート制限を受けたら slow_down() で半減し、recover() で上限まで少しずつ戻す RateLimiter"""
+
+    def __init__(self, rate: float, burst: int, min_rate: float, recovery_step: float):
+        super().__init__(rate, burst)
+        self.max_rate = rate
+        self.min_rate = min_rate
+        self.recovery_step = recovery_step
+
+    def slow_down(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * 0.5)
+            # 貯まっているトークンも捨てて、すぐに新しいレートを適用する
+            self._tokens = min(self._tokens, 0.0)
+
+    def recover(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.recovery_step)
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After ヘッダー（秒数 or HTTP日付）を待機秒に変換（解釈できなければ None）"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def read_text(r: requests.Response, max_bytes: int) -> Optional[str]:
+    """ストリーミング中のレスポンス本文を max_bytes まで読んで文字列化（超えたら None）"""
+    chunks = []
+    size = 0
+    for chunk in r.iter_content(chunk_size=65536):
+        size += len(chunk)
+        if size > max_bytes:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks).decode(r.encoding or "utf-8", errors="replace")
@@ -2,12 +2,29 @@
 コンストマップ スクレイパー (SaaS Worker版)
 関西・九州地方の建設業者情報を収集
 """
+import os
 import time
-import random
-from typing import Callable, Optional
-
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+import lxml.html
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from ._http_utils import RateLimiter
+except ImportError:
+    # 更新ディレクトリから単体モジュールとして読み込まれた場合
+    from scraper._http_utils import RateLimiter
 
 
 # エリア定義
@@ -33,11 +50,134 @@ CONSTMAP_REGIONS = {
     },
 }
 
+
+@dataclass(frozen=True)
+class _Region:
+    """CONSTMAP_REGIONS の読み取り専用表現（スレッド間で共有）"""
+
+    name: str
+    base_url: str
+    areas: Optional[Tuple[str, ...]]
+
+
+_REGIONS = MappingProxyType({
+    key: _Region(
+        name=region["name"],
+        base_url=region["base_url"],
+        areas=tuple(region["areas"]) if region["areas"] else None,
+    )
+    for key, region in CONSTMAP_REGIONS.items()
+})
+
+
 HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+}
+
+# 詳細ページ取得の並列数（filters["max_workers"] で上書き可）
+DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 5)
+# 同時に飛ばすリクエスト数の上限（サイトへの負荷を抑える）
+MAX_CONCURRENT_REQUESTS = 8
+# 並列取得中に停止リクエストを確認する間隔（秒）
+STOP_POLL_INTERVAL = 0.5
+# 進捗通知の間引き（PROGRESS_EVERY 件ごと、または PROGRESS_INTERVAL 秒経過時）
+PROGRESS_EVERY = 16
+PROGRESS_INTERVAL = 0.2
+# ホストごとのリクエストレート（トークンバケット、逐次実行時の 0.3〜0.6 秒間隔と同程度）
+REQUESTS_PER_SECOND = 2.0
+REQUEST_BURST = 1
+# 全ページスキャン時に先読みする一覧ページ数
+LISTING_BATCH_SIZE = 4
+MAX_LISTING_PAGES = 100
+
+
+# 詳細ページのディスクキャッシュ（filters["use_cache"]=False で無効化）
+DETAIL_CACHE_DIR = Path(tempfile.gettempdir()) / "silas-worker" / "constmap_cache"
+DETAIL_CACHE_TTL = 24 * 60 * 60  # 秒
+
+# 末尾が業者ID（数字）のURL判定用（str.endswith に渡すタプル）
+DETAIL_ID_TAIL = tuple("0123456789")
+# サイトはUTF-8固定（バイト列を直接パースする）
+HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+# 詳細ページの店名（h2.h.mainTxt）とルビ（span.sm）
+DETAIL_NAME_MARKER = b'class="h mainTxt'
+DETAIL_NAME_XPATH = etree.XPath(
+    '//h2[contains(concat(" ", normalize-space(@class), " "), " h ")'
+    ' and contains(concat(" ", normalize-space(@class), " "), " mainTxt ")]'
+)
+DETAIL_RUBY_XPATH = etree.XPath('.//span[contains(concat(" ", normalize-space(@class), " "), " sm ")]')
+NEXT_TD_XPATH = etree.XPath("following::td[1]")
+# 詳細ページのテーブル見出し → 出力フィールド
+DETAIL_LABELS = {
+    "住所": "address",
+    "電話番号": "phone",
+    "ホームページ": "website",
 }
 
 
+def _text(el) -> str:
+    """要素内テキストを各ノードごとに strip して連結（get_text(strip=True) 相当）"""
+    return "".join(t.strip() for t in el.itertext())
+
+
+def _detail_region(html: bytes) -> bytes:
+    """
+    詳細ページのうち店名見出し（h2.h.mainTxt）から最後の </table> までを切り出す
+    ヘッダー・サイドバー・フッターをパース対象から外す（見つからなければ全体）
+    """
+    marker = html.find(DETAIL_NAME_MARKER)
+    start = html.rfind(b"<h2", 0, marker) if marker >= 0 else -1
+    end = html.rfind(b"</table>")
+    if start < 0 or end < start:
+        return html
+    return html[start:end + len(b"</table>")]
+
+
+def _extract_detail_urls(response: requests.Response, base_url: str) -> Tuple[list, bytes]:
+    """
+    一覧ページのレスポンスを逐次パースし、詳細URLを出現順・重複なしで抽出
+    フッターに到達した時点で残りの本文は読まずに打ち切る
+    戻り値は (詳細URLリスト, 読み込んだ本文のハッシュ)
+    """
+    urls = {}
+    digest = hashlib.blake2b(digest_size=16)
+    parser = etree.HTMLPullParser(events=("start", "end"), encoding="utf-8")
+    for chunk in response.iter_content(65536):
+        digest.update(chunk)
+        parser.feed(chunk)
+        for event, el in parser.read_events():
+            if event == "start":
+                if el.tag == "footer":
+                    return list(urls), digest.digest()
+                continue
+            if el.tag != "a":
+                continue
+            href = el.get("href") or ""
+            if "/contractor/" in href and href.rstrip("/").endswith(DETAIL_ID_TAIL):
+                if not href.startswith("http"):
+                    href = base_url + href
+                urls[href] = None
+    parser.close()
+    return list(urls), digest.digest()
+
+
+def _create_session() -> requests.Session:
+    """Keep-Alive・コネクションプール付きのセッションを作成"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+        ),
+    )
+    session.mount("https://", adapter)
+    return session
+
+
 class ConstmapScraper:
     """コンストマップから建設業者情報を収集"""
 
@@ -51,105 +191,194 @@ class ConstmapScraper:
         self.result_callback = result_callback
         self.is_running_check = is_running_check or (lambda: True)
         self.result_count = 0
+        self._result_lock = threading.Lock()
+        self._request_slots = threading.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self._rate_limiters: Dict[str, RateLimiter] = {}
+        self._rate_limiters_lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.session = _create_session()
+        self.use_cache = True
+        self._seen_urls: set = set()  # 実行全体（全リージョン・全エリア）で共有
+        self._last_progress_at = 0.0
+        self._reported_count = 0
 
     def run(self, filters: dict = None) -> int:
         """スクレイピングを実行"""
         filters = filters or {}
         self.result_count = 0
+        self.use_cache = filters.get("use_cache", True)
+        self._seen_urls = set()
+        self._last_progress_at = 0.0
+        self._reported_count = 0
 
         # 対象リージョン（デフォルトは両方）
-        regions = filters.get("regions", list(CONSTMAP_REGIONS.keys()))
+        regions = filters.get("regions", list(_REGIONS.keys()))
+        max_workers = int(filters.get("max_workers") or DEFAULT_MAX_WORKERS)
 
-        for region_key in regions:
-            if not self.is_running_check():
-                print("[Constmap] 停止リクエスト受信")
-                break
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            for region_key in regions:
+                if not self.is_running_check():
+                    print("[Constmap] 停止リクエスト受信")
+                    break
 
-            if region_key not in CONSTMAP_REGIONS:
-                continue
+                region = _REGIONS.get(region_key)
+                if region is None:
+                    continue
 
-            region = CONSTMAP_REGIONS[region_key]
-            print(f"[Constmap] {region['name']} スキャン開始...")
+                print(f"[Constmap] {region.name} スキャン開始...")
 
-            if region["areas"]:
-                # エリア別スキャン（関西版）
-                self._scrape_by_areas(region)
-            else:
-                # 全ページスキャン（九州版）
-                self._scrape_all_pages(region)
+                if region.areas:
+                    # エリア別スキャン（関西版）
+                    self._scrape_by_areas(region)
+                else:
+                    # 全ページスキャン（九州版）
+                    self._scrape_all_pages(region)
+        finally:
+            # 停止時・例外時は未着手のタスクを破棄してから終了
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+            self._report_progress(force=True)
 
         return self.result_count
 
-    def _scrape_all_pages(self, region: dict):
-        """全ページをスキャン（九州版用）"""
-        base_url = region["base_url"]
-        seen_urls = set()
+    def _scrape_details(self, urls: Iterable[str], area: str):
+        """詳細ページをスレッドプールで並列取得"""
+        futures = []
+        for detail_url in urls:
+            if not self.is_running_check():
+                break
+            futures.append(self._pool.submit(self._scrape_detail, detail_url, area))
+
+        # 完了待ちの間も停止リクエストを監視し、停止時は未着手分をキャンセル
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=STOP_POLL_INTERVAL)
+            if pending and not self.is_running_check():
+                print(f"[Constmap] 停止リクエスト受信: 残り{len(pending)}件をキャンセル")
+                for future in pending:
+                    future.cancel()
+                break
 
-        for page in range(1, 100):  # 最大100ページ
+    def _report_progress(self, force: bool = False):
+        """進捗を間引いて通知（呼び出し側で _result_lock を保持するか、単一スレッドから呼ぶ）"""
+        if not self.progress_callback or self.result_count == self._reported_count:
+            return
+        now = time.monotonic()
+        if (
+            force
+            or self.result_count % PROGRESS_EVERY == 0
+            or now - self._last_progress_at >= PROGRESS_INTERVAL
+        ):
+            self.progress_callback(self.result_count, 0)
+            self._last_progress_at = now
+            self._reported_count = self.result_count
+
+    def _wait_rate_limit(self, url: str):
+        """URLのホストごとのレート制限に従って待機"""
+        host = urlsplit(url).netloc
+        with self._rate_limiters_lock:
+            limiter = self._rate_limiters.get(host)
+            if limiter is None:
+                limiter = RateLimiter(REQUESTS_PER_SECOND, REQUEST_BURST)
+                self._rate_limiters[host] = limiter
+        limiter.acquire()
+
+    def _fetch_listing(self, url: str, base_url: str) -> Optional[Tuple[list, bytes]]:
+        """一覧ページから (詳細URLリスト, 本文ハッシュ) を取得（200以外は None）"""
+        self._wait_rate_limit(url)
+        with self._request_slots:
+            with self.session.get(url, timeout=15, stream=True) as r:
+                if r.status_code != 200:
+                    return None
+                return _extract_detail_urls(r, base_url)
+
+    def _scrape_all_pages(self, region: _Region):
+        """全ページをスキャン（九州版用、一覧ページは数ページずつ並列取得）"""
+        base_url = region.base_url
+        seen_urls = self._seen_urls
+        last_hash = None
+        page = 1
+
+        while page < MAX_LISTING_PAGES:
             if not self.is_running_check():
                 break
 
-            if page == 1:
-                url = f"{base_url}/?s"
-            else:
-                url = f"{base_url}/page/{page}?s"
+            pages = range(page, min(page + LISTING_BATCH_SIZE, MAX_LISTING_PAGES))
+            print(f"[Constmap] ページ {pages[0]}-{pages[-1]} スキャン中...")
+            futures = [
+                self._pool.submit(
+                    self._fetch_listing,
+                    f"{base_url}/?s" if p == 1 else f"{base_url}/page/{p}?s",
+                    base_url,
+                )
+                for p in pages
+            ]
+
+            finished = False
+            for p, future in zip(pages, futures):
+                if not self.is_running_check():
+                    finished = True
+                    break
 
-            print(f"[Constmap] ページ {page} スキャン中...")
+                try:
+                    listing = future.result()
+                except Exception as e:
+                    print(f"[Constmap] ページエラー: {e}")
+                    finished = True
+                    break
 
-            try:
-                r = requests.get(url, headers=HEADERS, timeout=15)
-                if r.status_code != 200:
+                if listing is None:
+                    finished = True
                     break
 
-                soup = BeautifulSoup(r.text, "html.parser")
-                links = soup.select('a[href*="/contractor/"]')
+                # 範囲外ページで最終ページが繰り返される場合
+                page_urls, page_hash = listing
+                if page_hash == last_hash:
+                    print(f"[Constmap] ページ {p}: 前ページと同一、終了")
+                    finished = True
+                    break
+                last_hash = page_hash
 
-                # 詳細URLを抽出
-                detail_urls = set()
-                for link in links:
-                    href = link.get("href", "")
-                    if href and "/contractor/" in href and href.rstrip("/")[-1].isdigit():
-                        if not href.startswith("http"):
-                            href = base_url + href
-                        detail_urls.add(href)
+                detail_urls = set(page_urls)
 
                 if not detail_urls:
-                    print(f"[Constmap] ページ {page}: リンクなし、終了")
+                    print(f"[Constmap] ページ {p}: リンクなし、終了")
+                    finished = True
                     break
 
                 # 新規URLのみ処理
                 new_urls = detail_urls - seen_urls
                 if not new_urls:
-                    print(f"[Constmap] ページ {page}: 新規なし、終了")
+                    print(f"[Constmap] ページ {p}: 新規なし、終了")
+                    finished = True
                     break
 
                 seen_urls.update(new_urls)
-                print(f"[Constmap] ページ {page}: {len(new_urls)}件")
-
-                for detail_url in new_urls:
-                    if not self.is_running_check():
-                        break
-
-                    self._scrape_detail(detail_url, region["name"])
-                    time.sleep(random.uniform(0.3, 0.6))
+                print(f"[Constmap] ページ {p}: {len(new_urls)}件")
 
-                time.sleep(0.5)
+                self._scrape_details(new_urls, region.name)
 
-            except Exception as e:
-                print(f"[Constmap] ページエラー: {e}")
+            if finished:
+                for future in futures:
+                    future.cancel()
                 break
 
-    def _scrape_by_areas(self, region: dict):
+            page += LISTING_BATCH_SIZE
+            time.sleep(0.5)
+
+    def _scrape_by_areas(self, region: _Region):
         """エリア別にスキャン（関西版用）"""
-        base_url = region["base_url"]
+        base_url = region.base_url
 
-        for area in region["areas"]:
+        for area in region.areas:
             if not self.is_running_check():
                 break
 
             print(f"[Constmap] エリア: {area}")
             area_base_url = f"{base_url}/contractor/area_cat/{area}"
-            seen_urls = set()
+            area_urls = set()
+            last_hash = None
             page = 1
 
             while True:
@@ -159,34 +388,29 @@ class ConstmapScraper:
                 url = f"{area_base_url}/page/{page}" if page > 1 else area_base_url
 
                 try:
-                    r = requests.get(url, headers=HEADERS, timeout=15)
-                    if r.status_code != 200:
+                    listing = self._fetch_listing(url, base_url)
+                    if listing is None:
                         break
 
-                    soup = BeautifulSoup(r.text, "html.parser")
+                    # 範囲外ページで最終ページが繰り返される場合
+                    listing_urls, page_hash = listing
+                    if page_hash == last_hash:
+                        break
+                    last_hash = page_hash
 
                     # 詳細リンクを抽出
-                    detail_urls = []
-                    for a in soup.select('a[href*="/contractor/"]'):
-                        href = a.get("href", "")
-                        if href and href.rstrip("/")[-1].isdigit():
-                            if not href.startswith("http"):
-                                href = base_url + href
-                            if href not in seen_urls:
-                                detail_urls.append(href)
-                                seen_urls.add(href)
-
-                    if not detail_urls:
+                    page_urls = [href for href in listing_urls if href not in area_urls]
+                    if not page_urls:
                         break
+                    area_urls.update(page_urls)
 
-                    print(f"[Constmap] {area} ページ{page}: {len(detail_urls)}件")
+                    # 複数エリアに掲載されている業者は最初のエリアでのみ取得
+                    detail_urls = [href for href in page_urls if href not in self._seen_urls]
+                    self._seen_urls.update(detail_urls)
 
-                    for detail_url in detail_urls:
-                        if not self.is_running_check():
-                            break
+                    print(f"[Constmap] {area} ページ{page}: {len(detail_urls)}件")
 
-                        self._scrape_detail(detail_url, area)
-                        time.sleep(random.uniform(0.3, 0.6))
+                    self._scrape_details(detail_urls, area)
 
                     page += 1
                     time.sleep(0.5)
@@ -196,63 +420,105 @@ class ConstmapScraper:
                     break
 
     def _scrape_detail(self, url: str, area: str):
-        """詳細ページから情報を抽出"""
+        """詳細ページから情報を抽出（ワーカースレッドで実行）"""
+        if not self.is_running_check():
+            return
+
         try:
-            r = requests.get(url, headers=HEADERS, timeout=15)
-            if r.status_code != 200:
+            html = self._fetch_detail(url)
+            if html is None:
                 return
 
-            soup = BeautifulSoup(r.text, "html.parser")
-
-            # 店名
-            name_tag = soup.select_one("h2.h.mainTxt")
-            company_name = ""
-            if name_tag:
-                # ルビ（読み仮名）を除去
-                ruby = name_tag.find("span", class_="sm")
-                if ruby:
-                    ruby.extract()
-                company_name = name_tag.get_text(strip=True)
-
-            if not company_name:
+            parsed = self._parse_detail(html)
+            if not parsed:
                 return
 
-            # 住所
-            address = ""
-            address_th = soup.find("th", string="住所")
-            if address_th:
-                address = address_th.find_next("td").get_text(strip=True)
-
-            # 電話番号
-            phone = ""
-            phone_th = soup.find("th", string="電話番号")
-            if phone_th:
-                phone = phone_th.find_next("td").get_text(strip=True)
-
-            # ホームページ
-            website = ""
-            hp_th = soup.find("th", string="ホームページ")
-            if hp_th:
-                a_tag = hp_th.find_next("td").find("a")
-                if a_tag:
-                    website = a_tag.get("href", "")
-
             data = {
-                "company_name": company_name,
+                "company_name": parsed["company_name"],
                 "area": area,
-                "address": address,
-                "phone": phone,
-                "website": website,
+                "address": parsed["address"],
+                "phone": parsed["phone"],
+                "website": parsed["website"],
                 "source_url": url,
             }
 
-            self.result_count += 1
-            if self.result_callback:
-                self.result_callback(data)
-            if self.progress_callback:
-                self.progress_callback(self.result_count, 0)
+            with self._result_lock:
+                self.result_count += 1
+                if self.result_callback:
+                    self.result_callback(data)
+                self._report_progress()
 
-            print(f"[Constmap] {company_name[:30]}")
+            print(f"[Constmap] {parsed['company_name'][:30]}")
 
         except Exception as e:
             print(f"[Constmap] 詳細取得エラー: {e}")
+
+    def _fetch_detail(self, url: str) -> Optional[bytes]:
+        """詳細ページのHTMLを取得（有効期限内のキャッシュがあれば再利用）"""
+        cache_file = DETAIL_CACHE_DIR / (hashlib.sha1(url.encode()).hexdigest() + ".html")
+        if self.use_cache:
+            try:
+                if time.time() - cache_file.stat().st_mtime < DETAIL_CACHE_TTL:
+                    return cache_file.read_bytes()
+            except OSError:
+                pass
+
+        # ホストごとのレートと同時リクエスト数を制限
+        self._wait_rate_limit(url)
+        if not self.is_running_check():
+            return None
+        with self._request_slots:
+            r = self.session.get(url, timeout=15)
+        if r.status_code != 200:
+            return None
+
+        # r.text（文字コード推定＋デコード）は使わずバイト列のまま扱う
+        html = r.content
+        if self.use_cache:
+            try:
+                DETAIL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                tmp_file = cache_file.with_suffix(f".{threading.get_ident()}.tmp")
+                tmp_file.write_bytes(html)
+                os.replace(tmp_file, cache_file)
+            except OSError as e:
+                print(f"[Constmap] キャッシュ書き込みエラー: {e}")
+        return html
+
+    @staticmethod
+    def _parse_detail(html: bytes) -> Optional[dict]:
+        """詳細ページのHTMLから会社情報を抽出（会社名がなければ None）"""
+        root = lxml.html.document_fromstring(_detail_region(html), parser=HTML_PARSER)
+
+        # 店名
+        company_name = ""
+        name_tag = next(iter(DETAIL_NAME_XPATH(root)), None)
+        if name_tag is not None:
+            # ルビ（読み仮名）を除去
+            for ruby in DETAIL_RUBY_XPATH(name_tag):
+                ruby.drop_tree()
+            company_name = _text(name_tag)
+
+        if not company_name:
+            return None
+
+        # th → td を1回の走査で収集（必要な見出しが揃ったら終了）
+        fields = dict.fromkeys(DETAIL_LABELS.values(), "")
+        found = set()
+        for th in root.iterfind(".//th"):
+            key = DETAIL_LABELS.get(_text(th))
+            if not key or key in found:
+                continue
+            td = next(iter(NEXT_TD_XPATH(th)), None)
+            if td is None:
+                continue
+            found.add(key)
+            if key == "website":
+                a_tag = td.find(".//a")
+                fields[key] = a_tag.get("href", "") if a_tag is not None else ""
+            else:
+                fields[key] = _text(td)
+            if len(found) == len(DETAIL_LABELS):
+                break
+
+        fields["company_name"] = company_name
+        return fields
@@ -1,665 +1,786 @@
-"""
-SILAS SaaS スクレイピング実行エンジン
-サーバーからの指示を受けてスクレイピングを実行
-"""
-import threading
-import subprocess
-import signal
-import os
-import sys
-import importlib
-from typing import Optional, Any
-from pathlib import Path
-
-# SaaSClientはapp_menubar.pyから渡されるので、ここではインポート不要
-
-
-def _get_update_dir() -> Path:
-    """更新ファイルの保存ディレクトリを取得"""
-    if sys.platform == "darwin":
-        return Path.home() / "Library" / "Application Support" / "SILAS Worker" / "scrapers"
-    elif sys.platform == "win32":
-        return Path(os.environ.get("APPDATA", "")) / "SILAS Worker" / "scrapers"
-    else:
-        return Path.home() / ".silas-worker" / "scrapers"
-
-
-def _import_scraper(module_name: str, class_name: str):
-    """
-    スクレイパーをインポート（更新版を優先）
-    """
-    update_dir = _get_update_dir()
-    updated_file = update_dir / f"{module_name}.py"
-
-    # 更新版が存在する場合はそちらを使用
-    if updated_file.exists():
-        # 既にインポートされている場合はリロード
-        if module_name in sys.modules:
-            del sys.modules[module_name]
-
-        # 更新ディレクトリを一時的にパスの先頭に追加
-        update_dir_str = str(update_dir)
-        if update_dir_str not in sys.path:
-            sys.path.insert(0, update_dir_str)
-
-        try:
-            module = importlib.import_module(module_name)
-            print(f"[Executor] 更新版スクレイパーを使用: {updated_file}")
-            return getattr(module, class_name)
-        except Exception as e:
-            print(f"[Executor] 更新版インポートエラー: {e}、バンドル版を使用")
-
-    # バンドル版を使用
-    module = importlib.import_module(f"scraper.{module_name}")
-    print(f"[Executor] バンドル版スクレイパーを使用: scraper.{module_name}")
-    return getattr(module, class_name)
-
-
-class ScrapingExecutor:
-    """SaaSからのスクレイピング指示を実行"""
-
-    def __init__(self, client):
-        self.client = client
-        self.client.on_request = self.handle_request
-        self.current_task_id: Optional[str] = None
-        self._is_running = False
-        self._stop_flag = False
-        self._current_scraper: Optional[Any] = None  # 現在実行中のスクレイパーインスタンス
-        print(f"[Executor] 初期化完了: on_request設定済み")
-
-    def handle_request(self, request: dict):
-        """スクレイピングリクエストを処理"""
-        task_id = request.get("task_id")
-        scraper_type = request.get("scraper_type", "google_maps")
-        keywords = request.get("keywords", [])
-        filters = request.get("filters", {})
-
-        print(f"[Executor] タスク受信: {task_id}")
-        print(f"[Executor] タイプ: {scraper_type}")
-        print(f"[Executor] キーワード: {keywords}")
-
-        self.current_task_id = task_id
-        self._is_running = True
-        self._stop_flag = False
-
-        # 別スレッドでスクレイピング実行
-        thread = threading.Thread(
-            target=self._execute_scraping,
-            args=(task_id, scraper_type, keywords, filters),
-            daemon=True,
-        )
-        thread.start()
-
-    def stop(self):
-        """実行中のスクレイピングを停止（ブラウザも強制終了）"""
-        print(f"[Executor] 停止リクエスト受信")
-        self._stop_flag = True
-        self._is_running = False
-
-        # 現在のスクレイパーのブラウザを強制終了
-        if self._current_scraper:
-            try:
-                # Seleniumドライバーの場合
-                if hasattr(self._current_scraper, 'driver') and self._current_scraper.driver:
-                    print(f"[Executor] Seleniumブラウザを強制終了中...")
-                    try:
-                        self._current_scraper.driver.quit()
-                    except:
-                        pass
-                    self._current_scraper.driver = None
-
-                # Playwrightブラウザの場合
-                if hasattr(self._current_scraper, 'browser') and self._current_scraper.browser:
-                    print(f"[Executor] Playwrightブラウザを強制終了中...")
-                    try:
-                        self._current_scraper.browser.close()
-                    except:
-                        pass
-                    self._current_scraper.browser = None
-
-                # Playwrightコンテキストの場合
-                if hasattr(self._current_scraper, 'context') and self._current_scraper.context:
-                    try:
-                        self._current_scraper.context.close()
-                    except:
-                        pass
-                    self._current_scraper.context = None
-
-                print(f"[Executor] ブラウザを終了しました")
-            except Exception as e:
-                print(f"[Executor] ブラウザ終了エラー: {e}")
-
-        # 残っているChromeプロセスも強制終了（念のため）
-        self._kill_browser_processes()
-
-    def is_running(self) -> bool:
-        """実行中かどうか"""
-        return self._is_running and not self._stop_flag
-
-    def _kill_browser_processes(self):
-        """残っているブラウザプロセスを強制終了"""
-        try:
-            import platform
-            if platform.system() == "Darwin":  # macOS
-                # このスクリプトが起動したChrome/Chromiumプロセスのみ終了
-                subprocess.run(["pkill", "-f", "chromium.*--headless"], capture_output=True)
-                subprocess.run(["pkill", "-f", "chrome.*--headless"], capture_output=True)
-            elif platform.system() == "Linux":
-                subprocess.run(["pkill", "-f", "chromium.*--headless"], capture_output=True)
-                subprocess.run(["pkill", "-f", "chrome.*--headless"], capture_output=True)
-            print(f"[Executor] ヘッドレスブラウザプロセスをクリーンアップしました")
-        except Exception as e:
-            print(f"[Executor] プロセスクリーンアップエラー: {e}")
-
-    def _execute_scraping(self, task_id: str, scraper_type: str, keywords: list, filters: dict):
-        """スクレイピングを実行"""
-        try:
-            if scraper_type in ["google_maps", "gmaps", "gmaps_fast"]:
-                self._run_google_maps(task_id, keywords, filters)
-            elif scraper_type == "houzz":
-                self._run_houzz(task_id, filters)
-            elif scraper_type == "reshopnavi":
-                self._run_reshopnavi(task_id, filters)
-            elif scraper_type == "garden_club":
-                self._run_garden_club(task_id, filters)
-            elif scraper_type == "ieto":
-                self._run_ieto(task_id, filters)
-            elif scraper_type == "hagukumi":
-                self._run_hagukumi(task_id, filters)
-            elif scraper_type == "ietatta":
-                self._run_ietatta(task_id, filters)
-            elif scraper_type == "garden_plat":
-                self._run_garden_plat(task_id, filters)
-            elif scraper_type == "constmap":
-                self._run_constmap(task_id, filters)
-            elif scraper_type == "hotpepper":
-                self._run_hotpepper(task_id, filters)
-            elif scraper_type == "meo_checker":
-                self._run_meo_checker(task_id, filters)
-            else:
-                self.client.send_error(task_id, f"未対応のスクレイパー: {scraper_type}")
-        except Exception as e:
-            print(f"[Executor] エラー: {e}")
-            import traceback
-            traceback.print_exc()
-            self.client.send_error(task_id, str(e))
-        finally:
-            self._is_running = False
-
-    def _run_google_maps(self, task_id: str, keywords: list, filters: dict):
-        """Google Mapsスクレイパーを実行"""
-        GoogleMapsScraper = _import_scraper("google_maps", "GoogleMapsScraper")
-
-        if not keywords:
-            self.client.send_error(task_id, "キーワードが指定されていません")
-            return
-
-        print(f"[Executor] Google Maps スクレイピング開始")
-        print(f"[Executor] キーワード数: {len(keywords)}")
-
-        def on_progress(current, total):
-            self.client.send_progress(task_id, current, total)
-
-        def on_result(data):
-            self.client.send_result(task_id, data)
-
-        def is_running():
-            return not self._stop_flag
-
-        try:
-            scraper = GoogleMapsScraper(
-                progress_callback=on_progress,
-                result_callback=on_result,
-                is_running_check=is_running,
-            )
-            self._current_scraper = scraper  # スクレイパーインスタンスを保持
-            count = scraper.run(keywords, filters)
-            if not self._stop_flag:
-                self.client.send_completed(task_id)
-                print(f"[Executor] 完了: {count}件取得")
-            else:
-                self.client.send_stopped(task_id, count)
-                print(f"[Executor] 停止: {count}件取得済み")
-        except Exception as e:
-            print(f"[Executor] スクレイピングエラー: {e}")
-            import traceback
-            traceback.print_exc()
-            self.client.send_error(task_id, str(e))
-        finally:
-            self._current_scraper = None
-
-    def _run_houzz(self, task_id: str, filters: dict):
-        """Houzzスクレイパーを実行"""
-        HouzzScraper = _import_scraper("houzz", "HouzzScraper")
-        try:
-            HOUZZ_PROFESSIONS = _import_scraper("houzz", "HOUZZ_PROFESSIONS")
-        except:
-            from scraper.houzz import HOUZZ_PROFESSIONS
-
-        professions = filters.get("professions", [])
-        prefectures = filters.get("prefectures", [])
-
-        if not professions:
-            self.client.send_error(task_id, "職種が指定されていません")
-            return
-
-        if not prefectures:
-            self.client.send_error(task_id, "都道府県が指定されていません")
-            return
-
-        print(f"[Executor] Houzz スクレイピング開始")
-        print(f"[Executor] 職種数: {len(professions)}")
-        print(f"[Executor] 都道府県数: {len(prefectures)}")
-
-        def on_progress(current, total):
-            self.client.send_progress(task_id, current, total)
-
-        def on_result(data):
-            self.client.send_result(task_id, data)
-
-        def is_running():
-            return not self._stop_flag
-
-        try:
-            scraper = HouzzScraper(
-                progress_callback=on_progress,
-                result_callback=on_result,
-                is_running_check=is_running,
-            )
-            self._current_scraper = scraper
-            count = scraper.run(professions, prefectures, filters)
-            if not self._stop_flag:
-                self.client.send_completed(task_id)
-                print(f"[Executor] 完了: {count}件取得")
-            else:
-                self.client.send_stopped(task_id, count)
-                print(f"[Executor] 停止: {count}件取得済み")
-        except Exception as e:
-            print(f"[Executor] Houzzスクレイピングエラー: {e}")
-            import traceback
-            traceback.print_exc()
-            self.client.send_error(task_id, str(e))
-        finally:
-            self._current_scraper = None
-
-    def _run_reshopnavi(self, task_id: str, filters: dict):
-        """リショップナビスクレイパーを実行（ID総当り方式）"""
-        ReshopnaviScraper = _import_scraper("reshopnavi", "ReshopnaviScraper")
-
-        start_id = filters.get("start_id", 1)
-        end_id = filters.get("end_id", 9500)
-
-        print(f"[Executor] リショップナビ スクレイピング開始")
-        print(f"[Executor] ID範囲: {start_id} - {end_id}")
-
-        def on_progress(current, total):
-            self.client.send_progress(task_id, current, total)
-
-        def on_result(data):
-            self.client.send_result(task_id, data)
-
-        def is_running():
-            return not self._stop_flag
-
-        try:
-            scraper = ReshopnaviScraper(
-                progress_callback=on_progress,
-                result_callback=on_result,
-                is_running_check=is_running,
-            )
-            self._current_scraper = scraper
-            count = scraper.run(filters)
-            if not self._stop_flag:
-                self.client.send_completed(task_id)
-                print(f"[Executor] 完了: {count}件取得")
-            else:
-                self.client.send_stopped(task_id, count)
-                print(f"[Executor] 停止: {count}件取得済み")
-        except Exception as e:
-            print(f"[Executor] リショップナビスクレイピングエラー: {e}")
-            import traceback
-            traceback.print_exc()
-            self.client.send_error(task_id, str(e))
-        finally:
-            self._current_scraper = None
-
-    def _run_garden_club(self, task_id: str, filters: dict):
-        """ガーデンクラブスクレイパーを実行"""
-        GardenClubScraper = _import_scraper("garden_club", "GardenClubScraper")
-
-        prefectures = filters.get("prefectures", [])
-
-        if not prefectures:
-            self.client.send_error(task_id, "都道府県が指定されていません")
-            return
-
-        print(f"[Executor] ガーデンクラブ スクレイピング開始")
-        print(f"[Executor] 都道府県数: {len(prefectures)}")
-
-        def on_progress(current, total):
-            self.client.send_progress(task_id, current, total)
-
-        def on_result(data):
-            self.client.send_result(task_id, data)
-
-        def is_running():
-            return not self._stop_flag
-
-        try:
-            scraper = GardenClubScraper(
-                progress_callback=on_progress,
-                result_callback=on_result,
-                is_running_check=is_running,
-            )
-            self._current_scraper = scraper
-            count = scraper.run(prefectures, filters)
-            if not self._stop_flag:
-                self.client.send_completed(task_id)
-                print(f"[Executor] 完了: {count}件取得")
-            else:
-                self.client.send_stopped(task_id, count)
-                print(f"[Executor] 停止: {count}件取得済み")
-        except Exception as e:
-            print(f"[Executor] ガーデンクラブスクレイピングエラー: {e}")
-            import traceback
-            traceback.print_exc()
-            self.client.send_error(task_id, str(e))
-        finally:
-            self._current_scraper = None
-
-    def _run_ieto(self, task_id: str, filters: dict):
-        """イエトスクレイパーを実行（中国・四国地方のビルダー）"""
-        IetoScraper = _import_scraper("ieto", "IetoScraper")
-        try:
-            IETO_AREAS = _import_scraper("ieto", "IETO_AREAS")
-        except:
-            from scraper.ieto import IETO_AREAS
-
-        areas = filters.get("areas", list(IETO_AREAS.keys()))
-
-        print(f"[Executor] イエト スクレイピング開始")
-        print(f"[Executor] 対象エリア: {areas}")
-
-        def on_progress(current, total):
-            self.client.send_progress(task_id, current, total)
-
-        def on_result(data):
-            self.client.send_result(task_id, data)
-
-        def is_running():
-            return not self._stop_flag
-
-        try:
-            scraper = IetoScraper(
-                progress_callback=on_progress,
-                result_callback=on_result,
-                is_running_check=is_running,
-            )
-            self._current_scraper = scraper
-            count = scraper.run(filters)
-            if not self._stop_flag:
-                self.client.send_completed(task_id)
-                print(f"[Executor] 完了: {count}件取得")
-            else:
-                self.client.send_stopped(task_id, count)
-                print(f"[Executor] 停止: {count}件取得済み")
-        except Exception as e:
-            print(f"[Executor] イエトスクレイピングエラー: {e}")
-            import traceback
-            traceback.print_exc()
-            self.client.send_error(task_id, str(e))
-        finally:
-            self._current_scraper = None
-
-    def _run_hagukumi(self, task_id: str, filters: dict):
-        """ハグクミスクレイパーを実行（ID総当り方式）"""
-        HagukumiScraper = _import_scraper("hagukumi", "HagukumiScraper")
-
-        start_id = filters.get("start_id", 1)
-        end_id = filters.get("end_id", 7500)
-
-        print(f"[Executor] ハグクミ スクレイピング開始")
-        print(f"[Executor] ID範囲: {start_id} - {end_id}")
-
-        def on_progress(current, total):
-            self.client.send_progress(task_id, current, total)
-
-        def on_result(data):
-            self.client.send_result(task_id, data)
-
-        def is_running():
-            return not self._stop_flag
-
-        try:
-            scraper = HagukumiScraper(
-                progress_callback=on_progress,
-                result_callback=on_result,
-                is_running_check=is_running,
-            )
-            self._current_scraper = scraper
-            count = scraper.run(filters)
-            if not self._stop_flag:
-                self.client.send_completed(task_id)
-                print(f"[Executor] 完了: {count}件取得")
-            else:
-                self.client.send_stopped(task_id, count)
-                print(f"[Executor] 停止: {count}件取得済み")
-        except Exception as e:
-            print(f"[Executor] ハグクミスクレイピングエラー: {e}")
-            import traceback
-            traceback.print_exc()
-            self.client.send_error(task_id, str(e))
-        finally:
-            self._current_scraper = None
-
-    def _run_ietatta(self, task_id: str, filters: dict):
-        """イエタッタスクレイパーを実行（全国12地域の住宅会社）"""
-        IetattaScraper = _import_scraper("ietatta", "IetattaScraper")
-        try:
-            IETATTA_REGIONS = _import_scraper("ietatta", "IETATTA_REGIONS")
-        except:
-            from scraper.ietatta import IETATTA_REGIONS
-
-        regions = filters.get("regions", list(IETATTA_REGIONS.keys()))
-
-        print(f"[Executor] イエタッタ スクレイピング開始")
-        print(f"[Executor] 対象地域: {regions}")
-
-        def on_progress(current, total):
-            self.client.send_progress(task_id, current, total)
-
-        def on_result(data):
-            self.client.send_result(task_id, data)
-
-        def is_running():
-            return not self._stop_flag
-
-        try:
-            scraper = IetattaScraper(
-                progress_callback=on_progress,
-                result_callback=on_result,
-                is_running_check=is_running,
-            )
-            self._current_scraper = scraper
-            count = scraper.run({"regions": regions})
-            if not self._stop_flag:
-                self.client.send_completed(task_id)
-                print(f"[Executor] 完了: {count}件取得")
-            else:
-                self.client.send_stopped(task_id, count)
-                print(f"[Executor] 停止: {count}件取得済み")
-        except Exception as e:
-            print(f"[Executor] イエタッタスクレイピングエラー: {e}")
-            import traceback
-            traceback.print_exc()
-            self.client.send_error(task_id, str(e))
-        finally:
-            self._current_scraper = None
-
-    def _run_garden_plat(self, task_id: str, filters: dict):
-        """ガーデンプラットスクレイパーを実行（ID総当り方式）"""
-        GardenplatScraper = _import_scraper("garden_plat", "GardenplatScraper")
-
-        start_id = filters.get("start_id", 1)
-        end_id = filters.get("end_id", 1200)
-
-        print(f"[Executor] ガーデンプラット スクレイピング開始")
-        print(f"[Executor] ID範囲: {start_id} - {end_id}")
-
-        def on_progress(current, total):
-            self.client.send_progress(task_id, current, total)
-
-        def on_result(data):
-            self.client.send_result(task_id, data)
-
-        def is_running():
-            return not self._stop_flag
-
-        try:
-            scraper = GardenplatScraper(
-                progress_callback=on_progress,
-                result_callback=on_result,
-                is_running_check=is_running,
-            )
-            self._current_scraper = scraper
-            count = scraper.run(filters)
-            if not self._stop_flag:
-                self.client.send_completed(task_id)
-                print(f"[Executor] 完了: {count}件取得")
-            else:
-                self.client.send_stopped(task_id, count)
-                print(f"[Executor] 停止: {count}件取得済み")
-        except Exception as e:
-            print(f"[Executor] ガーデンプラットスクレイピングエラー: {e}")
-            import traceback
-            traceback.print_exc()
-            self.client.send_error(task_id, str(e))
-        finally:
-            self._current_scraper = None
-
-    def _run_constmap(self, task_id: str, filters: dict):
-        """コンストマップスクレイパーを実行（関西・九州の建設業者）"""
-        ConstmapScraper = _import_scraper("constmap", "ConstmapScraper")
-        try:
-            CONSTMAP_REGIONS = _import_scraper("constmap", "CONSTMAP_REGIONS")
-        except:
-            from scraper.constmap import CONSTMAP_REGIONS
-
-        regions = filters.get("regions", list(CONSTMAP_REGIONS.keys()))
-
-        print(f"[Executor] コンストマップ スクレイピング開始")
-        print(f"[Executor] 対象リージョン: {regions}")
-
-        def on_progress(current, total):
-            self.client.send_progress(task_id, current, total)
-
-        def on_result(data):
-            self.client.send_result(task_id, data)
-
-        def is_running():
-            return not self._stop_flag
-
-        try:
-            scraper = ConstmapScraper(
-                progress_callback=on_progress,
-                result_callback=on_result,
-                is_running_check=is_running,
-            )
-            self._current_scraper = scraper
-            count = scraper.run({"regions": regions})
-            if not self._stop_flag:
-                self.client.send_completed(task_id)
-                print(f"[Executor] 完了: {count}件取得")
-            else:
-                self.client.send_stopped(task_id, count)
-                print(f"[Executor] 停止: {count}件取得済み")
-        except Exception as e:
-            print(f"[Executor] コンストマップスクレイピングエラー: {e}")
-            import traceback
-            traceback.print_exc()
-            self.client.send_error(task_id, str(e))
-        finally:
-            self._current_scraper = None
-
-    def _run_hotpepper(self, task_id: str, filters: dict):
-        """ホットペッパー スクレイパーを実行"""
-        HotpepperEstheScraper = _import_scraper("hotpepper", "HotpepperEstheScraper")
-
-        print(f"[Executor] ホットペッパー スクレイピング開始")
-
-        def on_progress(current, total):
-            self.client.send_progress(task_id, current, total)
-
-        def on_result(data):
-            self.client.send_result(task_id, data)
-
-        def is_running():
-            return not self._stop_flag
-
-        try:
-            scraper = HotpepperEstheScraper(
-                progress_callback=on_progress,
-                result_callback=on_result,
-                is_running_check=is_running,
-            )
-            self._current_scraper = scraper
-            count = scraper.run(filters)
-            if not self._stop_flag:
-                self.client.send_completed(task_id)
-                print(f"[Executor] 完了: {count}件取得")
-            else:
-                self.client.send_stopped(task_id, count)
-                print(f"[Executor] 停止: {count}件取得済み")
-        except Exception as e:
-            print(f"[Executor] ホットペッパー スクレイピングエラー: {e}")
-            import traceback
-            traceback.print_exc()
-            self.client.send_error(task_id, str(e))
-        finally:
-            self._current_scraper = None
-
-    def _run_meo_checker(self, task_id: str, filters: dict):
-        """MEO診断チェッカーを実行"""
-        MeoCheckerScraper = _import_scraper("meo_checker", "MeoCheckerScraper")
-
-        accounts = filters.get("accounts", [])
-        run_diagnosis = filters.get("runDiagnosis", True)  # デフォルトでTrue
-
-        if not accounts:
-            self.client.send_error(task_id, "アカウントが指定されていません")
-            return
-
-        print(f"[Executor] MEO診断チェック開始")
-        print(f"[Executor] アカウント数: {len(accounts)}")
-        print(f"[Executor] 診断実行: {run_diagnosis}")
-
-        def on_progress(current, total):
-            self.client.send_progress(task_id, current, total)
-
-        def on_result(data):
-            self.client.send_result(task_id, data)
-
-        def is_running():
-            return not self._stop_flag
-
-        try:
-            scraper = MeoCheckerScraper(
-                progress_callback=on_progress,
-                result_callback=on_result,
-                is_running_check=is_running,
-            )
-            self._current_scraper = scraper
-            count = scraper.run(accounts, run_diagnosis=run_diagnosis)
-            if not self._stop_flag:
-                self.client.send_completed(task_id)
-                print(f"[Executor] 完了: {count}件取得")
-            else:
-                self.client.send_stopped(task_id, count)
-                print(f"[Executor] 停止: {count}件取得済み")
-        except Exception as e:
-            print(f"[Executor] MEO診断チェックエラー: {e}")
-            import traceback
-            traceback.print_exc()
-            self.client.send_error(task_id, str(e))
-        finally:
-            self._current_scraper = None
+"""
+SILAS SaaS スクレイピング実行エンジン
+サーバーからの指示を受けてスクレイピングを実行
+"""
+import atexit
+import threading
+import subprocess
+import signal
+import os
+import sys
+import time
+import importlib
+import inspect
+import selectors
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pathlib import Path
+
+try:
+    import psutil
+except ImportError:  # psutil がない環境では pkill にフォールバック
+    psutil = None
+
+# SaaSClientはapp_menubar.pyから渡されるので、ここではインポート不要
+
+log = logging.getLogger("silas.executor")
+_log_listener: Optional[QueueListener] = None
+
+
+def _setup_logging():
+    """
+    executor・スクレイパーのログをキュー経由で出力する（2回目以降は何もしない）
+    各スレッドはキューに積むだけで、標準出力への書き込みはリスナースレッドがまとめて行う
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+    log_queue: queue.Queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    _log_listener = QueueListener(log_queue, stream_handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    # 親ロガー "silas" に付けて、各スクレイパーのロガー（silas.<モジュール名>）も同じ経路で出力する
+    root = logging.getLogger("silas")
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    root.propagate = False
+
+
+_IS_DARWIN = sys.platform == "darwin"
+_IS_WIN = sys.platform == "win32"
+_IS_LINUX = sys.platform.startswith("linux")
+
+# terminate 後に kill へ切り替えるまでの待ち時間（秒）
+BROWSER_EXIT_TIMEOUT = 3
+# 更新ディレクトリの再スキャン間隔（秒）
+UPDATE_SCAN_INTERVAL = 2.0
+# 結果送信のバッチサイズと最大待ち時間（秒）
+RESULT_BATCH_SIZE = 64
+RESULT_FLUSH_INTERVAL = 0.25
+
+
+def _get_update_dir() -> Path:
+    """更新ファイルの保存ディレクトリを取得"""
+    if _IS_DARWIN:
+        return Path.home() / "Library" / "Application Support" / "SILAS Worker" / "scrapers"
+    elif _IS_WIN:
+        return Path(os.environ.get("APPDATA", "")) / "SILAS Worker" / "scrapers"
+    else:
+        return Path.home() / ".silas-worker" / "scrapers"
+
+
+def _wait_procs_exit(procs: list, timeout: float) -> list:
+    """
+    プロセスの終了を待ち、timeout 後も生存しているものを返す
+    Linux (pidfd_open 対応) では pidfd を selector で待ち、終了した瞬間に起床する
+    それ以外の環境では psutil.wait_procs にフォールバック
+    """
+    if not procs:
+        return []
+    if not hasattr(os, "pidfd_open"):
+        _, alive = psutil.wait_procs(procs, timeout=timeout)
+        return alive
+
+    selector = selectors.DefaultSelector()
+    waiting = {}
+    try:
+        for proc in procs:
+            try:
+                fd = os.pidfd_open(proc.pid)
+            except ProcessLookupError:
+                continue  # 既に終了
+            except OSError:
+                # 古いカーネル等で pidfd が使えない場合
+                _, alive = psutil.wait_procs(procs, timeout=timeout)
+                return alive
+            selector.register(fd, selectors.EVENT_READ, proc)
+            waiting[fd] = proc
+
+        deadline = time.monotonic() + timeout
+        while waiting:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for key, _ in selector.select(remaining):
+                selector.unregister(key.fd)
+                os.close(key.fd)
+                proc = waiting.pop(key.fd)
+                try:
+                    proc.wait(timeout=0)  # 自プロセスの子ならゾンビを回収
+                except psutil.Error:
+                    pass
+        return list(waiting.values())
+    finally:
+        selector.close()
+        for fd in waiting:
+            os.close(fd)
+
+
+class _UpdateDirWatcher:
+    """
+    更新ディレクトリ内のスクレイパー（*.py）の mtime を保持
+    バックグラウンドスレッドが UPDATE_SCAN_INTERVAL 秒ごとに再スキャンするため、
+    タスクごとにファイルシステムへ問い合わせる必要がない
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._mtimes: Dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """初回スキャンと監視スレッドの起動（2回目以降は何もしない）"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._scan()
+            self._thread = threading.Thread(
+                target=self._watch, name="silas-update-watcher", daemon=True,
+            )
+            self._thread.start()
+
+    def mtime_ns(self, module_name: str) -> int:
+        """更新版の mtime（更新版がなければ 0）"""
+        self.start()
+        return self._mtimes.get(module_name, 0)
+
+    def _scan(self):
+        mtimes = {}
+        try:
+            with os.scandir(_get_update_dir()) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".py") and entry.is_file():
+                        mtimes[entry.name[:-3]] = entry.stat().st_mtime_ns
+        except OSError:
+            pass  # 更新ディレクトリなし
+        self._mtimes = mtimes  # 参照の差し替えのみ（読み手はロック不要）
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            self._scan()
+
+
+_update_watcher = _UpdateDirWatcher(UPDATE_SCAN_INTERVAL)
+
+
+def _import_scraper(module_name: str, class_name: str):
+    """
+    スクレイパーをインポート（更新版を優先）
+    """
+    return _import_attr(module_name, class_name)
+
+
+def _import_attr(module_name: str, attr: str):
+    """
+    スクレイパーモジュールの属性（クラス・定数）を取得
+    モジュールはキャッシュ済みのものを使うため、再インポートは発生しない
+    """
+    module = _load_scraper_module(module_name, _update_watcher.mtime_ns(module_name))
+    return getattr(module, attr)
+
+
+# スクレイパーモジュールの読み込みを直列化する（先読みスレッドと最初のタスクが同時に sys.modules を書き換えない）
+_scraper_module_lock = threading.Lock()
+# 読み込み済みモジュール: (モジュール名, 更新版の mtime) -> モジュール（_scraper_module_lock で保護）
+_scraper_modules: Dict[Tuple[str, int], Any] = {}
+
+
+def _load_scraper_module(module_name: str, updated_mtime_ns: int):
+    """
+    スクレイパーモジュールを読み込む（結果はキャッシュ）
+    更新版ファイルの mtime をキーに含めるため、更新されたら自動的に再読み込みされる
+    更新版の読み込みに失敗してバンドル版を使ったときはキャッシュせず、次回また更新版を試す
+    """
+    key = (module_name, updated_mtime_ns)
+    with _scraper_module_lock:
+        module = _scraper_modules.get(key)
+        if module is not None:
+            return module
+
+        update_dir = _get_update_dir()
+        updated_file = update_dir / f"{module_name}.py"
+
+        # 更新版が存在する場合はそちらを使用
+        if updated_mtime_ns:
+            # 既にインポートされている場合はリロード
+            if module_name in sys.modules:
+                del sys.modules[module_name]
+
+            # 更新ディレクトリを一時的にパスの先頭に追加
+            update_dir_str = str(update_dir)
+            if update_dir_str not in sys.path:
+                sys.path.insert(0, update_dir_str)
+
+            try:
+                module = importlib.import_module(module_name)
+                log.info(f"[Executor] 更新版スクレイパーを使用: {updated_file}")
+                _cache_scraper_module(key, module)
+                return module
+            except Exception as e:
+                log.warning(f"[Executor] 更新版インポートエラー: {e}、バンドル版を使用")
+
+        # バンドル版を使用
+        module = importlib.import_module(f"scraper.{module_name}")
+        log.info(f"[Executor] バンドル版スクレイパーを使用: scraper.{module_name}")
+        if not updated_mtime_ns:
+            _cache_scraper_module(key, module)
+        return module
+
+
+def _cache_scraper_module(key: Tuple[str, int], module: Any):
+    """読み込んだモジュールを保存（同じモジュールの古い mtime の分は捨てる、_scraper_module_lock を保持して呼ぶ）"""
+    for old_key in [k for k in _scraper_modules if k[0] == key[0]]:
+        del _scraper_modules[old_key]
+    _scraper_modules[key] = module
+
+
+class BrowserPool:
+    """
+    Selenium WebDriver をタスク間で再利用するプール
+    スクレイパーごとに起動オプションが異なるため、キー（モジュール名）ごとに保持する
+    （並列ワーカーの分も再利用できるよう、キーごとに max_idle_per_key 台まで待機させる）
+    使用回数・経過時間が上限を超えたブラウザは破棄して起動し直す（Chromeのメモリリーク対策）
+    """
+
+    def __init__(self, max_uses: int = 50, max_age_seconds: float = 300, max_idle_per_key: int = 4):
+        self.max_uses = max_uses
+        self.max_age_seconds = max_age_seconds
+        self.max_idle_per_key = max_idle_per_key
+        self._idle: Dict[str, List[Tuple[Any, float, int]]] = {}  # key -> [(driver, 起動時刻, 使用回数)]
+        self._in_use: Dict[int, Tuple[Any, str, float, int]] = {}  # id(driver) -> (driver, key, 起動時刻, 使用回数)
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, factory: Callable[[], Any]) -> Any:
+        """ブラウザを取得（再利用できるものがなければ factory で起動）"""
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                entry = idle.pop() if idle else None
+            if entry is None:
+                break
+            driver, created_at, uses = entry
+            if self._is_reusable(driver, created_at, uses):
+                log.info(f"[BrowserPool] ブラウザを再利用: {key} ({uses}回目)")
+                with self._lock:
+                    self._in_use[id(driver)] = (driver, key, created_at, uses)
+                return driver
+            _quit_driver(driver)
+
+        driver = factory()
+        with self._lock:
+            self._in_use[id(driver)] = (driver, key, time.monotonic(), 0)
+        return driver
+
+    def release(self, driver: Any):
+        """使い終わったブラウザを返却（上限超過・異常時は終了）"""
+        with self._lock:
+            entry = self._in_use.pop(id(driver), None)
+        if entry is None:
+            _quit_driver(driver)  # discard 済み、またはプール外のブラウザ
+            return
+
+        _, key, created_at, uses = entry
+        uses += 1
+        if not self._is_reusable(driver, created_at, uses):
+            _quit_driver(driver)
+            return
+
+        try:
+            # 前のタスクのログイン状態等を持ち越さない（Cookie は表示中のドメイン分のみ消えるため先に削除）
+            driver.delete_all_cookies()
+            # 待機中にページのスクリプト・通信が動き続けないよう空ページにしておく
+            driver.get("about:blank")
+        except Exception:
+            _quit_driver(driver)
+            return
+
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_key:
+                idle.append((driver, created_at, uses))
+                return
+        _quit_driver(driver)
+
+    def in_use(self) -> List[Any]:
+        """貸し出し中のブラウザ一覧（実行中タスクのもの。待機中のブラウザは含まない）"""
+        with self._lock:
+            return [entry[0] for entry in self._in_use.values()]
+
+    def discard(self, driver: Any):
+        """貸し出し中のブラウザを返却せずに終了（停止時。後から release されても何もしない）"""
+        with self._lock:
+            self._in_use.pop(id(driver), None)
+        _quit_driver(driver)
+
+    def close_all(self):
+        """待機中のブラウザをすべて終了"""
+        with self._lock:
+            idle = [entry for entries in self._idle.values() for entry in entries]
+            self._idle.clear()
+        for driver, _, _ in idle:
+            _quit_driver(driver)
+
+    def _is_reusable(self, driver: Any, created_at: float, uses: int) -> bool:
+        if uses >= self.max_uses or time.monotonic() - created_at >= self.max_age_seconds:
+            return False
+        if getattr(driver, "session_id", True) is None:  # quit() 済み
+            return False
+        try:
+            driver.current_url  # セッションが生きているか確認
+            return True
+        except Exception:
+            return False
+
+
+# 停止時に閉じるスクレイパーの属性（Selenium: driver / Playwright: browser, context）
+_SHUTDOWN_ATTRS = ("driver", "browser", "context")
+
+
+def _safe_close(obj: Any):
+    """Selenium ドライバーは quit()、Playwright のブラウザ/コンテキストは close() で終了"""
+    try:
+        if hasattr(obj, "quit"):
+            obj.quit()
+        else:
+            obj.close()
+    except Exception:
+        pass
+
+
+def _driver_service_pid(driver: Any) -> Optional[int]:
+    """Selenium ドライバーが起動したドライバープロセス（chromedriver）の PID（なければ None）"""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return getattr(process, "pid", None)
+
+
+def _accepts_kwarg(cls: Any, name: str) -> bool:
+    """コンストラクタが name 引数（または **kwargs）を受け取るか（引数追加前の更新版スクレイパー対策）"""
+    try:
+        params = inspect.signature(cls).parameters
+    except (TypeError, ValueError):
+        return False
+    return name in params or any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values())
+
+
+def _quit_driver(driver: Any):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+class _ResultBatcher:
+    """
+    結果・進捗の送信をまとめるバッファ
+    結果は RESULT_BATCH_SIZE 件たまるか RESULT_FLUSH_INTERVAL 秒経過で送信し、
+    進捗は送信時点の最新値のみを送る
+    client に send_results（一括送信）があればそれを使い、なければ1件ずつ送る
+    """
+
+    def __init__(self, client, task_id: str):
+        self.client = client
+        self.task_id = task_id
+        self._results: list = []
+        self._progress: Optional[Tuple[int, int]] = None
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()  # 送信順序を保つ
+
+    def add_result(self, data: dict):
+        with self._lock:
+            self._results.append(data)
+            full = len(self._results) >= RESULT_BATCH_SIZE
+            if not full:
+                self._schedule()
+        if full:
+            self.flush()
+
+    def set_progress(self, current: int, total: int):
+        with self._lock:
+            self._progress = (current, total)
+            self._schedule()
+
+    def flush(self):
+        """バッファの内容をすべて送信"""
+        with self._send_lock:
+            with self._lock:
+                results, self._results = self._results, []
+                progress, self._progress = self._progress, None
+                if self._timer:
+                    self._timer.cancel()
+                    self._timer = None
+
+            if results:
+                if hasattr(self.client, "send_results"):
+                    self.client.send_results(self.task_id, results)
+                else:
+                    for data in results:
+                        self.client.send_result(self.task_id, data)
+            if progress:
+                self.client.send_progress(self.task_id, *progress)
+
+    def _schedule(self):
+        """一定時間後の送信を予約（self._lock を保持して呼ぶ）"""
+        if self._timer is None:
+            self._timer = threading.Timer(RESULT_FLUSH_INTERVAL, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+
+class ScrapingExecutor:
+    """SaaSからのスクレイピング指示を実行"""
+
+    def __init__(self, client):
+        _setup_logging()
+        self.client = client
+        self.client.on_request = self.handle_request
+        self.current_task_id: Optional[str] = None
+        self._is_running = False  # ワーカースレッドでタスクを実行中か（タスク終了時にのみ False に戻す）
+        self._stop_event: Optional[threading.Event] = None  # 現在のタスクの停止フラグ（タスクごとに作成）
+        self._current_scraper: Optional[Any] = None  # 現在実行中のスクレイパーインスタンス
+        self._lock = threading.RLock()  # current_task_id / _is_running / _stop_event / _current_scraper の保護
+        # タスク実行用のワーカースレッド（タスクごとにスレッドを生成しない）
+        # 同時に受け付けるタスクは1件のみなので1スレッドで足りる
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="silas-scrape")
+        # ブラウザ系スクレイパーで共有するブラウザ（初回使用時に起動）
+        self._browser_pool = BrowserPool()
+        atexit.register(self.shutdown)
+        # 初回タスクでのインポート待ちをなくすため、全スクレイパーを裏で先読み
+        threading.Thread(target=self._prewarm_scrapers, name="silas-prewarm", daemon=True).start()
+        log.info(f"[Executor] 初期化完了: on_request設定済み")
+
+    def handle_request(self, request: dict):
+        """スクレイピングリクエストを処理"""
+        task_id = request.get("task_id")
+        scraper_type = request.get("scraper_type", "google_maps")
+        keywords = request.get("keywords", [])
+        filters = request.get("filters", {})
+
+        log.info(f"[Executor] タスク受信: {task_id}")
+        log.info(f"[Executor] タイプ: {scraper_type}")
+        log.info(f"[Executor] キーワード: {keywords}")
+
+        with self._lock:
+            if self._is_running:
+                log.info(f"[Executor] 実行中のタスクがあるため拒否: {task_id}")
+                self.client.send_error(task_id, f"別のタスクを実行中です: {self.current_task_id}")
+                return
+            self.current_task_id = task_id
+            self._is_running = True
+            # 停止フラグはタスクごとに作り直す（前のタスクの停止が新しいタスクに影響しない）
+            stop_event = threading.Event()
+            self._stop_event = stop_event
+
+        # ワーカースレッドでスクレイピング実行
+        self._pool.submit(self._execute_scraping, task_id, scraper_type, keywords, filters, stop_event)
+
+    def _prewarm_scrapers(self):
+        """SCRAPERS の全モジュールをインポートしておく（失敗は無視、実行時に改めて報告される）"""
+        for spec in set(SCRAPERS.values()):
+            try:
+                _import_scraper(spec.module, spec.cls)
+            except Exception as e:
+                log.warning(f"[Executor] 先読みスキップ: {spec.module} ({e})")
+
+    def shutdown(self):
+        """ワーカースレッドと待機中のブラウザを終了（プロセス終了時）"""
+        self._pool.shutdown(wait=False)
+        self._browser_pool.close_all()
+
+    def stop(self):
+        """
+        実行中のスクレイピングを停止（ブラウザも強制終了、2回目以降の呼び出しは何もしない）
+        _is_running はタスクのワーカースレッドが終了した時点で False に戻る（それまでは新しいタスクを受け付けない）
+        """
+        with self._lock:
+            stop_event = self._stop_event
+            if not self._is_running or stop_event is None or stop_event.is_set():
+                return
+            log.info(f"[Executor] 停止リクエスト受信")
+            stop_event.set()
+
+            # このタスクのブラウザ: プールから借りているもの（詳細用・並列ワーカー分も含む）と
+            # スクレイパーが直接起動したもの。プールで待機中のブラウザには触れない
+            pooled = self._browser_pool.in_use()
+            others = []
+            scraper = self._current_scraper
+            if scraper:
+                for attr in _SHUTDOWN_ATTRS:
+                    obj = getattr(scraper, attr, None)
+                    if obj and all(obj is not d for d in pooled):
+                        others.append(obj)
+                        setattr(scraper, attr, None)
+
+            # 終了後はドライバープロセスを辿れないので先に控えておく
+            driver_pids = [pid for pid in map(_driver_service_pid, pooled + others) if pid]
+
+            log.info(f"[Executor] ブラウザを強制終了中... ({len(pooled) + len(others)}件)")
+            for driver in pooled:
+                # プールの管理から外して終了（スクレイパーの _close_browser からの release は何もしない）
+                self._browser_pool.discard(driver)
+            for obj in others:
+                _safe_close(obj)
+
+        # 残っているブラウザプロセスも強制終了（念のため）
+        self._kill_browser_processes(driver_pids)
+
+    def is_running(self) -> bool:
+        """実行中かどうか"""
+        stop_event = self._stop_event
+        return self._is_running and not (stop_event and stop_event.is_set())
+
+    def _kill_browser_processes(self, driver_pids: List[int]):
+        """停止したタスクのドライバープロセス（chromedriver）とその子孫のブラウザを強制終了"""
+        if psutil is None:
+            self._pkill_headless_browsers()
+            # pkill は待機中のブラウザも終了させるので、プールからも外す
+            self._browser_pool.close_all()
+            return
+
+        try:
+            browsers = []
+            for pid in driver_pids:
+                try:
+                    driver_proc = psutil.Process(pid)
+                    browsers.extend(driver_proc.children(recursive=True))
+                    browsers.append(driver_proc)
+                except psutil.Error:
+                    continue  # quit() で終了済み
+
+            for proc in browsers:
+                try:
+                    proc.terminate()
+                except psutil.NoSuchProcess:
+                    pass
+
+            alive = _wait_procs_exit(browsers, BROWSER_EXIT_TIMEOUT)
+            for proc in alive:
+                try:
+                    proc.kill()
+                except psutil.NoSuchProcess:
+                    pass
+            log.info(f"[Executor] ブラウザプロセスをクリーンアップしました: {len(browsers)}件")
+        except Exception as e:
+            log.warning(f"[Executor] プロセスクリーンアップエラー: {e}")
+
+    def _pkill_headless_browsers(self):
+        """ヘッドレスブラウザを pkill で強制終了（psutil がない場合）"""
+        try:
+            if _IS_DARWIN:  # macOS
+                # このスクリプトが起動したChrome/Chromiumプロセスのみ終了
+                subprocess.run(["pkill", "-f", "chromium.*--headless"], capture_output=True)
+                subprocess.run(["pkill", "-f", "chrome.*--headless"], capture_output=True)
+            elif _IS_LINUX:
+                subprocess.run(["pkill", "-f", "chromium.*--headless"], capture_output=True)
+                subprocess.run(["pkill", "-f", "chrome.*--headless"], capture_output=True)
+            log.info(f"[Executor] ヘッドレスブラウザプロセスをクリーンアップしました")
+        except Exception as e:
+            log.warning(f"[Executor] プロセスクリーンアップエラー: {e}")
+
+    def _execute_scraping(
+        self, task_id: str, scraper_type: str, keywords: list, filters: dict, stop_event: threading.Event,
+    ):
+        """スクレイピングを実行（SCRAPERS の定義に従って共通処理）"""
+        try:
+            spec = SCRAPERS.get(scraper_type)
+            if spec is None:
+                self.client.send_error(task_id, f"未対応のスクレイパー: {scraper_type}")
+                return
+            self._run_scraper(task_id, spec, keywords, filters, stop_event)
+        except Exception as e:
+            log.exception(f"[Executor] エラー: {e}")
+            self.client.send_error(task_id, str(e))
+        finally:
+            with self._lock:
+                # 自分のタスクの状態だけを片付ける
+                if self._stop_event is stop_event:
+                    self._is_running = False
+
+    def _run_scraper(
+        self, task_id: str, spec: "ScraperSpec", keywords: list, filters: dict, stop_event: threading.Event,
+    ):
+        """スクレイパーを生成・実行し、完了/停止/エラーをサーバーへ通知"""
+        ScraperClass = _import_scraper(spec.module, spec.cls)
+
+        try:
+            args, kwargs = spec.build_args(keywords, filters)
+        except InvalidRequest as e:
+            self.client.send_error(task_id, str(e))
+            return
+
+        log.info(f"[Executor] {spec.label} スクレイピング開始")
+
+        batcher = _ResultBatcher(self.client, task_id)
+        on_progress = batcher.set_progress
+        on_result = batcher.add_result
+
+        def is_running():
+            return not stop_event.is_set()
+
+        extra = {}
+        if spec.uses_browser and _accepts_kwarg(ScraperClass, "browser_pool"):
+            extra["browser_pool"] = self._browser_pool
+
+        try:
+            scraper = ScraperClass(
+                progress_callback=on_progress,
+                result_callback=on_result,
+                is_running_check=is_running,
+                **extra,
+            )
+            with self._lock:
+                self._current_scraper = scraper  # スクレイパーインスタンスを保持
+            try:
+                count = scraper.run(*args, **kwargs)
+            finally:
+                # 完了・停止・エラー通知より先に残りの結果を送る
+                batcher.flush()
+            if not stop_event.is_set():
+                self.client.send_completed(task_id)
+                log.info(f"[Executor] 完了: {count}件取得")
+            else:
+                self.client.send_stopped(task_id, count)
+                log.info(f"[Executor] 停止: {count}件取得済み")
+        except Exception as e:
+            log.exception(f"[Executor] {spec.label}スクレイピングエラー: {e}")
+            self.client.send_error(task_id, str(e))
+        finally:
+            with self._lock:
+                self._current_scraper = None
+
+
+class InvalidRequest(Exception):
+    """タスクの指定内容が不正（サーバーへエラーとして返す）"""
+
+
+# ================== スクレイパーごとの run() 引数の組み立て ==================
+# 各関数は (keywords, filters) を受け取り、scraper.run に渡す (args, kwargs) を返す
+# 必須項目がなければ InvalidRequest を送出する
+
+def _google_maps_args(keywords: list, filters: dict):
+    if not keywords:
+        raise InvalidRequest("キーワードが指定されていません")
+    log.info(f"[Executor] キーワード数: {len(keywords)}")
+    return (keywords, filters), {}
+
+
+def _houzz_args(keywords: list, filters: dict):
+    professions = filters.get("professions", [])
+    prefectures = filters.get("prefectures", [])
+    if not professions:
+        raise InvalidRequest("職種が指定されていません")
+    if not prefectures:
+        raise InvalidRequest("都道府県が指定されていません")
+    log.info(f"[Executor] 職種数: {len(professions)}")
+    log.info(f"[Executor] 都道府県数: {len(prefectures)}")
+    return (professions, prefectures, filters), {}
+
+
+def _id_range_args(default_end_id: int):
+    """ID総当り方式（リショップナビ・ハグクミ・ガーデンプラット）"""
+    def build(keywords: list, filters: dict):
+        start_id = filters.get("start_id", 1)
+        end_id = filters.get("end_id", default_end_id)
+        log.info(f"[Executor] ID範囲: {start_id} - {end_id}")
+        return (filters,), {}
+    return build
+
+
+def _garden_club_args(keywords: list, filters: dict):
+    prefectures = filters.get("prefectures", [])
+    if not prefectures:
+        raise InvalidRequest("都道府県が指定されていません")
+    log.info(f"[Executor] 都道府県数: {len(prefectures)}")
+    return (prefectures, filters), {}
+
+
+def _ieto_args(keywords: list, filters: dict):
+    try:
+        IETO_AREAS = _import_attr("ieto", "IETO_AREAS")
+    except (ImportError, AttributeError):
+        from scraper.ieto import IETO_AREAS
+    areas = filters.get("areas", list(IETO_AREAS.keys()))
+    log.info(f"[Executor] 対象エリア: {areas}")
+    return (filters,), {}
+
+
+def _ietatta_args(keywords: list, filters: dict):
+    try:
+        IETATTA_REGIONS = _import_attr("ietatta", "IETATTA_REGIONS")
+    except (ImportError, AttributeError):
+        from scraper.ietatta import IETATTA_REGIONS
+    regions = filters.get("regions", list(IETATTA_REGIONS.keys()))
+    log.info(f"[Executor] 対象地域: {regions}")
+    return ({**filters, "regions": regions},), {}
+
+
+def _constmap_args(keywords: list, filters: dict):
+    try:
+        CONSTMAP_REGIONS = _import_attr("constmap", "CONSTMAP_REGIONS")
+    except (ImportError, AttributeError):
+        from scraper.constmap import CONSTMAP_REGIONS
+    regions = filters.get("regions", list(CONSTMAP_REGIONS.keys()))
+    log.info(f"[Executor] 対象リージョン: {regions}")
+    return ({**filters, "regions": regions},), {}
+
+
+def _filters_args(keywords: list, filters: dict):
+    return (filters,), {}
+
+
+def _meo_checker_args(keywords: list, filters: dict):
+    accounts = filters.get("accounts", [])
+    run_diagnosis = filters.get("runDiagnosis", True)  # デフォルトでTrue
+    if not accounts:
+        raise InvalidRequest("アカウントが指定されていません")
+    log.info(f"[Executor] アカウント数: {len(accounts)}")
+    log.info(f"[Executor] 診断実行: {run_diagnosis}")
+    kwargs = {"run_diagnosis": run_diagnosis}
+    # 以下は古い更新版スクレイパーでも動くよう、指定があるときだけ渡す
+    if filters.get("accountWorkers"):
+        kwargs["account_workers"] = filters["accountWorkers"]
+    if filters.get("reuseLogin"):
+        kwargs["reuse_login"] = True
+    return (accounts,), kwargs
+
+
+@dataclass(frozen=True)
+class ScraperSpec:
+    """スクレイパー種別ごとの定義"""
+
+    module: str  # モジュール名（更新版/バンドル版の解決に使用）
+    cls: str  # スクレイパークラス名
+    label: str  # ログ表示名
+    build_args: Callable[[list, dict], Tuple[tuple, dict]]
+    uses_browser: bool = False  # True なら BrowserPool を browser_pool 引数で渡す（コンストラクタが受け取る場合のみ）
+
+
+_GOOGLE_MAPS = ScraperSpec(
+    "google_maps", "GoogleMapsScraper", "Google Maps", _google_maps_args, uses_browser=True,
+)
+
+SCRAPERS: Dict[str, ScraperSpec] = {
+    "google_maps": _GOOGLE_MAPS,
+    "gmaps": _GOOGLE_MAPS,
+    "gmaps_fast": _GOOGLE_MAPS,
+    "houzz": ScraperSpec("houzz", "HouzzScraper", "Houzz", _houzz_args, uses_browser=True),
+    "reshopnavi": ScraperSpec("reshopnavi", "ReshopnaviScraper", "リショップナビ", _id_range_args(9500)),
+    "garden_club": ScraperSpec("garden_club", "GardenClubScraper", "ガーデンクラブ", _garden_club_args),
+    "ieto": ScraperSpec("ieto", "IetoScraper", "イエト", _ieto_args),
+    "hagukumi": ScraperSpec("hagukumi", "HagukumiScraper", "ハグクミ", _id_range_args(7500)),
+    "ietatta": ScraperSpec("ietatta", "IetattaScraper", "イエタッタ", _ietatta_args),
+    "garden_plat": ScraperSpec("garden_plat", "GardenplatScraper", "ガーデンプラット", _id_range_args(1200)),
+    "constmap": ScraperSpec("constmap", "ConstmapScraper", "コンストマップ", _constmap_args),
+    "hotpepper": ScraperSpec("hotpepper", "HotpepperEstheScraper", "ホットペッパー", _filters_args),
+    "meo_checker": ScraperSpec(
+        "meo_checker", "MeoCheckerScraper", "MEO診断チェック", _meo_checker_args, uses_browser=True,
+    ),
+}
@@ -2,13 +2,29 @@
 ガーデンクラブ スクレイパー (SaaS Worker版)
 ガーデン・エクステリア業者情報を収集
 """
+import os
 import re
 import time
+import hashlib
+import tempfile
+import threading
 import urllib.parse
-from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Optional, Tuple
 
 import requests
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+try:
+    from ._http_utils import RateLimiter
+except ImportError:
+    # 更新ディレクトリから単体モジュールとして読み込まれた場合
+    from scraper._http_utils import RateLimiter
 
 
 # 都道府県リスト
@@ -25,11 +41,194 @@ GARDEN_CLUB_PREFECTURES = [
 
 BASE_URL = "https://rgc.takasho.jp/db/"
 
+# 詳細ページ取得の並列数（filters["max_workers"] で上書き可）
+DEFAULT_MAX_WORKERS = 8
+# サイト全体へのリクエストレート（並列化してもこの速度を超えない）
+REQUESTS_PER_SECOND = 3.0
+REQUEST_BURST = 3
+
+# 詳細ページのディスクキャッシュ（filters["use_cache"]=False で無効化）
+DETAIL_CACHE_DIR = Path(tempfile.gettempdir()) / "silas-worker" / "garden_club_cache"
+DETAIL_CACHE_TTL = 7 * 24 * 60 * 60  # 秒
+
+# 正規表現はモジュール読み込み時にコンパイル
+SHOP_HTML_RE = re.compile(r'^\d+\.html$')
+ZIP_RE = re.compile(r'〒([\d-]+)')
+ADDR_INLINE_RE = re.compile(r'〒[\d-]+\s*(.+?)(?:[\[［]|$)')
+MAP_TAIL_RE = re.compile(r'[\[［]MAP[\]］]$')
+PHONE_RE = re.compile(r'[\d-]{9,}')
+HOURS_PREFIX_RE = re.compile(r'^営業時間：?')
+HOLIDAY_PREFIX_RE = re.compile(r'^定休日：?')
+# 〒 の次の li がこれらで始まる場合は住所とみなさない
+ADDR_STOP_PREFIXES = ('TEL', 'FAX', '営業', '定休', '〒', 'ホーム')
+# 一覧ページの次ページリンクに付くクラス（rel="next" と併せて文字列判定より先に見る）
+NEXT_LINK_CLASSES = frozenset(('next', 'pagination-next'))
+
+# 詳細ページはUTF-8固定（バイト列を直接パースする）
+# 空白だけのテキスト・コメント・処理命令はツリーに載せない（抽出には使わないためノード数とメモリを削減）
+HTML_PARSER = lxml.html.HTMLParser(
+    encoding='utf-8',
+    remove_blank_text=True,
+    remove_comments=True,
+    remove_pis=True,
+)
+# 詳細ページの各要素（div#sidenav 内の p.type / th・td を持つ行 / div.box 内の li）
+SIDENAV_XPATH = etree.XPath('//div[@id="sidenav"]')
+TYPE_XPATH = etree.XPath('.//p[contains(concat(" ", normalize-space(@class), " "), " type ")]')
+INFO_ROW_XPATH = etree.XPath('.//table//tr[th and td]')
+BOX_XPATH = etree.XPath('.//div[contains(concat(" ", normalize-space(@class), " "), " box ")]')
+LI_XPATH = etree.XPath('.//li')
+
 HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml",
+    # urllib3 が展開できる方式のみ（brotli パッケージがあれば br も含まれる）
+    "Accept-Encoding": ACCEPT_ENCODING,
 }
 
 
+def _create_session() -> requests.Session:
+    """Keep-Alive・コネクションプール付きのセッションを作成"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _text(el) -> str:
+    """要素内テキストを各ノードごとに strip して連結（get_text(strip=True) 相当）"""
+    return "".join(t.strip() for t in el.itertext())
+
+
+def _resolve_next_url(href: str) -> str:
+    """次ページリンクの href を絶対URLに変換"""
+    if href.startswith('?'):
+        return BASE_URL + 'list.php' + href
+    elif href.startswith('./'):
+        return BASE_URL + href[2:]
+    elif not href.startswith('http'):
+        return BASE_URL + href
+    return href
+
+
+def _is_list_table(el) -> bool:
+    """店舗一覧テーブル（table#list または table.body）か"""
+    return el.get('id') == 'list' or 'body' in (el.get('class') or '').split()
+
+
+def _is_next_link(el) -> bool:
+    """rel="next" または次ページ用クラス（a.next / a.pagination-next）を持つリンクか"""
+    return (
+        'next' in (el.get('rel') or '').split()
+        or not NEXT_LINK_CLASSES.isdisjoint((el.get('class') or '').split())
+    )
+
+
+def _parse_listing(response: requests.Response) -> Tuple[list, Optional[str]]:
+    """
+    一覧ページのレスポンスを逐次パースし、(店舗リンクのリスト, 次ページURL) を抽出
+    店舗一覧テーブルを読み終え、次ページリンクも見つかった時点で残りの本文は読まずに打ち切る
+    """
+    shops = {}
+    next_url = None
+    table_depth = 0  # 一覧テーブル内のネスト深さ（0 はテーブル外）
+    table_done = False
+    parser = etree.HTMLPullParser(events=("start", "end"), encoding="utf-8")
+    for chunk in response.iter_content(65536):
+        parser.feed(chunk)
+        for event, el in parser.read_events():
+            if el.tag == 'table':
+                if event == 'start':
+                    if table_depth or (not table_done and _is_list_table(el)):
+                        table_depth += 1
+                elif table_depth:
+                    table_depth -= 1
+                    table_done = table_depth == 0
+                continue
+            if event != 'end' or el.tag != 'a':
+                continue
+
+            href = el.get('href')
+            if not href:
+                continue
+            text = None
+            if table_depth:
+                text = _text(el)
+                if href.startswith('./') and text and SHOP_HTML_RE.match(href[2:]):
+                    shops.setdefault(BASE_URL + href[2:], text)
+            if next_url is None:
+                # rel="next" / 次ページ用クラスは属性だけで判定し、なければリンク文字列で判定
+                if _is_next_link(el):
+                    next_url = _resolve_next_url(href)
+                else:
+                    if text is None:
+                        text = _text(el)
+                    if '次の' in text or text == '次へ':
+                        next_url = _resolve_next_url(href)
+
+            if table_done and next_url:
+                return [(text, url) for url, text in shops.items()], next_url
+    parser.close()
+    return [(text, url) for url, text in shops.items()], next_url
+
+
+def _li_zip_address(text: str, data: dict, li_list: list, i: int):
+    """郵便番号と住所（住所が次の li に分かれている場合はそちらを使う）"""
+    match = ZIP_RE.search(text)
+    if match:
+        data['zip'] = match.group(1)
+    addr_in_line = ADDR_INLINE_RE.search(text)
+    if addr_in_line and len(addr_in_line.group(1).strip()) > 3:
+        data['address'] = MAP_TAIL_RE.sub('', addr_in_line.group(1)).strip()
+    elif i + 1 < len(li_list):
+        next_text = _text(li_list[i + 1])
+        if not next_text.startswith(ADDR_STOP_PREFIXES):
+            addr = MAP_TAIL_RE.sub('', next_text).strip()
+            if addr:
+                data['address'] = addr
+
+
+def _li_phone(text: str, data: dict, li_list: list, i: int):
+    match = PHONE_RE.search(text)
+    if match:
+        data['phone'] = match.group()
+
+
+def _li_fax(text: str, data: dict, li_list: list, i: int):
+    match = PHONE_RE.search(text)
+    if match:
+        data['fax'] = match.group()
+
+
+def _li_hours(text: str, data: dict, li_list: list, i: int):
+    data['hours'] = HOURS_PREFIX_RE.sub('', text, count=1).strip()
+
+
+def _li_holiday(text: str, data: dict, li_list: list, i: int):
+    data['holiday'] = HOLIDAY_PREFIX_RE.sub('', text, count=1).strip()
+
+
+# div.box 内の li の振り分け（先頭文字列、または marker を含むかを上から順に判定し、最初の1件のみ処理）
+LI_DISPATCH = (
+    ('〒', None, _li_zip_address),
+    ('TEL', 'TEL：', _li_phone),
+    ('FAX', 'FAX：', _li_fax),
+    ('営業時間', None, _li_hours),
+    ('定休日', None, _li_holiday),
+)
+
+
 class GardenClubScraper:
     """ガーデンクラブからエクステリア業者情報を収集"""
 
@@ -43,11 +242,17 @@ class GardenClubScraper:
         self.result_callback = result_callback
         self.is_running_check = is_running_check or (lambda: True)
         self.result_count = 0
+        self.session = _create_session()
+        self.use_cache = True
+        self._rate_limiter = RateLimiter(REQUESTS_PER_SECOND, REQUEST_BURST)
+        self._pool: Optional[ThreadPoolExecutor] = None
 
     def run(self, prefectures: list, filters: dict = None) -> int:
         """スクレイピングを実行"""
         filters = filters or {}
         self.result_count = 0
+        self.use_cache = filters.get("use_cache", True)
+        max_workers = int(filters.get("max_workers") or DEFAULT_MAX_WORKERS)
 
         total_prefs = len(prefectures)
         current_pref = 0
@@ -55,18 +260,25 @@ class GardenClubScraper:
         if self.progress_callback and total_prefs > 0:
             self.progress_callback(0, total_prefs)
 
-        for prefecture in prefectures:
-            if not self.is_running_check():
-                print("[GardenClub] 停止リクエスト受信")
-                break
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            for prefecture in prefectures:
+                if not self.is_running_check():
+                    print("[GardenClub] 停止リクエスト受信")
+                    break
 
-            current_pref += 1
-            print(f"[GardenClub] [{current_pref}/{total_prefs}] {prefecture} スキャン開始...")
+                current_pref += 1
+                print(f"[GardenClub] [{current_pref}/{total_prefs}] {prefecture} スキャン開始...")
 
-            self._scrape_prefecture(prefecture)
+                self._scrape_prefecture(prefecture)
 
-            if self.progress_callback:
-                self.progress_callback(current_pref, total_prefs)
+                if self.progress_callback:
+                    self.progress_callback(current_pref, total_prefs)
+        finally:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+            # プールしている接続を解放
+            self.session.close()
 
         return self.result_count
 
@@ -83,11 +295,9 @@ class GardenClubScraper:
                 break
 
             try:
-                r = requests.get(current_url, headers=HEADERS, timeout=30)
-                r.encoding = 'utf-8'
-                soup = BeautifulSoup(r.text, 'html.parser')
-
-                shop_links = self._get_shop_links(soup)
+                self._rate_limiter.acquire()
+                with self.session.get(current_url, timeout=30, stream=True) as r:
+                    shop_links, next_url = _parse_listing(r)
                 if not shop_links:
                     if page_num == 1:
                         print(f"[GardenClub] [{prefecture}] 店舗なし")
@@ -101,38 +311,33 @@ class GardenClubScraper:
 
                 print(f"[GardenClub] ページ{page_num}: {len(shop_links)}件")
 
-                for company_name, detail_url in shop_links:
+                # 詳細ページはワーカーで並列取得し、結果の通知はこのスレッドで行う
+                futures = [
+                    self._pool.submit(self._fetch_and_parse_detail, company_name, detail_url, prefecture)
+                    for company_name, detail_url in shop_links
+                ]
+                for future in as_completed(futures):
                     if not self.is_running_check():
+                        for f in futures:
+                            f.cancel()
                         break
 
-                    try:
-                        dr = requests.get(detail_url, headers=HEADERS, timeout=30)
-                        dr.encoding = 'utf-8'
-                        dsoup = BeautifulSoup(dr.text, 'html.parser')
-
-                        data = self._parse_detail(dsoup, detail_url, prefecture)
-                        if not data.get('company_name'):
-                            data['company_name'] = company_name
-
-                        self.result_count += 1
-                        if self.result_callback:
-                            self.result_callback(data)
+                    data = future.result()
+                    if data is None:
+                        continue
 
-                        print(f"[GardenClub] {data.get('company_name', 'N/A')[:30]}")
-                        time.sleep(0.3)
+                    self.result_count += 1
+                    if self.result_callback:
+                        self.result_callback(data)
 
-                    except Exception as e:
-                        print(f"[GardenClub] 詳細取得エラー: {e}")
-                        continue
+                    print(f"[GardenClub] {data.get('company_name', 'N/A')[:30]}")
 
-                # 次のページURL取得
-                next_url = self._get_next_page_url(soup)
+                # 次のページへ
                 if not next_url:
                     break
 
                 current_url = next_url
                 page_num += 1
-                time.sleep(0.5)
 
             except Exception as e:
                 print(f"[GardenClub] ページ取得エラー: {e}")
@@ -140,42 +345,47 @@ class GardenClubScraper:
 
         print(f"[GardenClub] [{prefecture}] 完了")
 
-    def _get_next_page_url(self, soup) -> Optional[str]:
-        """次のページURLを取得"""
-        for a in soup.find_all('a', href=True):
-            text = a.get_text(strip=True)
-            if '次の' in text or text == '次へ':
-                href = a['href']
-                if href.startswith('?'):
-                    return BASE_URL + 'list.php' + href
-                elif href.startswith('./'):
-                    return BASE_URL + href[2:]
-                elif not href.startswith('http'):
-                    return BASE_URL + href
-                return href
-        return None
-
-    def _get_shop_links(self, soup) -> list:
-        """店舗リンクを抽出"""
-        shops = []
-        seen = set()
-
-        list_table = soup.find('table', id='list') or soup.find('table', class_='body')
-        if not list_table:
-            return shops
-
-        for a in list_table.find_all('a', href=True):
-            href = a['href']
-            text = a.get_text(strip=True)
-            if href.startswith('./') and href.endswith('.html') and text:
-                if re.match(r'^\d+\.html$', href[2:]):
-                    full_url = BASE_URL + href[2:]
-                    if full_url not in seen:
-                        seen.add(full_url)
-                        shops.append((text, full_url))
-        return shops
-
-    def _parse_detail(self, soup, url: str, prefecture: str) -> dict:
+    def _fetch_and_parse_detail(self, company_name: str, url: str, prefecture: str) -> Optional[dict]:
+        """詳細ページを取得・解析（ワーカースレッドで実行、失敗時は None）"""
+        if not self.is_running_check():
+            return None
+        try:
+            html = self._fetch_detail(url)
+            root = lxml.html.document_fromstring(html, parser=HTML_PARSER)
+
+            data = self._parse_detail(root, url, prefecture)
+            if not data.get('company_name'):
+                data['company_name'] = company_name
+            return data
+
+        except Exception as e:
+            print(f"[GardenClub] 詳細取得エラー: {e}")
+            return None
+
+    def _fetch_detail(self, url: str) -> bytes:
+        """詳細ページのHTMLを取得（有効期限内のキャッシュがあれば再利用）"""
+        cache_file = DETAIL_CACHE_DIR / (hashlib.sha1(url.encode()).hexdigest() + ".html")
+        if self.use_cache:
+            try:
+                if time.time() - cache_file.stat().st_mtime < DETAIL_CACHE_TTL:
+                    return cache_file.read_bytes()
+            except OSError:
+                pass
+
+        self._rate_limiter.acquire()
+        r = self.session.get(url, timeout=30)
+        html = r.content
+        if self.use_cache and r.status_code == 200:
+            try:
+                DETAIL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                tmp_file = cache_file.with_suffix(f".{threading.get_ident()}.tmp")
+                tmp_file.write_bytes(html)
+                os.replace(tmp_file, cache_file)
+            except OSError as e:
+                print(f"[GardenClub] キャッシュ書き込みエラー: {e}")
+        return html
+
+    def _parse_detail(self, root, url: str, prefecture: str) -> dict:
         """詳細ページを解析"""
         data = {
             'prefecture': prefecture,
@@ -195,65 +405,34 @@ class GardenClubScraper:
             'url': url,
         }
 
-        sidenav = soup.find('div', id='sidenav') or soup
-
-        type_elem = sidenav.find('p', class_='type')
-        if type_elem:
-            data['type'] = type_elem.get_text(strip=True)
-
-        for table in sidenav.find_all('table'):
-            for row in table.find_all('tr'):
-                th = row.find('th')
-                td = row.find('td')
-                if th and td:
-                    key = th.get_text(strip=True)
-                    value = td.get_text(strip=True)
-                    if '会社名' in key:
-                        data['company_name'] = value
-                    elif '設立' in key:
-                        data['founded'] = value
-                    elif '代表者' in key:
-                        data['ceo'] = value
-
-        for box in sidenav.find_all('div', class_='box'):
-            li_list = box.find_all('li')
+        sidenav = next(iter(SIDENAV_XPATH(root)), root)
+
+        type_elem = next(iter(TYPE_XPATH(sidenav)), None)
+        if type_elem is not None:
+            data['type'] = _text(type_elem)
+
+        for row in INFO_ROW_XPATH(sidenav):
+            key = _text(row.find('th'))
+            value = _text(row.find('td'))
+            if '会社名' in key:
+                data['company_name'] = value
+            elif '設立' in key:
+                data['founded'] = value
+            elif '代表者' in key:
+                data['ceo'] = value
+
+        for box in BOX_XPATH(sidenav):
+            li_list = LI_XPATH(box)
             for i, li in enumerate(li_list):
-                text = li.get_text(strip=True)
-
-                # 郵便番号と住所
-                if text.startswith('〒'):
-                    match = re.search(r'〒([\d-]+)', text)
-                    if match:
-                        data['zip'] = match.group(1)
-                    addr_in_line = re.search(r'〒[\d-]+\s*(.+?)(?:[\[［]|$)', text)
-                    if addr_in_line and len(addr_in_line.group(1).strip()) > 3:
-                        addr = re.sub(r'[\[［]MAP[\]］]$', '', addr_in_line.group(1)).strip()
-                        data['address'] = addr
-                    elif i + 1 < len(li_list):
-                        next_text = li_list[i + 1].get_text(strip=True)
-                        if not any(next_text.startswith(p) for p in ['TEL', 'FAX', '営業', '定休', '〒', 'ホーム']):
-                            addr = re.sub(r'[\[［]MAP[\]］]$', '', next_text).strip()
-                            if addr:
-                                data['address'] = addr
-
-                elif text.startswith('TEL') or 'TEL：' in text:
-                    match = re.search(r'[\d-]{9,}', text)
-                    if match:
-                        data['phone'] = match.group()
-
-                elif text.startswith('FAX') or 'FAX：' in text:
-                    match = re.search(r'[\d-]{9,}', text)
-                    if match:
-                        data['fax'] = match.group()
-
-                elif text.startswith('営業時間'):
-                    data['hours'] = text.replace('営業時間：', '').replace('営業時間', '').strip()
-
-                elif text.startswith('定休日'):
-                    data['holiday'] = text.replace('定休日：', '').replace('定休日', '').strip()
-
-                a_tag = li.find('a', href=True)
-                if a_tag and 'ホームページ' in text:
-                    data['website'] = a_tag['href']
+                text = _text(li)
+
+                for prefix, marker, handler in LI_DISPATCH:
+                    if text.startswith(prefix) or (marker and marker in text):
+                        handler(text, data, li_list, i)
+                        break
+
+                a_tag = li.find('.//a[@href]')
+                if a_tag is not None and 'ホームページ' in text:
+                    data['website'] = a_tag.get('href')
 
         return data
@@ -3,22 +3,113 @@
 ID総当り方式で外構業者情報を収集
 ※ Seleniumは不要、HTTPリクエストのみ
 """
+import contextlib
+import os
 import re
 import time
-import random
-from typing import Callable, Optional
+import hashlib
+import sqlite3
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional, Tuple
 
 import requests
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+try:
+    from ._http_utils import AdaptiveRateLimiter, retry_after_seconds
+except ImportError:
+    # 更新ディレクトリから単体モジュールとして読み込まれた場合
+    from scraper._http_utils import AdaptiveRateLimiter, retry_after_seconds
 
 
 BASE_URL = "https://www.garden-plat.net/sp/shop{}/"
-HEADERS = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"}
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+    "Accept": "text/html,application/xhtml+xml",
+    # urllib3 が展開できる方式のみ（brotli パッケージがあれば br も含まれる）
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+
+# 正規表現はモジュール読み込み時にコンパイル
+ZIP_ADDR_RE = re.compile(r"(\d{3}-\d{4})\s*(.+)")
+PHONE_RE = re.compile(r"0\d{1,4}-\d{1,4}-\d{3,4}")
+WS_RE = re.compile(r"\s+")
+
+# サイトはUTF-8固定（バイト列を直接パースする）
+# 空白だけのテキスト・コメント・処理命令はツリーに載せない（抽出には使わないためノード数とメモリを削減）
+HTML_PARSER = lxml.html.HTMLParser(
+    encoding="utf-8",
+    remove_blank_text=True,
+    remove_comments=True,
+    remove_pis=True,
+)
+# 会社名（h2.c-heading.is-xlg.is-bottom）と情報ブロック（div.c-block-two-column__content）
+COMPANY_NAME_XPATH = etree.XPath(
+    '//h2[contains(concat(" ", normalize-space(@class), " "), " c-heading ")'
+    ' and contains(concat(" ", normalize-space(@class), " "), " is-xlg ")'
+    ' and contains(concat(" ", normalize-space(@class), " "), " is-bottom ")]'
+)
+INFO_BLOCK_XPATH = etree.XPath('//div[contains(concat(" ", normalize-space(@class), " "), " c-block-two-column__content ")]')
+# 会社名見出しのクラスを含まないページはパースせずに捨てる（XPath の必要条件）
+COMPANY_NAME_MARKER = b"c-heading"
+
+# 並列取得のワーカー数（filters["max_workers"] で上書き可）
+DEFAULT_MAX_WORKERS = 4
+# ワーカー1つあたりの先行投入ID数（停止リクエストへの応答性とメモリを抑える）
+IN_FLIGHT_PER_WORKER = 8
+
+# サイト全体へのリクエストレート（逐次実行時の 0.3〜0.6 秒間隔と同程度。429 を受けたら半減し、成功ごとに少しずつ戻す）
+REQUESTS_PER_SECOND = 2.0
+MIN_REQUESTS_PER_SECOND = 0.5
+REQUEST_BURST = 1
+RATE_RECOVERY_STEP = 0.05  # 成功1回あたりの回復量（件/秒）
+
+# 429 で Retry-After がないときの指数バックオフ（秒、上限）と、連続エラー時の待機秒
+MAX_BACKOFF_SECONDS = 60
+ERROR_BACKOFF_SECONDS = 30
+
+# 進捗通知の間引き（PROGRESS_EVERY ID ごと、または PROGRESS_INTERVAL 秒経過時）
+PROGRESS_EVERY = 16
+PROGRESS_INTERVAL = 0.2
 
 # デフォルトID範囲
 DEFAULT_START_ID = 1
 DEFAULT_END_ID = 1200
 
+# 店舗ページのディスクキャッシュ（filters["use_cache"]=False で無効化）
+CACHE_DIR = Path(tempfile.gettempdir()) / "silas-worker" / "garden_plat_cache"
+CACHE_TTL = 7 * 24 * 60 * 60  # 秒
+# 404 だったIDを実行をまたいで記録し、有効期限内は開始時に読み込んでリクエスト自体を省く
+# （新規店舗は末尾のIDに追加されるため、欠番も期限切れで再確認する）
+DEAD_IDS_DB = CACHE_DIR / "dead_ids.sqlite3"
+
+
+def _create_session() -> requests.Session:
+    """Keep-Alive・コネクションプール付きのセッションを作成"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 
 class GardenplatScraper:
     """ガーデンプラットからID総当りで外構業者情報を収集"""
@@ -33,11 +124,26 @@ class GardenplatScraper:
         self.result_callback = result_callback
         self.is_running_check = is_running_check or (lambda: True)
         self.result_count = 0
+        self.session = _create_session()
+        self.rate_limiter = AdaptiveRateLimiter(
+            REQUESTS_PER_SECOND, REQUEST_BURST, MIN_REQUESTS_PER_SECOND, RATE_RECOVERY_STEP
+        )
+        self.use_cache = True
+        # バックオフ（全ワーカー共通: この時刻まではリクエストしない）
+        self._backoff_lock = threading.Lock()
+        self._resume_at = 0.0
+        self._consecutive_429 = 0
+        self._dead_ids: frozenset = frozenset()  # 前回までに 404 だったID（実行中は読み取りのみ）
+        self._new_dead_ids: list = []  # 今回 404 だったID（ワーカーが追記、run スレッドで保存）
+        self._dead_ids_lock = threading.Lock()
 
     def run(self, filters: dict = None) -> int:
         """スクレイピングを実行"""
         filters = filters or {}
         self.result_count = 0
+        self.use_cache = filters.get("use_cache", True)
+        self._resume_at = 0.0
+        self._consecutive_429 = 0
 
         start_id = filters.get("start_id", DEFAULT_START_ID)
         end_id = filters.get("end_id", DEFAULT_END_ID)
@@ -45,82 +151,127 @@ class GardenplatScraper:
 
         print(f"[GardenPlat] ID範囲: {start_id} - {end_id} ({total}件)")
 
+        max_workers = int(filters.get("max_workers") or DEFAULT_MAX_WORKERS)
         retry_count = 0
+        processed = 0
+        reported = 0
+        last_progress_at = time.monotonic()
+        self._dead_ids = self._load_dead_ids() if self.use_cache else frozenset()
+        if self._dead_ids:
+            print(f"[GardenPlat] 既知の欠番ID: {len(self._dead_ids)}件をスキップ")
 
-        for shop_id in range(start_id, end_id + 1):
-            if not self.is_running_check():
-                print("[GardenPlat] 停止リクエスト受信")
-                break
-
-            result = self._scrape_shop(shop_id)
+        try:
+            # ID単位の取得はワーカーで並列実行し、結果はID順にこのスレッドで処理する
+            # 先行投入数を一定に保つスライディングウィンドウで、チャンク境界での待ちをなくす
+            window = max_workers * IN_FLIGHT_PER_WORKER
+            pending = deque()
+            next_id = start_id
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                while next_id <= end_id or pending:
+                    if not self.is_running_check():
+                        print("[GardenPlat] 停止リクエスト受信")
+                        break
+
+                    while next_id <= end_id and len(pending) < window:
+                        pending.append((next_id, pool.submit(self._scrape_shop, next_id)))
+                        next_id += 1
+
+                    shop_id, future = pending.popleft()
+                    result = future.result()
+
+                    if result == "rate_limited":
+                        # 待機はワーカー側で Retry-After に従って設定済み
+                        continue
+
+                    if result == "retry":
+                        # 待機はワーカー側で行う（ここで止めても投入済みのリクエストは止まらない）
+                        retry_count += 1
+                        if retry_count >= 3:
+                            print(f"[GardenPlat] Errors at {shop_id}, pausing {ERROR_BACKOFF_SECONDS}s...")
+                            self._pause(ERROR_BACKOFF_SECONDS)
+                            retry_count = 0
+                        continue
 
-            if result == "retry":
-                retry_count += 1
-                if retry_count >= 3:
-                    print(f"[GardenPlat] Rate limited at {shop_id}, waiting 30s...")
-                    time.sleep(30)
                     retry_count = 0
-                continue
 
-            retry_count = 0
-
-            if result:
-                self.result_count += 1
-                if self.result_callback:
-                    self.result_callback(result)
-                print(f"[GardenPlat] [{shop_id}] ✓ {result.get('company_name', '')[:30]}")
-
-            # 進捗は「処理済みID数/全ID数」で毎回報告（該当なしIDも前進させる）
-            if self.progress_callback:
-                processed = shop_id - start_id + 1
+                    if result:
+                        self.result_count += 1
+                        if self.result_callback:
+                            self.result_callback(result)
+                        print(f"[GardenPlat] [{shop_id}] ✓ {result.get('company_name', '')[:30]}")
+
+                    # 進捗は「処理済みID数/全ID数」で報告（該当なしIDも前進させる、通知は間引く）
+                    processed = shop_id - start_id + 1
+                    if self.progress_callback:
+                        now = time.monotonic()
+                        if processed % PROGRESS_EVERY == 0 or now - last_progress_at >= PROGRESS_INTERVAL:
+                            self.progress_callback(processed, total)
+                            reported = processed
+                            last_progress_at = now
+
+                    # 進捗報告（100件ごと）
+                    if shop_id % 100 == 0:
+                        print(f"[GardenPlat] Progress: {shop_id}/{end_id} ({self.result_count}件取得)")
+                        self._save_dead_ids()
+
+                # 停止時は未着手のIDを破棄
+                for _, future in pending:
+                    future.cancel()
+
+            # 間引きで送られていない最後の進捗を通知
+            if self.progress_callback and processed != reported:
                 self.progress_callback(processed, total)
-
-            # リクエスト間隔
-            time.sleep(random.uniform(0.3, 0.6))
-
-            # 進捗報告（100件ごと）
-            if shop_id % 100 == 0:
-                print(f"[GardenPlat] Progress: {shop_id}/{end_id} ({self.result_count}件取得)")
+        finally:
+            self._save_dead_ids()
+            # プールしている接続を解放
+            self.session.close()
 
         print(f"[GardenPlat] 完了: {self.result_count}件取得")
         return self.result_count
 
     def _scrape_shop(self, shop_id: int) -> Optional[dict]:
-        """個別店舗ページをスクレイピング"""
+        """個別店舗ページをスクレイピング（ワーカースレッドで実行）"""
+        if not self.is_running_check() or shop_id in self._dead_ids:
+            return None
+
         url = BASE_URL.format(shop_id)
 
         try:
-            r = requests.get(url, headers=HEADERS, timeout=15)
+            status_code, html = self._fetch_shop(shop_id, url)
 
-            if r.status_code == 404:
+            if status_code == 404:
                 return None
-            if r.status_code != 200:
+            if status_code == 429:
+                return "rate_limited"
+            if status_code != 200:
                 return "retry"
+            if COMPANY_NAME_MARKER not in html:
+                return None
 
-            soup = BeautifulSoup(r.text, "html.parser")
+            root = lxml.html.document_fromstring(html, parser=HTML_PARSER)
             data = {"shop_id": shop_id, "url": url}
 
             # 会社名を取得
-            h2 = soup.select_one("h2.c-heading.is-xlg.is-bottom")
-            data["company_name"] = self._clean_text(h2.get_text()) if h2 else ""
+            h2 = next(iter(COMPANY_NAME_XPATH(root)), None)
+            data["company_name"] = self._clean_text(h2.text_content()) if h2 is not None else ""
 
             if not data.get("company_name"):
                 return None
 
             # ブロック要素から情報を抽出
-            for blk in soup.select("div.c-block-two-column__content"):
-                h4 = blk.find("h4")
-                if not h4:
+            for blk in INFO_BLOCK_XPATH(root):
+                h4 = blk.find(".//h4")
+                if h4 is None:
                     continue
-                label = self._clean_text(h4.get_text())
-                p = blk.find("p")
-                if not p:
+                label = self._clean_text(h4.text_content())
+                p = blk.find(".//p")
+                if p is None:
                     continue
 
                 if label == "所在地":
-                    raw = self._clean_text(p.get_text())
+                    raw = self._clean_text(p.text_content())
                     raw = raw.replace("Google Mapで見る", "").strip()
-                    m = re.match(r"(\d{3}-\d{4})\s*(.+)", raw.replace("〒", ""))
+                    m = ZIP_ADDR_RE.match(raw.replace("〒", ""))
                     if m:
                         data["zip_code"] = m.group(1)
                         data["address"] = m.group(2).strip()
@@ -128,18 +279,18 @@ class GardenplatScraper:
                         data["zip_code"] = ""
                         data["address"] = raw
                 elif label == "電話番号":
-                    text = p.get_text()
-                    m = re.search(r"0\d{1,4}-\d{1,4}-\d{3,4}", text)
+                    text = p.text_content()
+                    m = PHONE_RE.search(text)
                     data["phone"] = m.group() if m else ""
                 elif label in ["FAX番号", "FAX", "ファックス"]:
-                    text = p.get_text()
-                    m = re.search(r"0\d{1,4}-\d{1,4}-\d{3,4}", text)
+                    text = p.text_content()
+                    m = PHONE_RE.search(text)
                     data["fax"] = m.group() if m else ""
                 elif label == "ホームページ":
-                    a = p.find("a")
-                    data["website"] = a["href"] if a and a.has_attr("href") else ""
+                    a = p.find(".//a")
+                    data["website"] = a.get("href", "") if a is not None else ""
                 elif label == "得意工事":
-                    data["specialty"] = self._clean_text(p.get_text())
+                    data["specialty"] = self._clean_text(p.text_content())
 
             # デフォルト値を設定
             data.setdefault("zip_code", "")
@@ -157,8 +308,119 @@ class GardenplatScraper:
             print(f"[GardenPlat] Error at {shop_id}: {e}")
             return None
 
+    def _fetch_shop(self, shop_id: int, url: str) -> Tuple[int, bytes]:
+        """店舗ページを取得し (ステータスコード, HTML) を返す（有効期限内のキャッシュがあれば再利用）"""
+        cache_file = CACHE_DIR / (hashlib.sha1(url.encode()).hexdigest() + ".html")
+        if self.use_cache:
+            try:
+                if time.time() - cache_file.stat().st_mtime < CACHE_TTL:
+                    return 200, cache_file.read_bytes()
+            except OSError:
+                pass
+
+        # 欠番IDが大半なので、まず本文なしの HEAD で存在確認する
+        # （HEAD 非対応で 405 等が返る場合は GET で判定）
+        # リクエストはワーカー全体でレート制限する（キャッシュヒット時は待たない）
+        self._wait_for_resume()
+        self.rate_limiter.acquire()
+        r = self.session.head(url, timeout=15, allow_redirects=True)
+        if r.status_code == 404:
+            status_code, html = 404, b""
+        elif r.status_code == 429:
+            status_code, html = 429, b""
+        else:
+            self._wait_for_resume()
+            self.rate_limiter.acquire()
+            r = self.session.get(url, timeout=15)
+            status_code, html = r.status_code, r.content
+
+        if status_code == 429:
+            self._on_rate_limited(shop_id, r.headers.get("Retry-After"))
+        elif status_code in (200, 404):
+            with self._backoff_lock:
+                self._consecutive_429 = 0
+            self.rate_limiter.recover()
+
+        if self.use_cache and status_code == 404:
+            with self._dead_ids_lock:
+                self._new_dead_ids.append(shop_id)
+        elif self.use_cache and status_code == 200:
+            try:
+                CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                tmp_file = cache_file.with_suffix(f".{threading.get_ident()}.tmp")
+                tmp_file.write_bytes(html)
+                os.replace(tmp_file, cache_file)
+            except OSError as e:
+                print(f"[GardenPlat] キャッシュ書き込みエラー: {e}")
+        return status_code, html
+
+    def _on_rate_limited(self, shop_id: int, retry_after: Optional[str]):
+        """
+        429 応答: レートを下げたうえで、Retry-After があればその秒数、
+        なければ指数バックオフで全ワーカーを待たせる
+        """
+        self.rate_limiter.slow_down()
+        with self._backoff_lock:
+            self._consecutive_429 += 1
+            wait = retry_after_seconds(retry_after)
+            if wait is None:
+                wait = min(2 ** self._consecutive_429, MAX_BACKOFF_SECONDS)
+        print(
+            f"[GardenPlat] Rate limited at {shop_id}, waiting {wait:.0f}s "
+            f"(レートを {self.rate_limiter.rate:.2f} 件/秒 に下げます)"
+        )
+        self._pause(wait)
+
+    def _pause(self, seconds: float):
+        """全ワーカーのリクエストを seconds 秒止める（既により長い待機中ならそのまま）"""
+        with self._backoff_lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def _wait_for_resume(self):
+        """バックオフ中なら再開時刻まで待つ（停止リクエストには即応する）"""
+        while self.is_running_check():
+            delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(min(delay, 1.0))
+
+    @staticmethod
+    def _load_dead_ids() -> frozenset:
+        """有効期限内に 404 だったIDを読み込む（初回実行でDBがまだなければ空）"""
+        if not DEAD_IDS_DB.exists():
+            return frozenset()
+        try:
+            # sqlite3 の with はトランザクションだけを扱うので、接続は closing で確実に閉じる
+            with contextlib.closing(sqlite3.connect(DEAD_IDS_DB)) as conn, conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS dead (id INTEGER PRIMARY KEY, checked_at REAL)")
+                rows = conn.execute(
+                    "SELECT id FROM dead WHERE checked_at > ?", (time.time() - CACHE_TTL,)
+                ).fetchall()
+            return frozenset(row[0] for row in rows)
+        except (OSError, sqlite3.Error) as e:
+            print(f"[GardenPlat] 欠番ID読み込みエラー: {e}")
+            return frozenset()
+
+    def _save_dead_ids(self):
+        """今回 404 だったIDをまとめて保存（run スレッドから呼ぶ）"""
+        with self._dead_ids_lock:
+            new_ids, self._new_dead_ids = self._new_dead_ids, []
+        if not new_ids:
+            return
+        now = time.time()
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with contextlib.closing(sqlite3.connect(DEAD_IDS_DB)) as conn, conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS dead (id INTEGER PRIMARY KEY, checked_at REAL)")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO dead (id, checked_at) VALUES (?, ?)",
+                    [(shop_id, now) for shop_id in new_ids],
+                )
+        except (OSError, sqlite3.Error) as e:
+            print(f"[GardenPlat] 欠番ID保存エラー: {e}")
+
     def _clean_text(self, t: str) -> str:
         """テキストをクリーンアップ"""
         if not t:
             return ""
-        return re.sub(r"\s+", " ", t).strip()
+        return WS_RE.sub(" ", t).strip()
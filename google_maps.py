@@ -4,16 +4,19 @@ Google Maps スクレイパー (SaaS Worker版)
 """
 import re
 import time
+import functools
+import queue
+import threading
 from datetime import datetime
 from typing import Callable, Optional
-from urllib.parse import urlparse, parse_qs, urlsplit
+from urllib.parse import parse_qs, urlsplit, quote_plus
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from selenium.common.exceptions import TimeoutException, WebDriverException
 
 
 # 設定
@@ -22,9 +25,145 @@ MAX_UPDATES = 5
 MAX_PHOTO_THUMBNAILS = 20
 MAX_PHOTOS = 10
 MAX_STORES = 100
+# キーワードを並列処理するブラウザ数の上限（filters["keyword_workers"] で変更可）
+MAX_KEYWORD_WORKERS = 4
+# 1キーワード内の店舗詳細を並列取得するブラウザ数の上限（filters["detail_workers"] で変更可）
+MAX_DETAIL_WORKERS = 4
+
+# 検索結果ページの URL（キーワードは quote_plus でエンコードして連結）
+SEARCH_BASE_URL = "https://www.google.com/maps/search/"
+
+# ページ要素の表示待ち（WebDriverWait のタイムアウト秒・ポーリング間隔秒）
+PAGE_WAIT_TIMEOUT = 18
+PAGE_WAIT_POLL = 0.2
+# driver.get の上限秒（トラッカー等で load が終わらなくても先へ進む）
+PAGE_LOAD_TIMEOUT = 15
+
+# ブラウザで読み込まない URL パターン（計測タグ・広告・埋め込み動画・ストリートビュー静止画）
+BLOCKED_URL_PATTERNS = (
+    "*googletagmanager*",
+    "*google-analytics*",
+    "*doubleclick*",
+    "*youtube.com/embed*",
+    "*gstatic.com/*streetview*",
+)
+
+# スクロール後の追加読み込み待ち（ポーリング間隔秒・scrollHeight がこの秒数変わらなければ読み込み完了とみなす）
+SCROLL_GROWTH_POLL = 0.1
+SCROLL_SETTLE_SECONDS = 0.5
 
 # ドメイン抽出用正規表現
 DOMAIN_RE = re.compile(r'([a-zA-Z0-9][-a-zA-Z0-9\.]*\.[a-zA-Z]{2,24})(?:[\/\?#][^\s]*)?')
+# 口コミ・写真・投稿の解析用正規表現（ループ内で毎回コンパイルしないようモジュールで保持）
+YEAR_MONTH_RE = re.compile(r'(\d{4})年(\d{1,2})月')
+PHOTO_DATE_RE = re.compile(r'(\d{4}年\d{1,2}月)')
+YEARS_AGO_RE = re.compile(r'(\d+)\s*年前')
+CORP_SUFFIX_RE = re.compile(r'(株式会社|有限会社|㈱|㈲|合同会社|LLC)')
+# 写真投稿者名の比較用（半角・全角スペースを除去）
+NAME_SPACE_TABLE = str.maketrans('', '', ' 　')
+REVIEW_STARS_RE = re.compile(r'(\d+)')
+REVIEW_COUNT_RE = re.compile(r"(\d+)\s*件のクチコミ")
+RATING_RE = re.compile(r"^\d+(\.\d+)?$")
+ZIP_LINE_RE = re.compile(r"^〒?\d{3}-\d{4}")
+PHONE_LINE_RE = re.compile(r"^0\d{1,4}-\d{1,4}-\d{3,4}$")
+
+# 口コミの「もっと見る」ボタンを先頭から arguments[0] 個クリックし、[クリック前のボタン数, クリック数] を返す
+EXPAND_REVIEWS_JS = """
+const buttons = Array.from(document.querySelectorAll('button.w8nwRe.kyuRq'));
+const targets = buttons.slice(0, arguments[0]);
+targets.forEach(b => b.click());
+return [buttons.length, targets.length];
+"""
+
+# 口コミ一覧から先頭 arguments[0] 件の投稿者・評価・日付・本文・オーナー返信有無を取得
+REVIEWS_JS = """
+const reviews = Array.from(document.querySelectorAll('div.jftiEf.fontBodyMedium')).slice(0, arguments[0]);
+return reviews.map(r => {
+    const q = s => r.querySelector(s);
+    return {
+        author: q('div.d4r55')?.innerText || '',
+        stars: q('span.kvMYJc')?.getAttribute('aria-label') || '',
+        date: q('span.rsqaWe')?.innerText || '',
+        text: q('span.wiI7pd')?.innerText || '',
+        owner_reply: Array.from(r.querySelectorAll('span.fontTitleSmall'))
+            .some(e => e.innerText.includes('オーナーからの返信')) || !!q('div.CDe7pd'),
+    };
+});
+"""
+
+# 検索結果のリンク（a.hfpxzc）から href と店名を取得（スポンサー枠は除外）
+RESULT_LINKS_JS = """
+return Array.from(document.querySelectorAll('a.hfpxzc')).filter(a => {
+    const badge = a.querySelector('span[class*="jHLihd"]');
+    return !(badge && badge.innerText.includes('スポンサー'));
+}).map(a => ({href: a.href, name: a.getAttribute('aria-label') || ''}));
+"""
+
+# 店舗ページ概要欄の業種・口コミ数ラベル・評価・ウェブサイト・基本情報テキストを取得
+SUMMARY_JS = """
+const q = s => document.querySelector(s);
+return {
+    category: q('button.DkEaL')?.innerText || '',
+    review_count_label: q('div[class*="F7nice"] span[aria-label*="件のクチコミ"]')?.getAttribute('aria-label') || '',
+    rating: q('div.F7nice span[aria-hidden="true"]')?.innerText || '',
+    website: q('a[aria-label*="ウェブサイト"]')?.href || '',
+    info: Array.from(document.querySelectorAll('div.Io6YTe.fontBodyMedium.kR99db.fdkmkc'), e => e.innerText),
+};
+"""
+
+# 写真サムネイルのセレクタ（上から順に試す。a[data-photo-index] は最終確認時のみ）
+PHOTO_ITEM_SELECTORS = ('div.Uf0tqf.ch8jbf', 'button.U39Pmb', 'div.U39Pmb', 'a[data-photo-index]')
+
+# arguments[0] のセレクタを順に試し、最初に要素が見つかったセレクタとその件数を返す
+PHOTO_ITEMS_PROBE_JS = """
+for (const sel of arguments[0]) {
+    const n = document.querySelectorAll(sel).length;
+    if (n) return [sel, n];
+}
+return [null, 0];
+"""
+
+# スクロール処理は全箇所でこのスクリプトを使う（arguments[0] を arguments[1] px スクロールし scrollTop を返す）
+SCROLL_BY_JS = "arguments[0].scrollBy(0, arguments[1]); return arguments[0].scrollTop;"
+
+# 写真グリッドを 600px スクロールし、その要素を返す（グリッドがなければ arguments[0] の最後のサムネイルを表示して null）
+PHOTO_SCROLL_JS = """
+for (const sel of ['div.m6QErb.DxyBCb.kA9KIf.dS8AEf', 'div.m6QErb.DxyBCb']) {
+    const grid = document.querySelector(sel);
+    if (grid) {
+        grid.scrollBy(0, 600);
+        return grid;
+    }
+}
+const items = document.querySelectorAll(arguments[0]);
+if (items.length) items[items.length - 1].scrollIntoView(false);
+return null;
+"""
+
+# セレクタに一致する要素数と、スクロール領域の scrollHeight を取得
+GROWTH_PROBE_JS = """
+const area = arguments[1];
+return [document.querySelectorAll(arguments[0]).length, area ? area.scrollHeight : 0];
+"""
+
+
+@functools.lru_cache(maxsize=4096)
+def _domain_in(text: str) -> str:
+    """テキスト中のドメインを返す（同じ文言は店舗をまたいで何度も出るため結果をキャッシュ）"""
+    m = DOMAIN_RE.search(text)
+    return m.group(1) if m else ""
+
+
+@functools.lru_cache(maxsize=4096)
+def _is_claim_url(url: str) -> bool:
+    """ビジネスオーナー登録（claim）誘導 URL かどうか"""
+    try:
+        parsed = urlsplit(url)
+    except ValueError:
+        return False
+    if "business.google.com" in parsed.netloc and "/create" in parsed.path:
+        return True
+    return "gmbsrc=" in parsed.query or "ppsrc=GMBMI" in parsed.query
 
 
 class GoogleMapsScraper:
@@ -35,20 +174,28 @@ class GoogleMapsScraper:
         progress_callback: Optional[Callable[[int, int], None]] = None,
         result_callback: Optional[Callable[[dict], None]] = None,
         is_running_check: Optional[Callable[[], bool]] = None,
+        browser_pool=None,
     ):
         self.progress_callback = progress_callback
         self.result_callback = result_callback
         self.is_running_check = is_running_check or (lambda: True)
+        self.browser_pool = browser_pool  # executor の BrowserPool（あればブラウザを再利用）
 
         self.driver = None
         self.actions = None
+        self.wait = None
         self.result_count = 0
+        self._stop_event = threading.Event()  # 停止を一度検知したら以降はこのフラグだけを見る
 
     def run(self, keywords: list, filters: dict = None) -> int:
         """スクレイピングを実行"""
         filters = filters or {}
         self.result_count = 0
 
+        workers = min(len(keywords), int(filters.get("keyword_workers") or MAX_KEYWORD_WORKERS))
+        if workers > 1:
+            return self._run_parallel(keywords, filters, workers)
+
         try:
             self._init_browser()
 
@@ -66,6 +213,56 @@ class GoogleMapsScraper:
         finally:
             self._close_browser()
 
+    def _run_parallel(self, keywords: list, filters: dict, workers: int) -> int:
+        """キーワードを複数ブラウザ（それぞれ独立したセッション）で並列に処理"""
+        print(f"[Scraper] {workers}ブラウザでキーワードを並列処理")
+
+        keyword_queue = queue.Queue()
+        for keyword in keywords:
+            keyword_queue.put(keyword)
+
+        result_lock = threading.Lock()
+
+        # キーワード並列時は各ブラウザが店舗詳細を順に処理する（明示指定がなければブラウザ数を増やさない）
+        child_filters = dict(filters, detail_workers=filters.get("detail_workers") or 1)
+
+        def on_result(data):
+            with result_lock:
+                self.result_count += 1
+                if self.result_callback:
+                    self.result_callback(data)
+
+        def worker():
+            child = GoogleMapsScraper(
+                progress_callback=self.progress_callback,
+                result_callback=on_result,
+                is_running_check=self.is_running_check,
+                browser_pool=self.browser_pool,
+            )
+            try:
+                child._init_browser()
+                while self.is_running_check():
+                    try:
+                        keyword = keyword_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    print(f"[Scraper] 検索中: {keyword}")
+                    child._search_keyword(keyword, child_filters)
+            except Exception as e:
+                print(f"[Scraper] 並列ワーカーエラー: {e}")
+            finally:
+                child._close_browser()
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        if not self.is_running_check():
+            print("[Scraper] 停止リクエスト受信")
+        return self.result_count
+
     def _init_browser(self):
         """ブラウザを初期化"""
         print("[Scraper] ブラウザを起動中...")
@@ -76,36 +273,84 @@ class GoogleMapsScraper:
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-backgrounding-occluded-windows")
         options.add_argument("--disable-features=RendererCodeIntegrity,AutoExpandDetailsElement")
+        # 画像は読み込まない（取得するのはテキストと href のみ。写真の投稿者・日付もテキストから読む）
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+        # DOMContentLoaded で driver.get から戻る（必要な要素は WebDriverWait で待つ）
+        options.page_load_strategy = "eager"
         # ヘッドレスモード（サーバー環境向け）
         # options.add_argument("--headless=new")
 
-        self.driver = webdriver.Chrome(options=options)
+        # chromedriver との HTTP 接続は Keep-Alive で使い回す（コマンドごとの TCP 接続を避ける）
+        # 各ドライバーは1スレッドからしか操作しないため、接続プールの拡張は不要
+        if self.browser_pool:
+            self.driver = self.browser_pool.acquire(
+                "google_maps", lambda: webdriver.Chrome(options=options, keep_alive=True)
+            )
+        else:
+            self.driver = webdriver.Chrome(options=options, keep_alive=True)
+        self.driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        # 暗黙の待機は使わない（任意要素は find_elements で有無を見て、必要な待機は WebDriverWait で行う）
+        self.driver.implicitly_wait(0)
+        self._block_unneeded_requests()
         self.actions = ActionChains(self.driver)
+        self.wait = WebDriverWait(self.driver, PAGE_WAIT_TIMEOUT, poll_frequency=PAGE_WAIT_POLL)
         # ウィンドウを画面外に移動（見えなくする）
         self.driver.set_window_position(-2000, 0)
         print("[Scraper] ブラウザ起動完了")
 
+    def _block_unneeded_requests(self):
+        """計測タグ・埋め込み動画などスクレイピングに不要な通信とダウンロードを止める"""
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(BLOCKED_URL_PATTERNS)})
+            self.driver.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": "deny"})
+        except WebDriverException as e:
+            print(f"[Scraper] 通信ブロック設定をスキップ: {e}")
+
+    def _navigate(self, url: str):
+        """ページを開く（読み込みタイムアウト時は読み込みを止めてそのまま続行）"""
+        try:
+            self.driver.get(url)
+        except TimeoutException:
+            self.driver.execute_script("window.stop();")
+
     def _close_browser(self):
         """ブラウザを終了"""
         if self.driver:
-            try:
-                self.driver.quit()
-            except:
-                pass
+            if self.browser_pool:
+                self.browser_pool.release(self.driver)
+            else:
+                try:
+                    self.driver.quit()
+                except:
+                    pass
             self.driver = None
             self.actions = None
+            self.wait = None
 
     def _search_keyword(self, keyword: str, filters: dict):
         """キーワードで検索して結果を収集"""
-        search_url = f"https://www.google.com/maps/search/{keyword.replace(' ', '+')}/"
+        search_url = SEARCH_BASE_URL + quote_plus(keyword) + "/"
 
         try:
-            self.driver.get(search_url)
-            time.sleep(3)
+            self._navigate(search_url)
         except Exception as e:
             print(f"[Scraper] 検索エラー: {e}")
             return
 
+        # 結果一覧（1件だけのときは店舗ページへ直接遷移する）が表示されるまで待つ
+        try:
+            self.wait.until(EC.any_of(
+                EC.presence_of_element_located((By.CSS_SELECTOR, 'div[role="feed"]')),
+                EC.presence_of_element_located((By.CSS_SELECTOR, "h1.DUwDvf")),
+            ))
+        except TimeoutException:
+            pass
+
         # 結果一覧を収集
         results = self._collect_results()
         if not results:
@@ -115,47 +360,90 @@ class GoogleMapsScraper:
         print(f"[Scraper] {len(results)}件の店舗を発見")
 
         # 各店舗の詳細を取得
-        seen = set()
         total = len(results)
+        workers = min(total, int(filters.get("detail_workers") or MAX_DETAIL_WORKERS))
         print(f"[Scraper] 詳細取得開始: {total}件")
+        self._extract_details(keyword, results, filters, workers)
+
+    def _extract_details(self, keyword: str, results: list, filters: dict, workers: int):
+        """店舗詳細を取得（workers > 1 のときは追加ブラウザと分担して並列に取得）"""
+        task_queue = queue.Queue()
         for i, item in enumerate(results):
-            if not self.is_running_check():
-                break
+            task_queue.put((i, item))
 
-            href = item["href"]
-            name = item["name"]
+        total = len(results)
+        seen = set()
+        done = 0
+        now = datetime.now()  # フィルターの経過期間の基準（キーワード単位で1回だけ取得）
+        lock = threading.Lock()
 
-            print(f"[Scraper] 詳細取得中: {i + 1}/{total} - {name[:30]}")
+        def process(scraper):
+            nonlocal done
+            while self.is_running_check():
+                try:
+                    i, item = task_queue.get_nowait()
+                except queue.Empty:
+                    return
 
-            if self.progress_callback:
-                self.progress_callback(i + 1, total)
+                href = item["href"]
+                name = item["name"]
 
-            try:
-                self.driver.get(href)
-                time.sleep(1.5)
-                self._close_extra_tabs()
-            except:
-                continue
+                print(f"[Scraper] 詳細取得中: {i + 1}/{total} - {name[:30]}")
 
-            data = self._extract_detail(keyword)
-            if not data:
-                continue
+                with lock:
+                    done += 1
+                    if self.progress_callback:
+                        self.progress_callback(done, total)
 
-            # 重複チェック
-            key = f"{data['title']}__{data['address']}"
-            if key in seen:
-                continue
-            seen.add(key)
+                try:
+                    # 表示完了は _extract_detail で店名を待って判定する
+                    scraper._navigate(href)
+                    scraper._close_extra_tabs()
+                except:
+                    continue
 
-            # フィルター適用
-            if not self._apply_filters(data, filters):
-                print(f"[Scraper] フィルター除外: {data['title']}")
-                continue
+                data = scraper._extract_detail(keyword)
+                if not data:
+                    continue
+
+                # 重複チェック
+                key = (data['title'], data['address'])
+                with lock:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+
+                # フィルター適用
+                if not self._apply_filters(data, filters, now):
+                    print(f"[Scraper] フィルター除外: {data['title']}")
+                    continue
 
-            # 結果を送信
-            self.result_count += 1
-            if self.result_callback:
-                self.result_callback(data)
+                # 結果を送信
+                with lock:
+                    self.result_count += 1
+                    if self.result_callback:
+                        self.result_callback(data)
+
+        def helper():
+            child = GoogleMapsScraper(
+                is_running_check=self.is_running_check,
+                browser_pool=self.browser_pool,
+            )
+            try:
+                child._init_browser()
+                process(child)
+            except Exception as e:
+                print(f"[Scraper] 詳細取得ワーカーエラー: {e}")
+            finally:
+                child._close_browser()
+
+        # 自分のブラウザも1ワーカーとして使い、残りを追加ブラウザで分担する
+        threads = [threading.Thread(target=helper, daemon=True) for _ in range(workers - 1)]
+        for t in threads:
+            t.start()
+        process(self)
+        for t in threads:
+            t.join()
 
     def _collect_results(self) -> list:
         """検索結果一覧を収集"""
@@ -166,18 +454,23 @@ class GoogleMapsScraper:
 
         # スクロールして全件取得
         END_MARKER_TEXTS = ("リストの最後に到達しました", "You've reached the end of the list")
-        MAX_STABLE_ITERS = 20  # ~60s of no change as safety fallback when marker never appears
+        MAX_STABLE_SECONDS = 40  # safety fallback when marker never appears: stop after this long with no new results
 
         prev_count = -1
-        stable = 0
+        link_count = 0  # スポンサー枠も含む a.hfpxzc の数（追加読み込みの検知用）
+        stable_since = time.monotonic()
         reached_end = False
+        links = []
 
-        while not reached_end and stable < MAX_STABLE_ITERS:
+        while not reached_end and time.monotonic() - stable_since < MAX_STABLE_SECONDS:
             if not self.is_running_check():
                 break
 
-            self.driver.execute_script("arguments[0].scrollBy(0, 1000);", scroll_area)
-            time.sleep(2)
+            self._scroll_by(scroll_area, 1000)
+            link_count = self._wait_for_growth(link_count, 'a.hfpxzc', scroll_area)
+
+            # 今回のポーリングで見えている結果（ループ後の集計にもそのまま使う）
+            links = self._get_result_links()
 
             # 1) End-of-list marker has priority — stop immediately when Google Maps confirms the list end
             try:
@@ -190,12 +483,9 @@ class GoogleMapsScraper:
                 pass
 
             # 2) Fallback: count stability (only triggers when marker never appears)
-            links = self._get_result_links()
             count = len(links)
-            if count == prev_count:
-                stable += 1
-            else:
-                stable = 0
+            if count != prev_count:
+                stable_since = time.monotonic()
                 print(f"[Scraper] リスト取得中... {count}件")
             prev_count = count
 
@@ -203,9 +493,9 @@ class GoogleMapsScraper:
         seen_href = set()
         results = []
 
-        for a in self._get_result_links():
-            href = a.get_attribute("href") or ""
-            name = (a.get_attribute("aria-label") or "").strip()
+        for link in links:
+            href = link.get("href") or ""
+            name = (link.get("name") or "").strip()
 
             if not href or href in seen_href:
                 continue
@@ -215,29 +505,47 @@ class GoogleMapsScraper:
         return results[:MAX_STORES]
 
     def _wait_for_scroll_area(self, timeout: int = 20):
-        """スクロール領域を待機"""
-        for _ in range(timeout * 4):
-            try:
-                return self.driver.find_element(By.CSS_SELECTOR, 'div[role="feed"]')
-            except:
-                time.sleep(0.25)
-        raise TimeoutException("スクロール領域が見つかりません")
-
-    def _get_result_links(self) -> list:
-        """結果リンクを取得（スポンサー除外）"""
-        links = self.driver.find_elements(By.CSS_SELECTOR, 'a.hfpxzc')
-        filtered = []
+        """スクロール領域を待機（見つからなければ TimeoutException）"""
+        return WebDriverWait(self.driver, timeout, poll_frequency=0.25).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, 'div[role="feed"]')),
+            "スクロール領域が見つかりません",
+        )
 
-        for a in links:
+    def _scroll_by(self, element, dy: int):
+        """要素を dy px スクロールし、スクロール後の scrollTop を返す"""
+        return self.driver.execute_script(SCROLL_BY_JS, element, dy)
+
+    def _wait_for_growth(self, prev_count: int, css: str, scroll_area=None, timeout: float = 2.0) -> int:
+        """スクロール後、css に一致する要素数が prev_count から変わるか、
+        scrollHeight が SCROLL_SETTLE_SECONDS 変化しなくなるまで待機（最大 timeout 秒）。最新の要素数を返す"""
+        stopped = self._is_stopped
+        start = time.monotonic()
+        deadline = start + timeout
+        last_height = None
+        height_since = start
+        count = prev_count
+
+        while True:
             try:
-                badge = a.find_element(By.XPATH, './/span[contains(@class,"jHLihd")]')
-                if badge and "スポンサー" in badge.text:
-                    continue
-            except:
-                pass
-            filtered.append(a)
+                count, height = self.driver.execute_script(GROWTH_PROBE_JS, css, scroll_area)
+            except WebDriverException:
+                return count
+            now = time.monotonic()
+
+            if count != prev_count:
+                return count
+            if height != last_height:
+                last_height, height_since = height, now
+            elif now - height_since >= SCROLL_SETTLE_SECONDS:
+                return count
+            if now >= deadline or stopped():
+                return count
+
+            time.sleep(SCROLL_GROWTH_POLL)
 
-        return filtered
+    def _get_result_links(self) -> list:
+        """結果リンクを取得（スポンサー除外）。{"href", "name"} の辞書リストを返す"""
+        return self.driver.execute_script(RESULT_LINKS_JS) or []
 
     def _close_extra_tabs(self):
         """余分なタブを閉じる"""
@@ -253,40 +561,34 @@ class GoogleMapsScraper:
 
     def _extract_detail(self, keyword: str) -> Optional[dict]:
         """詳細ページから情報を抽出（写真・口コミ・最新投稿含む）"""
-        # 店名
-        title = ""
-        for _ in range(60):
-            if self._is_stopped():
-                return None
-            try:
-                t = self.driver.find_element(By.CSS_SELECTOR, "h1.DUwDvf").text.strip()
-                if t:
-                    title = t
-                    break
-            except:
-                pass
-            time.sleep(0.3)
+        # 店名（表示され次第すぐに進む、待機中も停止リクエストには即応する）
+        try:
+            title = self.wait.until(lambda d: self._is_stopped() or self._title_text())
+        except TimeoutException:
+            title = ""
 
-        if not title or self._is_stopped():
+        if self._is_stopped() or not title:
             return None
 
         print(f"[Scraper] 店舗: {title}")
 
+        # 概要欄のテキストは1回のスクリプトでまとめて取得する
+        try:
+            summary = self.driver.execute_script(SUMMARY_JS) or {}
+        except WebDriverException:
+            summary = {}
+
         # 口コミ数
-        review_count = self._extract_review_count()
+        review_count = self._extract_review_count(summary)
 
         # 評価
-        rating = self._extract_rating(review_count)
+        rating = self._extract_rating(summary, review_count)
 
         # 業種
-        category = ""
-        try:
-            category = self.driver.find_element(By.CSS_SELECTOR, "button.DkEaL").text.strip()
-        except:
-            pass
+        category = (summary.get("category") or "").strip()
 
         # 住所・電話番号・HP
-        address, phone, website = self._extract_contact_info()
+        address, phone, website = self._extract_contact_info(summary)
 
         if self._is_stopped():
             return None
@@ -327,9 +629,30 @@ class GoogleMapsScraper:
             "reply_ratio": reply_ratio,
         }
 
+    def _find_first(self, *css_selectors):
+        """CSS セレクタを順に試し、最初に見つかった要素を返す（見つからなければ None）"""
+        for css in css_selectors:
+            els = self.driver.find_elements(By.CSS_SELECTOR, css)
+            if els:
+                return els[0]
+        return None
+
+    def _title_text(self) -> str:
+        """表示中の店名（h1.DUwDvf）を返す（未表示なら空文字）"""
+        try:
+            els = self.driver.find_elements(By.CSS_SELECTOR, "h1.DUwDvf")
+            return els[0].text.strip() if els else ""
+        except WebDriverException:
+            return ""
+
     def _is_stopped(self) -> bool:
-        """停止フラグをチェック"""
-        return not self.is_running_check()
+        """停止フラグをチェック（停止を検知した後はコールバックを呼ばない）"""
+        if self._stop_event.is_set():
+            return True
+        if not self.is_running_check():
+            self._stop_event.set()
+            return True
+        return False
 
     def _get_reviews(self) -> tuple:
         """クチコミを取得"""
@@ -354,83 +677,51 @@ class GoogleMapsScraper:
             if not review_tab_found or self._is_stopped():
                 return reviews, 0, 0, "0%"
 
-            scroll_area = None
-            try:
-                scroll_area = self.driver.find_element(By.CSS_SELECTOR, 'div.m6QErb.DxyBCb.kA9KIf.dS8AEf.XiKgde')
-            except NoSuchElementException:
-                try:
-                    scroll_area = self.driver.find_element(By.CSS_SELECTOR, 'div.m6QErb.DxyBCb')
-                except NoSuchElementException:
-                    pass
+            scroll_area = self._find_first('div.m6QErb.DxyBCb.kA9KIf.dS8AEf.XiKgde', 'div.m6QErb.DxyBCb')
 
             if scroll_area:
+                last_top = None
                 for _ in range(3):
-                    self.driver.execute_script("arguments[0].scrollBy(0, 500);", scroll_area)
+                    top = self._scroll_by(scroll_area, 500)
+                    if top == last_top:
+                        break  # これ以上スクロールできない
+                    last_top = top
                     time.sleep(0.5)
 
             # 「もっと見る」ボタンをクリック
-            more_btns = self.driver.find_elements(By.CSS_SELECTOR, 'button.w8nwRe.kyuRq')
-            for btn in more_btns[:5]:
-                try:
-                    self.driver.execute_script("arguments[0].click();", btn)
-                    time.sleep(0.3)
-                except WebDriverException:
-                    pass
-
-            review_elements = self.driver.find_elements(By.CSS_SELECTOR, 'div.jftiEf.fontBodyMedium')
-            total_review_count = min(len(review_elements), MAX_REVIEWS)
-
-            for review_el in review_elements[:MAX_REVIEWS]:
-                try:
-                    author = ""
-                    author_el = review_el.find_elements(By.CSS_SELECTOR, 'div.d4r55')
-                    if author_el:
-                        author = author_el[0].text.strip()
-
-                    stars = ""
-                    star_el = review_el.find_elements(By.CSS_SELECTOR, 'span.kvMYJc')
-                    if star_el:
-                        aria = star_el[0].get_attribute('aria-label') or ""
-                        m = re.search(r'(\d+)', aria)
-                        if m:
-                            stars = m.group(1)
+            # （まとめてクリックし、押したボタンが消える＝本文が展開されるまで短く待つ）
+            try:
+                before, clicked = self.driver.execute_script(EXPAND_REVIEWS_JS, 5)
+                if clicked:
+                    WebDriverWait(self.driver, 2, poll_frequency=0.1).until(
+                        lambda d: d.execute_script(
+                            "return document.querySelectorAll('button.w8nwRe.kyuRq').length;"
+                        ) <= before - clicked
+                    )
+            except (TimeoutException, WebDriverException):
+                pass
 
-                    date = ""
-                    date_el = review_el.find_elements(By.CSS_SELECTOR, 'span.rsqaWe')
-                    if date_el:
-                        date = date_el[0].text.strip()
+            # 口コミ要素の走査はブラウザ内で1回の execute_script にまとめる（要素ごとの WebDriver 往復をなくす）
+            review_items = self.driver.execute_script(REVIEWS_JS, MAX_REVIEWS) or []
+            total_review_count = len(review_items)
 
-                    text = ""
-                    text_el = review_el.find_elements(By.CSS_SELECTOR, 'span.wiI7pd')
-                    if text_el:
-                        text = text_el[0].text.strip()[:200]
+            for item in review_items:
+                author = (item.get("author") or "").strip()
 
-                    has_owner_reply = False
-                    try:
-                        owner_reply_el = review_el.find_elements(By.CSS_SELECTOR, 'span.fontTitleSmall')
-                        for el in owner_reply_el:
-                            if "オーナーからの返信" in el.text:
-                                has_owner_reply = True
-                                break
-                    except:
-                        pass
+                stars = ""
+                m = REVIEW_STARS_RE.search(item.get("stars") or "")
+                if m:
+                    stars = m.group(1)
 
-                    if not has_owner_reply:
-                        try:
-                            owner_reply_div = review_el.find_elements(By.CSS_SELECTOR, 'div.CDe7pd')
-                            if owner_reply_div:
-                                has_owner_reply = True
-                        except:
-                            pass
+                date = (item.get("date") or "").strip()
+                text = (item.get("text") or "").strip()[:200]
 
-                    if has_owner_reply:
-                        owner_reply_count += 1
+                if item.get("owner_reply"):
+                    owner_reply_count += 1
 
-                    if text:
-                        review_str = f"[{author}] ★{stars} ({date}): {text}"
-                        reviews.append(review_str)
-                except Exception as e:
-                    continue
+                if text:
+                    review_str = f"[{author}] ★{stars} ({date}): {text}"
+                    reviews.append(review_str)
 
             # 概要タブに戻る
             tabs = self.driver.find_elements(By.CSS_SELECTOR, 'button[role="tab"]')
@@ -456,14 +747,13 @@ class GoogleMapsScraper:
             return ""
 
         def date_to_num(date_str):
-            m = re.search(r'(\d{4})年(\d{1,2})月', date_str)
+            m = YEAR_MONTH_RE.search(date_str)
             if m:
                 year, month = int(m.group(1)), int(m.group(2))
                 return year * 12 + month
             return 0
 
-        sorted_dates = sorted(dates, key=date_to_num, reverse=True)
-        return sorted_dates[0] if sorted_dates else ""
+        return max(dates, key=date_to_num)
 
     def _get_photos(self, store_name: str) -> dict:
         """写真情報を取得（オーナー/ユーザー判定、最新投稿日）"""
@@ -545,18 +835,18 @@ class GoogleMapsScraper:
             # スクロールして全写真を読み込む
             prev_count = 0
             stable_count = 0
+            photo_css = None  # サムネイルが見つかったセレクタ（以降はこのセレクタだけを数える）
+            current_count = 0
+            stopped = self._is_stopped
 
             for scroll_attempt in range(15):
-                if self._is_stopped():
+                if stopped():
                     return result
 
-                photo_items = self.driver.find_elements(By.CSS_SELECTOR, 'div.Uf0tqf.ch8jbf')
-                if not photo_items:
-                    photo_items = self.driver.find_elements(By.CSS_SELECTOR, 'button.U39Pmb')
-                if not photo_items:
-                    photo_items = self.driver.find_elements(By.CSS_SELECTOR, 'div.U39Pmb')
-
-                current_count = len(photo_items)
+                if photo_css is None:
+                    photo_css, current_count = self.driver.execute_script(
+                        PHOTO_ITEMS_PROBE_JS, PHOTO_ITEM_SELECTORS[:3]
+                    )
 
                 if current_count == prev_count:
                     stable_count += 1
@@ -567,40 +857,21 @@ class GoogleMapsScraper:
 
                 prev_count = current_count
 
-                # スクロール
-                scroll_success = False
+                # スクロール（スクロール領域の探索とスクロールを1回のスクリプトで行う）
+                item_css = photo_css or PHOTO_ITEM_SELECTORS[0]
+                grid = None
                 try:
-                    grid = self.driver.find_element(By.CSS_SELECTOR, 'div.m6QErb.DxyBCb.kA9KIf.dS8AEf')
-                    self.driver.execute_script("arguments[0].scrollTop = arguments[0].scrollTop + 600;", grid)
-                    scroll_success = True
-                except:
+                    grid = self.driver.execute_script(PHOTO_SCROLL_JS, item_css)
+                except WebDriverException:
                     pass
 
-                if not scroll_success:
-                    try:
-                        grid = self.driver.find_element(By.CSS_SELECTOR, 'div.m6QErb.DxyBCb')
-                        self.driver.execute_script("arguments[0].scrollTop = arguments[0].scrollTop + 600;", grid)
-                        scroll_success = True
-                    except:
-                        pass
-
-                if not scroll_success and photo_items:
-                    try:
-                        last_item = photo_items[-1]
-                        self.driver.execute_script("arguments[0].scrollIntoView(false);", last_item)
-                    except:
-                        pass
-
-                time.sleep(0.6)
+                count = self._wait_for_growth(current_count, item_css, grid)
+                if photo_css:
+                    current_count = count
 
             # 最終的なサムネイル数を取得
-            photo_items = self.driver.find_elements(By.CSS_SELECTOR, 'div.Uf0tqf.ch8jbf')
-            if not photo_items:
-                photo_items = self.driver.find_elements(By.CSS_SELECTOR, 'button.U39Pmb')
-            if not photo_items:
-                photo_items = self.driver.find_elements(By.CSS_SELECTOR, 'div.U39Pmb')
-            if not photo_items:
-                photo_items = self.driver.find_elements(By.CSS_SELECTOR, 'a[data-photo-index]')
+            photo_css, _ = self.driver.execute_script(PHOTO_ITEMS_PROBE_JS, PHOTO_ITEM_SELECTORS)
+            photo_items = self.driver.find_elements(By.CSS_SELECTOR, photo_css) if photo_css else []
 
             actual_photo_count = min(len(photo_items), MAX_PHOTO_THUMBNAILS)
 
@@ -623,16 +894,17 @@ class GoogleMapsScraper:
                 store_name.replace(' ', '').lower(),
                 store_name.replace('　', '').lower(),
             ]
-            clean_name = re.sub(r'(株式会社|有限会社|㈱|㈲|合同会社|LLC)', '', store_name).strip()
+            clean_name = CORP_SUFFIX_RE.sub('', store_name).strip()
             if clean_name:
                 owner_names.append(clean_name.lower())
+            owner_names = tuple(owner_names)
 
             all_dates = []
             owner_count = 0
             user_count = 0
 
             for i in range(photos_to_check):
-                if self._is_stopped():
+                if stopped():
                     break
 
                 time.sleep(0.5)
@@ -640,20 +912,21 @@ class GoogleMapsScraper:
                 # 投稿者を取得
                 author = ""
                 try:
-                    author_el = self.driver.find_element(By.CSS_SELECTOR, 'span.OVC7id')
-                    author = author_el.text.strip()
-                except:
+                    author_el = self._find_first('span.OVC7id')
+                    if author_el:
+                        author = author_el.text.strip()
+                except WebDriverException:
                     pass
 
                 # 投稿日を取得
                 date = ""
                 try:
-                    date_el = self.driver.find_element(By.CSS_SELECTOR, 'div.W0fu2b')
-                    date_text = date_el.text.strip()
-                    m = re.search(r'(\d{4}年\d{1,2}月)', date_text)
-                    if m:
-                        date = m.group(1)
-                except:
+                    date_el = self._find_first('div.W0fu2b')
+                    if date_el:
+                        m = PHOTO_DATE_RE.search(date_el.text.strip())
+                        if m:
+                            date = m.group(1)
+                except WebDriverException:
                     pass
 
                 if not author and not date:
@@ -665,14 +938,9 @@ class GoogleMapsScraper:
                 # オーナー判定
                 is_owner = False
                 if author:
-                    author_lower = author.lower().replace(' ', '').replace('　', '')
-                    if "ストリートビュー" in author or "street view" in author_lower or author_lower == "google":
-                        is_owner = False
-                    else:
-                        for owner_name in owner_names:
-                            if owner_name in author_lower or author_lower in owner_name:
-                                is_owner = True
-                                break
+                    author_lower = author.lower().translate(NAME_SPACE_TABLE)
+                    if not ("ストリートビュー" in author or "streetview" in author_lower or author_lower == "google"):
+                        is_owner = any(n in author_lower or author_lower in n for n in owner_names)
 
                 if is_owner:
                     owner_count += 1
@@ -790,25 +1058,19 @@ class GoogleMapsScraper:
 
                     content = ""
                     try:
-                        content_el = self.driver.find_element(By.CSS_SELECTOR, 'div.hfJtQe.fontBodyMedium')
-                        content = content_el.text.strip()[:200]
-                    except:
-                        try:
-                            content_el = self.driver.find_element(By.CSS_SELECTOR, 'div.hfJtQe')
+                        content_el = self._find_first('div.hfJtQe.fontBodyMedium', 'div.hfJtQe')
+                        if content_el:
                             content = content_el.text.strip()[:200]
-                        except:
-                            pass
+                    except WebDriverException:
+                        pass
 
                     date = ""
                     try:
-                        date_el = self.driver.find_element(By.CSS_SELECTOR, 'div.mgX1W.fontBodySmall div')
-                        date = date_el.text.strip()
-                    except:
-                        try:
-                            date_el = self.driver.find_element(By.CSS_SELECTOR, 'div.mgX1W div')
+                        date_el = self._find_first('div.mgX1W.fontBodySmall div', 'div.mgX1W div')
+                        if date_el:
                             date = date_el.text.strip()
-                        except:
-                            pass
+                    except WebDriverException:
+                        pass
 
                     if idx == 0 and date:
                         latest_date = date
@@ -835,63 +1097,43 @@ class GoogleMapsScraper:
 
         return latest_date, "\n---\n".join(updates[:MAX_UPDATES])
 
-    def _extract_review_count(self) -> str:
+    def _extract_review_count(self, summary: dict) -> str:
         """口コミ数を抽出"""
-        try:
-            el = self.driver.find_element(
-                By.XPATH, '//div[contains(@class,"F7nice")]//span[@aria-label and contains(@aria-label,"件のクチコミ")]'
-            )
-            label = (el.get_attribute("aria-label") or el.text or "").strip()
-            m = re.search(r"(\d+)\s*件のクチコミ", label)
-            if m:
-                return m.group(1)
-        except:
-            pass
-        return ""
+        label = (summary.get("review_count_label") or "").strip()
+        m = REVIEW_COUNT_RE.search(label)
+        return m.group(1) if m else ""
 
-    def _extract_rating(self, review_count: str) -> str:
+    def _extract_rating(self, summary: dict, review_count: str) -> str:
         """評価を抽出"""
         if not review_count or not review_count.isdigit() or int(review_count) == 0:
             return ""
 
-        try:
-            el = self.driver.find_element(By.CSS_SELECTOR, 'div.F7nice span[aria-hidden="true"]')
-            txt = el.text.strip()
-            if re.match(r"^\d+(\.\d+)?$", txt):
-                return txt
-        except:
-            pass
-        return ""
+        txt = (summary.get("rating") or "").strip()
+        return txt if RATING_RE.match(txt) else ""
 
-    def _extract_contact_info(self) -> tuple:
+    def _extract_contact_info(self, summary: dict) -> tuple:
         """連絡先情報を抽出"""
         address = ""
         phone = ""
         website_candidates = []
 
         # ウェブサイトボタン
-        try:
-            a = self.driver.find_element(By.CSS_SELECTOR, 'a[aria-label*="ウェブサイト"]')
-            href = a.get_attribute("href") or ""
-            if href:
-                website_candidates.append(href)
-        except:
-            pass
+        href = summary.get("website") or ""
+        if href:
+            website_candidates.append(href)
 
         # 基本情報テキスト
-        info_elements = self.driver.find_elements(
-            By.CSS_SELECTOR, 'div.Io6YTe.fontBodyMedium.kR99db.fdkmkc'
-        )
-
-        for el in info_elements:
-            txt = (el.text or "").strip()
+        for txt in summary.get("info") or []:
+            txt = (txt or "").strip()
+            # 先頭1文字で候補を絞ってから正規表現にかける（住所は〒か数字、電話は0で始まる）
+            head = txt[:1]
 
             # 住所
-            if not address and re.match(r"^〒?\d{3}-\d{4}", txt):
+            if not address and (head == "〒" or head.isdigit()) and ZIP_LINE_RE.match(txt):
                 address = txt
 
             # 電話番号
-            if not phone and re.match(r"^0\d{1,4}-\d{1,4}-\d{3,4}$", txt):
+            if not phone and head == "0" and PHONE_LINE_RE.match(txt):
                 phone = txt
 
             # ドメイン
@@ -907,8 +1149,7 @@ class GoogleMapsScraper:
         """テキストからドメインを抽出"""
         if not text or "@" in text:
             return ""
-        m = DOMAIN_RE.search(text.strip())
-        return m.group(1) if m else ""
+        return _domain_in(text.strip())
 
     def _pick_best_url(self, urls: list) -> str:
         """最適なURLを選択"""
@@ -926,8 +1167,7 @@ class GoogleMapsScraper:
             return ""
 
         # 最短ドメイン優先
-        cleaned.sort(key=lambda u: len(urlparse(u).netloc or u))
-        return cleaned[0]
+        return min(cleaned, key=lambda u: len(urlsplit(u).netloc or u))
 
     def _normalize_url(self, s: str) -> str:
         """URLを正規化"""
@@ -935,16 +1175,18 @@ class GoogleMapsScraper:
             return ""
         s = s.strip()
 
-        try:
-            parts = urlsplit(s)
-            if parts.netloc.endswith("google.com") and parts.path.startswith("/url"):
-                q = parse_qs(parts.query).get("q", [""])[0]
-                if q:
-                    s = q
-        except:
-            pass
+        # google.com/url?q=... のリダイレクトだけを解析する（それ以外は URL 解析不要）
+        if "google.com/url" in s:
+            try:
+                parts = urlsplit(s)
+                if parts.netloc.endswith("google.com") and parts.path.startswith("/url"):
+                    q = parse_qs(parts.query).get("q", [""])[0]
+                    if q:
+                        s = q
+            except:
+                pass
 
-        if s.startswith("http://") or s.startswith("https://"):
+        if s.startswith(("http://", "https://")):
             return s
         return "http://" + s
 
@@ -952,20 +1194,10 @@ class GoogleMapsScraper:
         """claim誘導リンクかどうか"""
         if not url:
             return False
+        return _is_claim_url(url)
 
-        try:
-            parsed = urlparse(url)
-            if "business.google.com" in parsed.netloc and "/create" in parsed.path:
-                return True
-            if "gmbsrc=" in parsed.query or "ppsrc=GMBMI" in parsed.query:
-                return True
-        except:
-            pass
-
-        return False
-
-    def _apply_filters(self, data: dict, filters: dict) -> bool:
-        """フィルターを適用（reply, photo対応）"""
+    def _apply_filters(self, data: dict, filters: dict, now: Optional[datetime] = None) -> bool:
+        """フィルターを適用（reply, photo対応）。now は写真の経過月数の基準（省略時は現在時刻）"""
         # 口コミ返信フィルター
         reply_filter = filters.get("reply", 0)
         if reply_filter == 1:  # 返信あり
@@ -982,7 +1214,7 @@ class GoogleMapsScraper:
             if latest_date:
                 # "1年前"、"2か月前"、"3週間前" などのパターンをパース
                 if "年前" in latest_date:
-                    match = re.search(r'(\d+)\s*年前', latest_date)
+                    match = YEARS_AGO_RE.search(latest_date)
                     if match:
                         years = int(match.group(1))
                         if photo_filter == 1 and years >= 1:  # 1年以内
@@ -991,15 +1223,14 @@ class GoogleMapsScraper:
                             return False
                 # YYYY年MM月形式
                 elif "年" in latest_date and "月" in latest_date:
-                    m = re.search(r'(\d{4})年(\d{1,2})月', latest_date)
+                    m = YEAR_MONTH_RE.search(latest_date)
                     if m:
                         year, month = int(m.group(1)), int(m.group(2))
-                        now = datetime.now()
-                        photo_date = datetime(year, month, 1)
-                        years_diff = (now - photo_date).days / 365
-                        if photo_filter == 1 and years_diff >= 1:  # 1年以内
+                        now = now or datetime.now()
+                        months_diff = (now.year - year) * 12 + (now.month - month)
+                        if photo_filter == 1 and months_diff >= 12:  # 1年以内
                             return False
-                        if photo_filter == 2 and years_diff >= 2:  # 2年以内
+                        if photo_filter == 2 and months_diff >= 24:  # 2年以内
                             return False
 
         # 旧フィルター互換（評価、口コミ数）
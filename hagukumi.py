@@ -5,21 +5,58 @@ ID総当り方式でリフォーム会社情報を収集
 """
 import re
 import time
-import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Optional
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+try:
+    from ._http_utils import RateLimiter, read_text, retry_after_seconds
+except ImportError:
+    # 更新ディレクトリから単体モジュールとして読み込まれた場合
+    from scraper._http_utils import RateLimiter, read_text, retry_after_seconds
 
 
 BASE_URL = "https://hugkumi-life.jp/detail/index.php?id={}"
 HEADERS = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"}
 
+# 会社名の [正式名称] と連絡先の電話番号
+BRACKET_RE = re.compile(r"\[(.+?)\]")
+TEL_RE = re.compile(r"TEL：?(\d[\d\-]+)")
+
+# 並列取得のワーカー数（filters["max_workers"] で上書き可）
+DEFAULT_MAX_WORKERS = 4
+# 1度にワーカーへ投入するID数（停止リクエストへの応答性とメモリを抑える）
+ID_CHUNK_SIZE = 100
+
+# サイト全体へのリクエストレート（逐次実行時の 0.3〜0.6 秒間隔と同程度、並列化してもこの速度を超えない）
+REQUESTS_PER_SECOND = 2.0
+REQUEST_BURST = 1
+
+# 1ページの最大サイズ（これを超える応答は読み切らずに捨てる）
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+
+# 429 で Retry-After がないときの指数バックオフ（秒、上限）と、連続エラー時の待機秒
+MAX_BACKOFF_SECONDS = 60
+ERROR_BACKOFF_SECONDS = 30
+
 # デフォルトID範囲
 DEFAULT_START_ID = 1
 DEFAULT_END_ID = 7500
 
 
+def _create_session() -> requests.Session:
+    """Keep-Alive・コネクションプール付きのセッションを作成（リトライは run 側で判定）"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=32, max_retries=0)
+    session.mount("https://", adapter)
+    return session
+
+
 class HagukumiScraper:
     """ハグクミからID総当りでリフォーム会社情報を収集"""
 
@@ -33,6 +70,12 @@ class HagukumiScraper:
         self.result_callback = result_callback
         self.is_running_check = is_running_check or (lambda: True)
         self.result_count = 0
+        self.session = _create_session()
+        self._rate_limiter = RateLimiter(REQUESTS_PER_SECOND, REQUEST_BURST)
+        # バックオフ（全ワーカー共通: この時刻まではリクエストしない）
+        self._backoff_lock = threading.Lock()
+        self._resume_at = 0.0
+        self._consecutive_429 = 0
 
     def run(self, filters: dict = None) -> int:
         """スクレイピングを実行"""
@@ -45,78 +88,110 @@ class HagukumiScraper:
 
         print(f"[Hagukumi] ID範囲: {start_id} - {end_id} ({total}件)")
 
+        max_workers = int(filters.get("max_workers") or DEFAULT_MAX_WORKERS)
         retry_count = 0
+        stopped = False
 
-        for shop_id in range(start_id, end_id + 1):
-            if not self.is_running_check():
-                print("[Hagukumi] 停止リクエスト受信")
-                break
-
-            result = self._scrape_shop(shop_id)
-
-            if result == "retry":
-                retry_count += 1
-                if retry_count >= 3:
-                    print(f"[Hagukumi] Rate limited at {shop_id}, waiting 30s...")
-                    time.sleep(30)
-                    retry_count = 0
-                continue
-
-            retry_count = 0
-
-            if result:
-                self.result_count += 1
-                if self.result_callback:
-                    self.result_callback(result)
-                if self.progress_callback:
-                    self.progress_callback(self.result_count, total)
-                print(f"[Hagukumi] [{shop_id}] ✓ {result.get('company_name', '')[:30]}")
-
-            # リクエスト間隔
-            time.sleep(random.uniform(0.3, 0.6))
-
-            # 進捗報告（500件ごと）
-            if shop_id % 500 == 0:
-                print(f"[Hagukumi] Progress: {shop_id}/{end_id} ({self.result_count}件取得)")
+        # ID単位の取得はワーカーで並列実行し、結果はID順にこのスレッドで処理する
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                for chunk_start in range(start_id, end_id + 1, ID_CHUNK_SIZE):
+                    if stopped or not self.is_running_check():
+                        print("[Hagukumi] 停止リクエスト受信")
+                        break
+
+                    chunk_ids = range(chunk_start, min(chunk_start + ID_CHUNK_SIZE, end_id + 1))
+                    for shop_id, result in zip(chunk_ids, pool.map(self._scrape_shop, chunk_ids)):
+                        if not self.is_running_check():
+                            stopped = True
+                            break
+
+                        if result == "rate_limited":
+                            # 待機はワーカー側で Retry-After に従って設定済み
+                            continue
+
+                        if result == "retry":
+                            retry_count += 1
+                            if retry_count >= 3:
+                                print(f"[Hagukumi] Errors at {shop_id}, pausing {ERROR_BACKOFF_SECONDS}s...")
+                                self._pause(ERROR_BACKOFF_SECONDS)
+                                retry_count = 0
+                            continue
+
+                        retry_count = 0
+
+                        if result:
+                            self.result_count += 1
+                            if self.result_callback:
+                                self.result_callback(result)
+                            if self.progress_callback:
+                                self.progress_callback(self.result_count, total)
+                            print(f"[Hagukumi] [{shop_id}] ✓ {result.get('company_name', '')[:30]}")
+
+                        # 進捗報告（500件ごと）
+                        if shop_id % 500 == 0:
+                            print(f"[Hagukumi] Progress: {shop_id}/{end_id} ({self.result_count}件取得)")
+        finally:
+            self.session.close()
 
         print(f"[Hagukumi] 完了: {self.result_count}件取得")
         return self.result_count
 
     def _scrape_shop(self, shop_id: int) -> Optional[dict]:
-        """個別店舗ページをスクレイピング"""
+        """個別店舗ページをスクレイピング（ワーカースレッドで実行）"""
+        if not self.is_running_check():
+            return None
+        self._wait_for_resume()
+        # リクエスト間隔（全ワーカー共通のレート）
+        self._rate_limiter.acquire()
+        if not self.is_running_check():
+            return None
+
         url = BASE_URL.format(shop_id)
 
         try:
-            r = requests.get(url, headers=HEADERS, timeout=15)
+            # 本文は上限付きで読み切る（404 等も読み切って接続を Keep-Alive で再利用する）
+            with self.session.get(url, timeout=15, stream=True) as r:
+                status = r.status_code
+                retry_after = r.headers.get("Retry-After")
+                html = read_text(r, MAX_PAGE_BYTES)
+
+            if status == 429:
+                self._on_rate_limited(shop_id, retry_after)
+                return "rate_limited"
+
+            with self._backoff_lock:
+                self._consecutive_429 = 0
 
-            if r.status_code == 404:
+            if status == 404:
                 return None
-            if r.status_code != 200:
+            if status != 200:
                 return "retry"
 
-            # ページが存在するか確認
-            if "area_detail_about_info" not in r.text:
+            # ページが存在するか確認（会社名の項目がないページはパースせずに除外）
+            if not html or "area_detail_about_info" not in html or "会社名" not in html:
                 return None
 
-            soup = BeautifulSoup(r.text, "html.parser")
+            soup = BeautifulSoup(html, "lxml")
+            labels = self._build_label_index(soup)
             data = {"shop_id": shop_id, "url": url}
 
             # 会社名を取得
-            company_raw = self._extract_text(soup, "会社名")
+            company_raw = self._extract_text(labels, "会社名")
             data["company_name"] = self._clean_company_name(company_raw)
 
             if not data.get("company_name"):
                 return None
 
             # その他の情報を取得
-            data["address"] = self._extract_text(soup, "所在地")
+            data["address"] = self._extract_text(labels, "所在地")
 
-            contact = self._extract_text(soup, "連絡先")
+            contact = self._extract_text(labels, "連絡先")
             data["phone"] = self._extract_tel(contact)
 
-            data["website"] = self._extract_hp(soup)
-            data["capital"] = self._extract_text(soup, "資本金")
-            data["representative"] = self._extract_text(soup, "代表者")
+            data["website"] = self._extract_hp(labels)
+            data["capital"] = self._extract_text(labels, "資本金")
+            data["representative"] = self._extract_text(labels, "代表者")
 
             return data if data.get("company_name") else None
 
@@ -126,9 +201,39 @@ class HagukumiScraper:
             print(f"[Hagukumi] Error at {shop_id}: {e}")
             return None
 
-    def _extract_text(self, soup: BeautifulSoup, title: str) -> str:
+    def _on_rate_limited(self, shop_id: int, retry_after: Optional[str]):
+        """429 応答: Retry-After があればその秒数、なければ指数バックオフで全ワーカーを待たせる"""
+        with self._backoff_lock:
+            self._consecutive_429 += 1
+            wait = retry_after_seconds(retry_after)
+            if wait is None:
+                wait = min(2 ** self._consecutive_429, MAX_BACKOFF_SECONDS)
+        print(f"[Hagukumi] Rate limited at {shop_id}, waiting {wait:.0f}s...")
+        self._pause(wait)
+
+    def _pause(self, seconds: float):
+        """全ワーカーのリクエストを seconds 秒止める（既により長い待機中ならそのまま）"""
+        with self._backoff_lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def _wait_for_resume(self):
+        """バックオフ中なら再開時刻まで待つ（停止リクエストには即応する）"""
+        while self.is_running_check():
+            delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(min(delay, 1.0))
+
+    def _build_label_index(self, soup: BeautifulSoup) -> dict:
+        """項目名（p のテキスト）→ p 要素の索引を1回の走査で作成（同名は最初のものを優先）"""
+        labels = {}
+        for p in soup.find_all("p"):
+            labels.setdefault(p.get_text(strip=True), p)
+        return labels
+
+    def _extract_text(self, labels: dict, title: str) -> str:
         """指定タイトルの次のテキストを取得"""
-        unit = soup.find("p", string=title)
+        unit = labels.get(title)
         if unit:
             text_tag = unit.find_next("p", class_="text")
             if text_tag:
@@ -138,14 +243,14 @@ class HagukumiScraper:
     def _clean_company_name(self, name: str) -> str:
         """会社名をクリーンアップ"""
         name = name.strip()
-        bracket = re.search(r"\[(.+?)\]", name)
+        bracket = BRACKET_RE.search(name)
         if bracket:
             return bracket.group(1).strip()
         return name
 
-    def _extract_hp(self, soup: BeautifulSoup) -> str:
+    def _extract_hp(self, labels: dict) -> str:
         """ホームページURLを取得"""
-        unit = soup.find("p", string="ホームページ")
+        unit = labels.get("ホームページ")
         if unit:
             link = unit.find_next("a")
             if link:
@@ -154,5 +259,5 @@ class HagukumiScraper:
 
     def _extract_tel(self, text: str) -> str:
         """連絡先から電話番号を抽出"""
-        match = re.search(r"TEL：?(\d[\d\-]+)", text)
+        match = TEL_RE.search(text)
         return match.group(1) if match else ""
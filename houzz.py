@@ -3,6 +3,8 @@ Houzz スクレイパー (SaaS Worker版)
 建築・リフォーム業者情報を収集
 """
 import time
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Optional
 
 from selenium import webdriver
@@ -19,6 +21,8 @@ HOUZZ_PROFESSIONS = {
     "リフォーム全般": "home-remodeling",
     "リフォーム専門": "remodeling-specialists",
 }
+# URL用スラッグ -> 日本語名
+HOUZZ_PROFESSION_NAMES = {slug: name for name, slug in HOUZZ_PROFESSIONS.items()}
 
 # 都道府県リスト
 HOUZZ_PREFECTURES = [
@@ -32,6 +36,24 @@ HOUZZ_PREFECTURES = [
     "福岡県", "佐賀県", "長崎県", "熊本県", "大分県", "宮崎県", "鹿児島県", "沖縄県",
 ]
 
+# 店舗詳細を並列取得するブラウザ数（filters["detail_workers"] で変更可）
+DEFAULT_DETAIL_WORKERS = 3
+
+# 店舗詳細ページの会社名・電話番号・住所・ホームページを取得
+STORE_DETAIL_JS = """
+const byXPath = xp => document.evaluate(xp, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const h1 = document.querySelector("h1");
+const phone = byXPath("//h3[contains(text(), '電話番号')]/following-sibling::p");
+const address = document.querySelector("div[class*='dbBdzY'] p");
+const website = byXPath("//span[contains(@class, 'Website__EllipsisText')]");
+return {
+    company_name: h1 ? h1.innerText : "",
+    phone: phone ? phone.innerText : "",
+    address: address ? address.innerText.replace(/\\n/g, " ") : "",
+    website: website ? website.innerText : "",
+};
+"""
+
 
 class HouzzScraper:
     """Houzzから建築・リフォーム業者情報を収集"""
@@ -41,12 +63,17 @@ class HouzzScraper:
         progress_callback: Optional[Callable[[int, int], None]] = None,
         result_callback: Optional[Callable[[dict], None]] = None,
         is_running_check: Optional[Callable[[], bool]] = None,
+        browser_pool=None,
     ):
         self.progress_callback = progress_callback
         self.result_callback = result_callback
         self.is_running_check = is_running_check or (lambda: True)
+        self.browser_pool = browser_pool  # executor の BrowserPool（あればブラウザを再利用）
 
-        self.driver = None
+        self.driver = None  # 一覧ページ用
+        self._detail_drivers = []  # 店舗詳細用（_free_drivers で1ドライバー1リクエストずつ貸し出す）
+        self._free_drivers = queue.Queue()
+        self._detail_pool = None
         self.result_count = 0
 
     def run(self, professions: list, prefectures: list, filters: dict = None) -> int:
@@ -56,6 +83,7 @@ class HouzzScraper:
 
         try:
             self._init_browser()
+            self._init_detail_browsers(int(filters.get("detail_workers") or DEFAULT_DETAIL_WORKERS))
 
             total_combinations = len(professions) * len(prefectures)
             current_combo = 0
@@ -66,10 +94,7 @@ class HouzzScraper:
                     break
 
                 # 職種の日本語名を取得
-                profession_name = next(
-                    (k for k, v in HOUZZ_PROFESSIONS.items() if v == profession_slug),
-                    profession_slug
-                )
+                profession_name = HOUZZ_PROFESSION_NAMES.get(profession_slug, profession_slug)
 
                 for location in prefectures:
                     if not self.is_running_check():
@@ -102,18 +127,55 @@ class HouzzScraper:
         options.add_argument("--disable-infobars")
         # クラッシュ防止
         options.add_argument("--disable-features=VizDisplayCompositor")
-
-        self.driver = webdriver.Chrome(options=options)
-        self.driver.set_page_load_timeout(30)
+        # 画像は読み込まない（取得するのはテキストとリンクのみ）
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+
+        self._options = options
+        self.driver = self._create_driver()
         print("[Houzz] ブラウザ起動完了" + (" (ヘッドレス)" if headless else ""))
 
+    def _create_driver(self):
+        """ドライバーを作成（BrowserPool があれば再利用）"""
+        options = self._options
+        if self.browser_pool:
+            driver = self.browser_pool.acquire("houzz", lambda: webdriver.Chrome(options=options))
+        else:
+            driver = webdriver.Chrome(options=options)
+        driver.set_page_load_timeout(30)
+        return driver
+
+    def _init_detail_browsers(self, workers: int):
+        """店舗詳細用のブラウザとワーカーを用意"""
+        for _ in range(max(1, workers)):
+            driver = self._create_driver()
+            self._detail_drivers.append(driver)
+            self._free_drivers.put(driver)
+        self._detail_pool = ThreadPoolExecutor(max_workers=len(self._detail_drivers))
+
     def _close_browser(self):
         """ブラウザを終了"""
+        if self._detail_pool:
+            self._detail_pool.shutdown(wait=True, cancel_futures=True)
+            self._detail_pool = None
+
+        drivers = ([self.driver] if self.driver else []) + self._detail_drivers
+        self._detail_drivers = []
+        self._free_drivers = queue.Queue()
+
+        for driver in drivers:
+            if self.browser_pool:
+                self.browser_pool.release(driver)
+            else:
+                try:
+                    driver.quit()
+                except:
+                    pass
+
         if self.driver:
-            try:
-                self.driver.quit()
-            except:
-                pass
             self.driver = None
             print("[Houzz] ブラウザを終了しました")
 
@@ -149,13 +211,17 @@ class HouzzScraper:
 
             print(f"[Houzz] {len(store_links)} 件の店舗を検出")
 
-            # 各店舗の詳細データを取得
-            for store_url in store_links:
+            # 各店舗の詳細データを詳細用ブラウザで並列取得し、結果はページ内の順序で処理する
+            futures = [
+                self._detail_pool.submit(self._extract_with_free_driver, store_url, profession_name, location)
+                for store_url in store_links
+            ]
+            for future in futures:
                 if not self.is_running_check():
                     break
 
                 try:
-                    data = self._extract_store_detail(store_url, profession_name, location)
+                    data = future.result()
                     if data:
                         self.result_count += 1
                         if self.result_callback:
@@ -194,43 +260,37 @@ class HouzzScraper:
         except:
             return []
 
-    def _extract_store_detail(self, store_url: str, profession_name: str, location: str) -> Optional[dict]:
+    def _extract_with_free_driver(self, store_url: str, profession_name: str, location: str) -> Optional[dict]:
+        """空いている詳細用ドライバーを借りて店舗詳細を取得（ワーカースレッドで実行）"""
+        if not self.is_running_check():
+            return None
+        driver = self._free_drivers.get()
+        try:
+            return self._extract_store_detail(driver, store_url, profession_name, location)
+        finally:
+            self._free_drivers.put(driver)
+
+    def _extract_store_detail(self, driver, store_url: str, profession_name: str, location: str) -> Optional[dict]:
         """店舗詳細ページから情報を抽出"""
         try:
-            self.driver.get(store_url)
+            driver.get(store_url)
             time.sleep(2)
         except:
             return None
 
-        # 会社名
+        # 会社名・電話番号・住所・ホームページを1回のスクリプトでまとめて取得
         try:
-            company_name = self.driver.find_element(By.TAG_NAME, "h1").text
+            detail = driver.execute_script(STORE_DETAIL_JS) or {}
         except:
-            company_name = ""
+            detail = {}
 
+        company_name = detail.get("company_name") or ""
         if not company_name:
             return None
 
-        # 電話番号
-        try:
-            phone = self.driver.find_element(By.XPATH, "//h3[contains(text(), '電話番号')]/following-sibling::p").text
-        except:
-            phone = ""
-
-        # 住所
-        try:
-            address = self.driver.execute_script("""
-                let el = document.querySelector("div[class*='dbBdzY'] p");
-                return el ? el.innerText.replace(/\\n/g, " ") : "";
-            """)
-        except:
-            address = ""
-
-        # ホームページ
-        try:
-            website = self.driver.find_element(By.XPATH, "//span[contains(@class, 'Website__EllipsisText')]").text
-        except:
-            website = ""
+        phone = detail.get("phone") or ""
+        address = detail.get("address") or ""
+        website = detail.get("website") or ""
 
         return {
             "profession": profession_name,
@@ -2,11 +2,18 @@
 イエタッタ スクレイパー (SaaS Worker版)
 全国12地域の住宅会社情報を収集
 """
-import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Optional
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+try:
+    from ._http_utils import RateLimiter, read_text
+except ImportError:
+    # 更新ディレクトリから単体モジュールとして読み込まれた場合
+    from scraper._http_utils import RateLimiter, read_text
 
 
 # 地域情報
@@ -85,11 +92,30 @@ IETATTA_REGIONS = {
     },
 }
 
+# 並列取得のワーカー数（filters["max_workers"] で上書き可）
+DEFAULT_MAX_WORKERS = 4
+# 1度にワーカーへ投入するID数（停止リクエストへの応答性とメモリを抑える）
+ID_CHUNK_SIZE = 100
+# サイト全体へのリクエストレート（並列化してもこの速度を超えない）
+REQUESTS_PER_SECOND = 2.0
+REQUEST_BURST = 1
+# 1ページの最大サイズ（これを超える応答は読み切らずに捨てる）
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 }
 
 
+def _create_session() -> requests.Session:
+    """Keep-Alive・コネクションプール付きのセッションを作成（地域ごとにホストが異なる）"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=len(IETATTA_REGIONS), pool_maxsize=32, max_retries=0)
+    session.mount("https://", adapter)
+    return session
+
+
 class IetattaScraper:
     """イエタッタから住宅会社情報を収集"""
 
@@ -103,6 +129,9 @@ class IetattaScraper:
         self.result_callback = result_callback
         self.is_running_check = is_running_check or (lambda: True)
         self.result_count = 0
+        self.session = _create_session()
+        self.max_workers = DEFAULT_MAX_WORKERS
+        self._rate_limiter = RateLimiter(REQUESTS_PER_SECOND, REQUEST_BURST)
 
     def run(self, filters: dict = None) -> int:
         """スクレイピングを実行"""
@@ -111,88 +140,116 @@ class IetattaScraper:
 
         regions = filters.get("regions", list(IETATTA_REGIONS.keys()))
         total_regions = len(regions)
+        self.max_workers = int(filters.get("max_workers") or DEFAULT_MAX_WORKERS)
 
-        for idx, region in enumerate(regions):
-            if not self.is_running_check():
-                print("[Ietatta] 停止リクエスト受信")
-                break
+        try:
+            for idx, region in enumerate(regions):
+                if not self.is_running_check():
+                    print("[Ietatta] 停止リクエスト受信")
+                    break
 
-            region_info = IETATTA_REGIONS.get(region)
-            if not region_info:
-                print(f"[Ietatta] 不明な地域: {region}")
-                continue
+                region_info = IETATTA_REGIONS.get(region)
+                if not region_info:
+                    print(f"[Ietatta] 不明な地域: {region}")
+                    continue
 
-            region_name = region_info["name"]
-            start_id = filters.get("start_id", region_info["default_start"])
-            end_id = filters.get("end_id", region_info["default_end"])
+                region_name = region_info["name"]
+                start_id = filters.get("start_id", region_info["default_start"])
+                end_id = filters.get("end_id", region_info["default_end"])
 
-            print(f"[Ietatta] [{idx+1}/{total_regions}] {region_name} (ID: {start_id}-{end_id})")
-            self._scrape_region(region, region_info, start_id, end_id)
+                print(f"[Ietatta] [{idx+1}/{total_regions}] {region_name} (ID: {start_id}-{end_id})")
+                self._scrape_region(region, region_info, start_id, end_id)
+        finally:
+            self.session.close()
 
         return self.result_count
 
     def _scrape_region(self, region: str, region_info: dict, start_id: int, end_id: int):
-        """特定の地域をスクレイピング"""
+        """特定の地域をスクレイピング（ID単位の取得はワーカーで並列実行し、結果はID順にこのスレッドで処理する）"""
         base_url = region_info["url"]
         region_name = region_info["name"]
         total = end_id - start_id + 1
 
-        for idx, i in enumerate(range(start_id, end_id + 1)):
-            if not self.is_running_check():
-                break
-
-            if self.progress_callback:
-                self.progress_callback(self.result_count, total)
-
-            if i % 100 == 0:
-                print(f"[Ietatta] {region_name} ID {i} / {end_id}")
-
-            try:
-                url = base_url.format(i)
-                r = requests.get(url, headers=HEADERS, timeout=15)
-                if r.status_code != 200:
-                    continue
-
-                soup = BeautifulSoup(r.text, "html.parser")
-
-                # 複数のパース方法を試す
-                data = self._parse_e_data(soup)
-                if not data:
-                    data = self._parse_datatable(soup)
-                if not data:
-                    data = self._parse_dt_dd(soup)
-
-                company_name = data.get("社名", "")
-                phone = data.get("電話番号", "") or data.get("電話", "")
-                capital = data.get("資本金", "")
-                representative = data.get("代表者", "")
-                website = data.get("URL", "") or data.get("ホームページ", "")
-                address = data.get("会社所在地", "") or data.get("住所", "")
-
-                if not any([company_name, phone, website]):
-                    continue
-
-                result = {
-                    "id": str(i),
-                    "url": url,
-                    "company_name": company_name,
-                    "address": address,
-                    "phone": phone,
-                    "website": website,
-                    "capital": capital,
-                    "representative": representative,
-                    "region": region_name,
-                }
-
-                self.result_count += 1
-                if self.result_callback:
-                    self.result_callback(result)
-
-                print(f"[Ietatta] ✓ {company_name[:25] if company_name else 'ID:' + str(i)}")
-                time.sleep(1)
-
-            except Exception as e:
-                continue
+        def fetch(i):
+            return self._scrape_company(base_url, region_name, i)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for chunk_start in range(start_id, end_id + 1, ID_CHUNK_SIZE):
+                if not self.is_running_check():
+                    return
+
+                chunk_ids = range(chunk_start, min(chunk_start + ID_CHUNK_SIZE, end_id + 1))
+                for i, result in zip(chunk_ids, pool.map(fetch, chunk_ids)):
+                    if not self.is_running_check():
+                        return
+
+                    if self.progress_callback:
+                        self.progress_callback(self.result_count, total)
+
+                    if i % 100 == 0:
+                        print(f"[Ietatta] {region_name} ID {i} / {end_id}")
+
+                    if not result:
+                        continue
+
+                    self.result_count += 1
+                    if self.result_callback:
+                        self.result_callback(result)
+
+                    company_name = result["company_name"]
+                    print(f"[Ietatta] ✓ {company_name[:25] if company_name else 'ID:' + str(i)}")
+
+    def _scrape_company(self, base_url: str, region_name: str, i: int) -> Optional[dict]:
+        """個別の会社ページをスクレイピング（ワーカースレッドで実行）"""
+        if not self.is_running_check():
+            return None
+        # リクエスト間隔（ヒット・欠番を問わず全ワーカー共通のレート）
+        self._rate_limiter.acquire()
+        if not self.is_running_check():
+            return None
+
+        try:
+            url = base_url.format(i)
+            # 本文は上限付きで読み切る（404 等も読み切って接続を Keep-Alive で再利用する）
+            with self.session.get(url, timeout=15, stream=True) as r:
+                html = read_text(r, MAX_PAGE_BYTES)
+                status = r.status_code
+            if status != 200 or not html:
+                return None
+
+            soup = BeautifulSoup(html, "lxml")
+
+            # 複数のパース方法を試す
+            data = self._parse_e_data(soup)
+            if not data:
+                data = self._parse_datatable(soup)
+            if not data:
+                data = self._parse_dt_dd(soup)
+
+            company_name = data.get("社名", "")
+            phone = data.get("電話番号", "") or data.get("電話", "")
+            capital = data.get("資本金", "")
+            representative = data.get("代表者", "")
+            website = data.get("URL", "") or data.get("ホームページ", "")
+            address = data.get("会社所在地", "") or data.get("住所", "")
+
+            if not any([company_name, phone, website]):
+                return None
+
+            return {
+                "id": str(i),
+                "url": url,
+                "company_name": company_name,
+                "address": address,
+                "phone": phone,
+                "website": website,
+                "capital": capital,
+                "representative": representative,
+                "region": region_name,
+            }
+
+        except Exception as e:
+            return None
 
     def _parse_e_data(self, soup) -> dict:
         """div.e_data形式のパース"""
@@ -208,43 +265,43 @@ class IetattaScraper:
     def _parse_datatable(self, soup) -> dict:
         """datatable_L形式のパース"""
         data = {}
-        data_section = soup.find("div", class_="datatable_L")
+        data_section = soup.select_one("div.datatable_L")
         if data_section:
-            for dl in data_section.find_all("dl"):
-                dt = dl.find("dt")
-                dd = dl.find("dd")
-                if dt and dd:
-                    key = dt.get_text(strip=True)
-                    value = dd.get_text(" ", strip=True)
-                    if key == "URL":
-                        a_tag = dd.find("a")
-                        if a_tag and a_tag.get("href"):
-                            value = a_tag["href"]
-                    data[key] = value
+            # dt を1回の CSS 選択でまとめて取り、値は直後の dd から読む
+            for dt in data_section.select("dl > dt"):
+                dd = dt.find_next_sibling("dd")
+                if not dd:
+                    continue
+                key = dt.get_text(strip=True)
+                value = dd.get_text(" ", strip=True)
+                if key == "URL":
+                    a_tag = dd.find("a")
+                    if a_tag and a_tag.get("href"):
+                        value = a_tag["href"]
+                data[key] = value
         return data
 
     def _parse_dt_dd(self, soup) -> dict:
         """dt/dd形式のパース"""
-        data = {}
+        # dt → 直後の dd を1回の走査で集める（同じラベルは最初のものを優先）
+        dds = {}
+        for dt in soup.find_all("dt"):
+            dds.setdefault(dt.get_text(strip=True), dt.find_next_sibling("dd"))
 
         def get_dd(label):
-            dt = soup.find("dt", string=lambda t: t and t.strip() == label)
-            if dt:
-                dd = dt.find_next_sibling("dd")
-                return dd.get_text(strip=True) if dd else ""
-            return ""
+            dd = dds.get(label)
+            return dd.get_text(strip=True) if dd else ""
 
+        data = {}
         data["社名"] = get_dd("社名")
         data["電話番号"] = get_dd("電話")
         data["資本金"] = get_dd("資本金")
         data["代表者"] = get_dd("代表者")
 
-        dt_site = soup.find("dt", string=lambda t: t and t.strip() == "公式サイト")
-        if dt_site:
-            dd = dt_site.find_next_sibling("dd")
-            if dd:
-                a = dd.find("a")
-                if a and a.get("href"):
-                    data["URL"] = a["href"].strip()
+        dd = dds.get("公式サイト")
+        if dd:
+            a = dd.find("a")
+            if a and a.get("href"):
+                data["URL"] = a["href"].strip()
 
         return data
@@ -3,17 +3,60 @@
 中国・四国地方のビルダー情報を収集
 ※ Seleniumは不要、HTTPリクエストのみ
 """
+import hashlib
+import json
+import os
+import tempfile
+import threading
 import time
-import random
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
 from typing import Callable, Optional
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from ._http_utils import RateLimiter, retry_after_seconds
+except ImportError:
+    # 更新ディレクトリから単体モジュールとして読み込まれた場合
+    from scraper._http_utils import RateLimiter, retry_after_seconds
 
 
 IETO_DOMAIN = "https://ieto.stephouse.jp"
-HEADERS = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"}
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "ja,en;q=0.8",
+}
+
+# 一覧ページはリンクだけを木に組み立てる
+BUILDER_LINK_STRAINER = SoupStrainer("a", href=True)
+
+# ビルダーページのディスクキャッシュ（ETag / Last-Modified で再検証、filters["use_cache"]=False で無効化）
+BUILDER_CACHE_DIR = Path(tempfile.gettempdir()) / "silas-worker" / "ieto_cache"
+
+# SNS リンクの判定（href に含まれる文字列 → キー、上から順に判定）
+SNS_PATTERNS = (
+    ("instagram", "instagram"),
+    ("facebook", "facebook"),
+    ("x.com", "x"),
+    ("line.me", "line"),
+)
+
+# ページ取得の並列数（filters["max_workers"] で上書き可）
+DEFAULT_MAX_WORKERS = 4
+# サイト全体へのリクエストレート（逐次実行時の 0.3〜0.6 秒間隔と同程度、並列化してもこの速度を超えない）
+REQUESTS_PER_SECOND = 2.0
+REQUEST_BURST = 1
+# 429 を受けたときに全ワーカーを止める秒数（Retry-After があればそちらを優先）
+ERROR_BACKOFF_SECONDS = 30
+# 進捗通知の間引き（PROGRESS_EVERY 件ごと、または PROGRESS_INTERVAL 秒経過時）
+PROGRESS_EVERY = 10
+PROGRESS_INTERVAL = 0.2
 
 # 利用可能エリア
 IETO_AREAS = {
@@ -24,6 +67,27 @@ IETO_AREAS = {
 }
 
 
+def _create_session() -> requests.Session:
+    """
+    Keep-Alive・コネクションプール付きのセッションを作成（全リクエストが同一ホスト）
+    5xx はここでリトライし、429 は全ワーカーを待たせるため IetoScraper 側で扱う
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[500, 502, 503, 504],
+            raise_on_status=False,
+        ),
+    )
+    session.mount("https://", adapter)
+    return session
+
+
 class IetoScraper:
     """イエトからビルダー情報を収集"""
 
@@ -37,70 +101,115 @@ class IetoScraper:
         self.result_callback = result_callback
         self.is_running_check = is_running_check or (lambda: True)
         self.result_count = 0
+        self.session = _create_session()
+        self._last_progress_at = 0.0
+        self._reported_count = 0
+        self.use_cache = True
+        self._rate_limiter = RateLimiter(REQUESTS_PER_SECOND, REQUEST_BURST)
+        self._backoff_lock = threading.Lock()
+        self._resume_at = 0.0
 
     def run(self, filters: dict = None) -> int:
         """スクレイピングを実行"""
         filters = filters or {}
         self.result_count = 0
+        self._last_progress_at = 0.0
+        self._reported_count = 0
+        self.use_cache = filters.get("use_cache", True)
+        self._resume_at = 0.0
 
         areas = filters.get("areas", list(IETO_AREAS.keys()))
         if not areas:
             areas = list(IETO_AREAS.keys())
 
         print(f"[Ieto] 対象エリア: {areas}")
+        max_workers = int(filters.get("max_workers") or DEFAULT_MAX_WORKERS)
 
-        # 全エリアのリンクを収集
-        all_links = []
-        for area in areas:
-            if not self.is_running_check():
-                break
-            links = self._get_builder_links(area)
-            all_links.extend([(link, area) for link in links])
-
-        total = len(all_links)
-        print(f"[Ieto] 合計 {total}件のビルダーを発見")
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                self._scrape_areas(pool, areas)
+        finally:
+            self.session.close()
 
-        if self.progress_callback:
-            self.progress_callback(0, total)
+        print(f"[Ieto] 完了: {self.result_count}件取得")
+        return self.result_count
 
-        # 各ビルダーページをスクレイピング
-        for idx, (link, area) in enumerate(all_links):
+    def _scrape_areas(self, pool: ThreadPoolExecutor, areas: list):
+        """
+        ページ取得はワーカーで並列実行し、結果の通知はこのスレッドで行う
+        ビルダーページはエリアの一覧が取れた順に取得を始める（全エリアの一覧を待たない）
+        """
+        area_futures = {pool.submit(self._get_builder_links, area): area for area in areas}
+        pending = set(area_futures)
+        areas_left = len(area_futures)
+        total = 0  # 一覧が取れたエリアまでのビルダー数（全エリア揃うまでは途中値）
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
             if not self.is_running_check():
                 print("[Ieto] 停止リクエスト受信")
+                for future in pending:
+                    future.cancel()
                 break
 
-            result = self._scrape_builder(link, area)
-
-            if result:
-                self.result_count += 1
-                if self.result_callback:
-                    self.result_callback(result)
-                if self.progress_callback:
-                    self.progress_callback(self.result_count, total)
-                print(f"[Ieto] ✓ {result.get('name', '')[:30]}")
-
-            # リクエスト間隔
-            time.sleep(random.uniform(0.3, 0.6))
-
-        print(f"[Ieto] 完了: {self.result_count}件取得")
-        return self.result_count
+            for future in done:
+                area = area_futures.get(future)
+                if area is not None:
+                    # エリア一覧 → そのエリアのビルダーページを投入
+                    links = future.result()
+                    total += len(links)
+                    pending.update(pool.submit(self._scrape_builder, link, area) for link in links)
+                    areas_left -= 1
+                    if areas_left == 0:
+                        print(f"[Ieto] 合計 {total}件のビルダーを発見")
+                    if self.progress_callback:
+                        self.progress_callback(self.result_count, total)
+                    continue
+
+                result = future.result()
+                if result:
+                    self.result_count += 1
+                    if self.result_callback:
+                        self.result_callback(result)
+                    self._report_progress(total)
+                    print(f"[Ieto] ✓ {result.get('name', '')[:30]}")
+
+        # 間引きで送られていない最後の進捗を通知
+        self._report_progress(total, force=True)
+
+    def _report_progress(self, total: int, force: bool = False):
+        """進捗を間引いて通知（結果を処理するスレッドから呼ぶ）"""
+        if not self.progress_callback or self.result_count == self._reported_count:
+            return
+        now = time.monotonic()
+        if (
+            force
+            or self.result_count % PROGRESS_EVERY == 0
+            or now - self._last_progress_at >= PROGRESS_INTERVAL
+        ):
+            self.progress_callback(self.result_count, total)
+            self._last_progress_at = now
+            self._reported_count = self.result_count
 
     def _get_builder_links(self, area: str) -> list:
-        """エリアからビルダーリンク一覧を取得"""
+        """エリアからビルダーリンク一覧を取得（ワーカースレッドで実行）"""
+        if not self.is_running_check():
+            return []
+
         url = f"{IETO_DOMAIN}/{area}/builder.html"
         links = set()
 
         try:
-            r = requests.get(url, headers=HEADERS, timeout=10)
+            r = self._get(url, timeout=10)
             if r.status_code != 200:
                 print(f"[Ieto] [{area}] ページ取得失敗: {r.status_code}")
                 return []
 
-            soup = BeautifulSoup(r.text, "html.parser")
+            soup = BeautifulSoup(r.text, "lxml", parse_only=BUILDER_LINK_STRAINER)
 
-            for a in soup.select("a"):
-                href = a.get("href", "")
-                if href and "builder/" in href and href.endswith(".html"):
+            for a in soup.find_all("a"):
+                href = a["href"]
+                if "builder/" in href and href.endswith(".html"):
                     full = urljoin(IETO_DOMAIN, href)
                     links.add(full)
 
@@ -112,13 +221,16 @@ class IetoScraper:
             return []
 
     def _scrape_builder(self, url: str, area: str) -> Optional[dict]:
-        """個別ビルダーページをスクレイピング"""
+        """個別ビルダーページをスクレイピング（ワーカースレッドで実行）"""
+        if not self.is_running_check():
+            return None
+
         try:
-            r = requests.get(url, headers=HEADERS, timeout=10)
-            if r.status_code != 200:
+            html = self._fetch_builder(url)
+            if html is None:
                 return None
 
-            soup = BeautifulSoup(r.text, "html.parser")
+            soup = BeautifulSoup(html, "lxml")
             data = {"url": url, "area": area, "area_name": IETO_AREAS.get(area, area)}
 
             # タイトル取得
@@ -129,12 +241,13 @@ class IetoScraper:
             except:
                 pass
 
-            # テーブル情報取得
+            # テーブル情報取得（th の索引は1回だけ作る）
+            ths = self._build_th_index(soup)
+
             def get_text(th_text):
-                th = soup.find("th", string=th_text)
-                if th and th.find_next("td"):
-                    return th.find_next("td").get_text(strip=True)
-                return ""
+                th = ths.get(th_text)
+                td = th.find_next("td") if th else None
+                return td.get_text(strip=True) if td else ""
 
             data["address"] = get_text("所在地")
             data["hours"] = get_text("営業時間")
@@ -147,7 +260,7 @@ class IetoScraper:
             data["employees"] = get_text("従業員数")
 
             # URL取得
-            th = soup.find("th", string="URL")
+            th = ths.get("URL")
             if th:
                 a = th.find_next("a")
                 if a:
@@ -163,19 +276,94 @@ class IetoScraper:
             print(f"[Ieto] Error at {url}: {e}")
             return None
 
+    def _fetch_builder(self, url: str) -> Optional[str]:
+        """ビルダーページのHTMLを取得（キャッシュがあれば条件付きGETで再検証し、304ならキャッシュを使う）"""
+        cache_file = BUILDER_CACHE_DIR / (hashlib.sha1(url.encode()).hexdigest() + ".json")
+        cached = None
+        headers = {}
+        if self.use_cache:
+            try:
+                cached = json.loads(cache_file.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                pass
+            if cached:
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
+
+        r = self._get(url, headers=headers, timeout=10)
+        if r.status_code == 304 and cached:
+            return cached["html"]
+        if r.status_code != 200:
+            return None
+
+        html = r.text
+        etag = r.headers.get("ETag", "")
+        last_modified = r.headers.get("Last-Modified", "")
+        # 再検証できない（検証子がない）ページは保存しない
+        if self.use_cache and (etag or last_modified):
+            try:
+                BUILDER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                tmp_file = cache_file.with_suffix(f".{threading.get_ident()}.tmp")
+                tmp_file.write_text(
+                    json.dumps({"etag": etag, "last_modified": last_modified, "html": html}, ensure_ascii=False),
+                    encoding="utf-8",
+                )
+                os.replace(tmp_file, cache_file)
+            except OSError as e:
+                print(f"[Ieto] キャッシュ書き込みエラー: {e}")
+        return html
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """全ワーカー共通のレートでリクエスト（429 を受けたら全ワーカーを待たせる）"""
+        self._wait_for_resume()
+        self._rate_limiter.acquire()
+        r = self.session.get(url, **kwargs)
+        if r.status_code == 429:
+            wait_sec = retry_after_seconds(r.headers.get("Retry-After"))
+            if wait_sec is None:
+                wait_sec = ERROR_BACKOFF_SECONDS
+            print(f"[Ieto] Rate limited at {url}, waiting {wait_sec:.0f}s...")
+            self._pause(wait_sec)
+        return r
+
+    def _pause(self, seconds: float):
+        """全ワーカーのリクエストを seconds 秒止める（既により長い待機中ならそのまま）"""
+        with self._backoff_lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def _wait_for_resume(self):
+        """バックオフ中なら再開時刻まで待つ（停止リクエストには即応する）"""
+        while self.is_running_check():
+            delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(min(delay, 1.0))
+
+    def _build_th_index(self, soup: BeautifulSoup) -> dict:
+        """見出し（th のテキスト）→ th 要素の索引を1回の走査で作成（同名は最初のものを優先）"""
+        ths = {}
+        for th in soup.find_all("th"):
+            ths.setdefault(th.get_text(strip=True), th)
+        return ths
+
     def _extract_sns(self, soup) -> dict:
         """SNSリンクを抽出"""
         sns = {"instagram": "", "facebook": "", "x": "", "line": ""}
         sns_area = soup.select_one(".builder--info-sns")
         if sns_area:
-            for a in sns_area.find_all("a"):
-                link = a.get("href", "")
-                if "instagram" in link:
-                    sns["instagram"] = link
-                elif "facebook" in link:
-                    sns["facebook"] = link
-                elif "x.com" in link:
-                    sns["x"] = link
-                elif "line.me" in link:
-                    sns["line"] = link
+            remaining = len(sns)
+            # 同じ種類のリンクが複数あれば最後のものを使う（後ろから見て最初に見つかったもの）
+            for a in reversed(sns_area.select("a[href]")):
+                link = a["href"]
+                for sub, key in SNS_PATTERNS:
+                    if sub in link:
+                        if not sns[key]:
+                            sns[key] = link
+                            remaining -= 1
+                        break
+                # 全種類そろったら残りのリンクは見ない
+                if not remaining:
+                    break
         return sns
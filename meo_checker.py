@@ -3,15 +3,168 @@ MEO診断チェッカー (SaaS Worker版)
 meo-tools.comから診断データを取得
 ローカル版と同等の機能を提供
 """
-import time
+import hashlib
+import hmac
 import json
-from typing import Callable, Optional, List, Dict, Any
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional, List, Dict, Any, Tuple
 
+import lxml.html
+import requests
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+
+
+# アカウントを並列処理するブラウザ数（アカウントごとに別ブラウザでログインする、並列化は account_workers 指定時のみ）
+DEFAULT_ACCOUNT_WORKERS = 1
+
+# 店舗一覧の各行（5列以上）から ID・店舗名・会社名を取得
+SHOP_ROWS_JS = """
+return Array.from(document.querySelectorAll('table tbody tr'))
+    .filter(r => r.cells.length >= 5)
+    .map(r => ({id: r.cells[0].innerText.trim(), name: r.cells[3].innerText.trim(), company: r.cells[4].innerText.trim()}));
+"""
+
+# ログイン後の Cookie を保存し、次回はフォーム入力を省く（reuse_login=True のときのみ）
+# ファイル名はメールアドレスとパスワードの HMAC（パスワードが違えば別ファイルになり復元されない）
+LOGIN_COOKIE_DIR = Path(tempfile.gettempdir()) / "silas-worker" / "meo_cookies"
+LOGIN_COOKIE_TTL = 6 * 60 * 60  # 秒
+
+# ブラウザで読み込まない URL パターン（Web フォント・計測タグ。CSS はクリック判定に使うので止めない）
+BLOCKED_URL_PATTERNS = (
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*googletagmanager*",
+    "*google-analytics*",
+)
+
+# 結果に載せる診断項目（○/×）とインサイト項目（この順で出力）
+REPORT_ITEM_KEYS = (
+    "ビジネス名", "メインカテゴリ", "ビジネスの説明", "開業日", "住所",
+    "営業時間設定", "営業時間正確性", "メニュー、サービス", "店舗HP URL", "電話番号",
+    "投稿頻度", "写真投稿数", "写真の投稿頻度", "ロゴ&カバー写真",
+    "平均評価", "クチコミ投稿件数", "クチコミ返信率",
+)
+INSIGHT_KEYS = (
+    "表示回数", "モバイル", "PC", "平均クリック率",
+    "電話クリック数", "ルート検索回数", "ウェブサイトクリック数", "メニュークリック数",
+)
+
+# WebDriverWait のポーリング間隔（既定 0.5 秒だと検知が平均 0.25 秒遅れる）
+WAIT_POLL_SECONDS = 0.1
+
+# Selenium のロケーター（find_element(*SEL_...) / EC の引数としてそのまま使う）
+SEL_EMAIL_INPUT = (By.CSS_SELECTOR, "input[type='email']")
+SEL_PASSWORD_INPUT = (By.CSS_SELECTOR, "input[type='password']")
+SEL_SUBMIT_INPUT = (By.CSS_SELECTOR, "input[type='submit']")
+SEL_TABLE_ROWS = (By.CSS_SELECTOR, "table tbody tr")
+SEL_PAGINATOR = (By.CSS_SELECTOR, "a.paginator-page")
+SEL_MENU_ITEM = (By.CSS_SELECTOR, "[role='menuitem']")
+SEL_REPORTS_LINK = (By.CSS_SELECTOR, "a[href='/users/reports']")
+SEL_RUN_DIAGNOSIS_BUTTON = (By.XPATH, "//button[contains(., '新しい診断を実行')]")
+SEL_OK_BUTTON = (By.XPATH, "//button[text()='OK' or text()='ok' or text()='Ok']")
+SEL_DASHBOARD = (By.CSS_SELECTOR, "[data-react-component='Dashboard']")
+SEL_INSIGHT_CARDS = (By.CSS_SELECTOR, ".grid .bg-white.border.rounded-lg.p-4")
+SEL_REVIEW_TITLES = (By.CSS_SELECTOR, "h3.tracking-tight")
+SEL_KEYWORD_RANKING_LINK = (By.XPATH, "//span[contains(text(), 'キーワードランキング')]/ancestor::a")
+
+# 一覧ページの HTML パーサー（meo-tools は UTF-8）
+HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+# 一覧ページのページ送りリンク（a.paginator-page）
+PAGINATOR_XPATH = "//a[contains(concat(' ', normalize-space(@class), ' '), ' paginator-page ')]"
+
+# 店舗一覧から ID（1列目）が arguments[0] の行のアクションボタンを返す（見つからなければ行自体がないとして null）
+SHOP_ACTION_BUTTON_JS = """
+const row = Array.from(document.querySelectorAll('table tbody tr'))
+    .find(r => r.cells.length >= 5 && r.cells[0].innerText.trim() === arguments[0]);
+if (!row) return null;
+return {button: row.querySelector("button[id^='radix-']")};
+"""
+
+# 開いているメニューから「ログイン」項目を返す（arguments[0] の危険ワードを含む項目は除外）
+LOGIN_MENU_ITEM_JS = """
+const danger = arguments[0];
+return Array.from(document.querySelectorAll("[role='menuitem']")).find(item => {
+    const text = item.innerText.trim();
+    if (danger.some(d => text.toLowerCase().includes(d))) return false;
+    return text === 'ログイン';
+}) || null;
+"""
+
+# インサイトカードの {見出し: 数値} を取得（見出し・数値の両方があるカードのみ）
+INSIGHTS_JS = """
+const insights = {};
+document.querySelectorAll('.grid .bg-white.border.rounded-lg.p-4').forEach(card => {
+    const label = card.querySelector('h3');
+    const value = card.querySelector('p.text-2xl');
+    if (label && value) insights[label.innerText.trim()] = value.innerText.trim();
+});
+return insights;
+"""
+
+# ダッシュボードの data-react-props をページ側で JSON として解釈して返す
+DASHBOARD_PROPS_JS = """
+const el = document.querySelector("[data-react-component='Dashboard']");
+return el ? JSON.parse(el.getAttribute('data-react-props')) : null;
+"""
+
+# 口コミカード（合計・返信済・未返信）の {タイトル: 値} と、増加数カードの [ラベル, 値] を取得
+REVIEW_STATS_JS = """
+const titles = arguments[0];
+const totals = {};
+document.querySelectorAll('h3.tracking-tight').forEach(h3 => {
+    const title = h3.innerText.trim();
+    if (!titles.includes(title)) return;
+    // 祖先のうち class に rounded-lg を含む最も外側の div
+    let card = null;
+    for (let el = h3.parentElement; el; el = el.parentElement) {
+        if (el.tagName === 'DIV' && (el.getAttribute('class') || '').includes('rounded-lg')) card = el;
+    }
+    const value = card && card.querySelector('.text-2xl.font-bold');
+    if (value) totals[title] = value.innerText.trim().replace(/件/g, '');
+});
+const increases = [];
+document.querySelectorAll('.grid.grid-cols-3.gap-4 > div.bg-white.border.rounded-lg.p-4').forEach(card => {
+    const label = card.querySelector('h3.text-sm.font-medium.text-gray-600');
+    const value = card.querySelector('p.text-2xl.font-bold');
+    if (label && value) increases.push([label.innerText.trim(), value.innerText.trim()]);
+});
+return {totals: totals, increases: increases};
+"""
+
+# ダッシュボードの JSON・インサイト・口コミ統計を1回でまとめて取得（arguments は口コミ統計のスクリプトへ渡す）
+DASHBOARD_PAGE_JS = (
+    "return {"
+    "dashboard: (function () {" + DASHBOARD_PROPS_JS + "})(), "
+    "insights: (function () {" + INSIGHTS_JS + "})(), "
+    "reviews: (function () {" + REVIEW_STATS_JS + "}).apply(null, arguments)"
+    "};"
+)
+
+# キーワード一覧のうちスイッチが ON の行から [キーワード, 順位] を取得
+KEYWORD_ROWS_JS = """
+return Array.from(document.querySelectorAll('table tbody tr')).filter(r =>
+    r.querySelector("button[role='switch'][data-state='checked']") && r.cells.length >= 2
+).map(r => {
+    const keyword = r.cells[0].querySelector('div > div:first-child');
+    if (!keyword) return null;
+    const rankSpan = r.cells[1].querySelector('div > span:first-child');
+    const rankText = r.cells[1].innerText.trim();
+    const rank = rankSpan ? rankSpan.innerText.trim() : (rankText ? rankText.split(/\\s+/)[0] : '');
+    return [keyword.innerText.trim(), rank];
+}).filter(Boolean);
+"""
 
 
 class MeoCheckerScraper:
@@ -25,28 +178,45 @@ class MeoCheckerScraper:
         progress_callback: Optional[Callable[[int, int], None]] = None,
         result_callback: Optional[Callable[[dict], None]] = None,
         is_running_check: Optional[Callable[[], bool]] = None,
+        browser_pool=None,
     ):
         self.progress_callback = progress_callback
         self.result_callback = result_callback
         self.is_running_check = is_running_check or (lambda: True)
+        self.browser_pool = browser_pool  # executor の BrowserPool（あればブラウザを再利用）
 
         self.driver = None
         self.wait = None
         self.result_count = 0
+        self.reuse_login = False
+        self._listing_ready = False  # 一覧ページがメニュー等を開いていない状態で表示中か
 
-    def run(self, accounts: List[Dict[str, str]], run_diagnosis: bool = True) -> int:
+    def run(
+        self,
+        accounts: List[Dict[str, str]],
+        run_diagnosis: bool = True,
+        account_workers: Optional[int] = None,
+        reuse_login: bool = False,
+    ) -> int:
         """
         複数アカウントの診断データを取得
 
         Args:
             accounts: [{"email": "...", "password": "..."}, ...]
             run_diagnosis: 診断を実行するかどうか（デフォルト: True）
+            account_workers: 並列に使うブラウザ数（デフォルト: DEFAULT_ACCOUNT_WORKERS）
+            reuse_login: ログイン後の Cookie を保存して次回の実行で再利用するか（デフォルト: False）
 
         Returns:
             取得した店舗数
         """
         self.result_count = 0
         self.run_diagnosis_flag = run_diagnosis
+        self.reuse_login = reuse_login
+
+        workers = min(int(account_workers or DEFAULT_ACCOUNT_WORKERS), len(accounts))
+        if workers > 1:
+            return self._run_parallel(accounts, workers)
 
         try:
             self._init_browser()
@@ -69,6 +239,59 @@ class MeoCheckerScraper:
         finally:
             self._close_browser()
 
+    def _run_parallel(self, accounts: List[Dict[str, str]], workers: int) -> int:
+        """アカウントを複数のブラウザで並列処理（ブラウザごとに子スクレイパーを1つ使い、空いたものから次のアカウントを取る）"""
+        total_accounts = len(accounts)
+        pending = queue.Queue()
+        for item in enumerate(accounts):
+            pending.put(item)
+
+        lock = threading.Lock()
+        finished = 0
+
+        def on_result(result: dict):
+            with lock:
+                self.result_count += 1
+                if self.result_callback:
+                    self.result_callback(result)
+
+        def on_progress(_current: int, _total: int):
+            nonlocal finished
+            with lock:
+                finished += 1
+                if self.progress_callback:
+                    self.progress_callback(finished, total_accounts)
+
+        def work():
+            child = MeoCheckerScraper(on_progress, on_result, self.is_running_check, self.browser_pool)
+            child.run_diagnosis_flag = self.run_diagnosis_flag
+            child.reuse_login = self.reuse_login
+            try:
+                child._init_browser()
+                while self.is_running_check():
+                    try:
+                        idx, account = pending.get_nowait()
+                    except queue.Empty:
+                        break
+
+                    print(f"[MEO] アカウント処理中: {idx + 1}/{total_accounts}")
+
+                    try:
+                        child._process_account(account, idx, total_accounts)
+                    except Exception as e:
+                        print(f"[MEO] アカウント処理エラー: {e}")
+            finally:
+                child._close_browser()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(work) for _ in range(workers)]
+            for future in futures:
+                future.result()
+
+        if not self.is_running_check():
+            print("[MEO] 停止リクエスト受信")
+        return self.result_count
+
     def _init_browser(self):
         """ブラウザを初期化"""
         print("[MEO] ブラウザを起動中...")
@@ -78,19 +301,50 @@ class MeoCheckerScraper:
         options.add_argument("--disable-dev-shm-usage")
         options.add_argument("--no-sandbox")
         options.add_argument("--window-size=1920,1080")
-
-        self.driver = webdriver.Chrome(options=options)
-        self.wait = WebDriverWait(self.driver, 10)
+        # 画像は読み込まない（取得するのはテキストと data-react-props のみ）
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+        # DOMContentLoaded で driver.get から戻る（必要な要素は WebDriverWait で待つ）
+        options.page_load_strategy = "eager"
+
+        if self.browser_pool:
+            self.driver = self.browser_pool.acquire("meo_checker", lambda: webdriver.Chrome(options=options))
+        else:
+            self.driver = webdriver.Chrome(options=options)
+        self._block_unneeded_requests()
+        self.wait = WebDriverWait(self.driver, 10, poll_frequency=WAIT_POLL_SECONDS)
         self.driver.set_window_position(-2000, 0)
         print("[MEO] ブラウザ起動完了")
 
+    def _block_unneeded_requests(self):
+        """Web フォント・計測タグなど取得に不要な通信を止める"""
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(BLOCKED_URL_PATTERNS)})
+        except WebDriverException as e:
+            print(f"[MEO] 通信ブロック設定をスキップ: {e}")
+
+    def _wait_for(self, condition) -> bool:
+        """条件を満たすまで待つ（タイムアウト時は False を返し、判定は呼び出し側に任せる）"""
+        try:
+            self.wait.until(condition)
+            return True
+        except TimeoutException:
+            return False
+
     def _close_browser(self):
         """ブラウザを終了"""
         if self.driver:
-            try:
-                self.driver.quit()
-            except:
-                pass
+            if self.browser_pool:
+                self.browser_pool.release(self.driver)
+            else:
+                try:
+                    self.driver.quit()
+                except:
+                    pass
             self.driver = None
             self.wait = None
 
@@ -104,143 +358,234 @@ class MeoCheckerScraper:
             print("[MEO] メールまたはパスワードが空です")
             return
 
-        # ログイン
+        # 前のアカウントの Cookie を持ち越さない
+        self.driver.delete_all_cookies()
+
+        # 保存済みの Cookie でログイン状態を復元できればフォーム入力を省く
+        if self.reuse_login and self._restore_login(email, password):
+            print(f"[MEO] ログイン済みセッションを再利用: {email}")
+        elif not self._login(email, password):
+            return
+
+        try:
+            self._process_listing(target_company)
+        finally:
+            try:
+                # 再利用しないセッションはサーバー側でも終了させる
+                if not self.reuse_login:
+                    self.driver.get("https://meo-tools.com/agencies/sign_out")
+                # 次のアカウント（ブラウザプールの再利用先）に Cookie を残さない
+                self.driver.delete_all_cookies()
+            except:
+                pass
+
+        if self.progress_callback:
+            self.progress_callback(idx + 1, total)
+
+    def _cookie_file(self, email: str, password: str) -> Path:
+        """アカウント（メールアドレス＋パスワード）ごとの Cookie 保存先"""
+        digest = hmac.new(password.encode("utf-8"), email.encode("utf-8"), hashlib.sha256).hexdigest()
+        return LOGIN_COOKIE_DIR / (digest + ".json")
+
+    def _restore_login(self, email: str, password: str) -> bool:
+        """保存済み Cookie をブラウザに戻し、ログイン状態なら True（期限切れ・セッション切れのファイルは削除）"""
+        cookie_file = self._cookie_file(email, password)
+        try:
+            if time.time() - cookie_file.stat().st_mtime >= LOGIN_COOKIE_TTL:
+                cookie_file.unlink(missing_ok=True)
+                return False
+            cookies = json.loads(cookie_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+
+        try:
+            # Cookie はそのドメインのページを開いてからでないと追加できない
+            self.driver.get("https://meo-tools.com/agencies/sign_in")
+            for c in cookies:
+                self.driver.add_cookie(c)
+            self.driver.get("https://meo-tools.com/agencies/accounts?page=1")
+        except Exception as e:
+            print(f"[MEO] Cookie 復元エラー: {e}")
+            self.driver.delete_all_cookies()
+            return False
+
+        if "/agencies/sign_in" in self.driver.current_url:
+            # セッション切れ
+            self.driver.delete_all_cookies()
+            self._delete_login(email, password)
+            return False
+        return True
+
+    def _save_login(self, email: str, password: str):
+        """ログイン後の Cookie を保存（本人のみ読み書きできる権限で）"""
+        try:
+            LOGIN_COOKIE_DIR.mkdir(parents=True, exist_ok=True)
+            cookie_file = self._cookie_file(email, password)
+            tmp_file = cookie_file.with_suffix(f".{threading.get_ident()}.tmp")
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.driver.get_cookies(), f)
+            os.replace(tmp_file, cookie_file)
+        except OSError as e:
+            print(f"[MEO] Cookie 保存エラー: {e}")
+
+    def _delete_login(self, email: str, password: str):
+        """保存済み Cookie を削除"""
+        try:
+            self._cookie_file(email, password).unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def _login(self, email: str, password: str) -> bool:
+        """ログインフォームからログイン"""
         print(f"[MEO] ログイン中: {email}")
         self.driver.get("https://meo-tools.com/agencies/sign_in")
-        time.sleep(1)
+        self._wait_for(EC.presence_of_element_located(SEL_EMAIL_INPUT))
 
         try:
-            email_input = self.driver.find_element(By.CSS_SELECTOR, "input[type='email']")
+            email_input = self.driver.find_element(*SEL_EMAIL_INPUT)
             email_input.clear()
             email_input.send_keys(email)
 
-            password_input = self.driver.find_element(By.CSS_SELECTOR, "input[type='password']")
+            password_input = self.driver.find_element(*SEL_PASSWORD_INPUT)
             password_input.clear()
             password_input.send_keys(password)
 
-            submit_btn = self.driver.find_element(By.CSS_SELECTOR, "input[type='submit']")
+            submit_btn = self.driver.find_element(*SEL_SUBMIT_INPUT)
             submit_btn.click()
-            time.sleep(2)
+            self._wait_for(lambda d: "/agencies/sign_in" not in d.current_url)
 
             # ログイン成功確認
             if "/agencies/sign_in" in self.driver.current_url:
                 print(f"[MEO] ログイン失敗: {email}")
-                return
+                self._delete_login(email, password)
+                return False
 
             print(f"[MEO] ログイン成功: {email}")
 
         except Exception as e:
             print(f"[MEO] ログインエラー: {e}")
-            return
+            self._delete_login(email, password)
+            return False
 
-        # 店舗一覧を取得して処理
-        page = 1
-        while self.is_running_check():
-            print(f"[MEO] ページ {page} を処理中...")
-            self.driver.get(f"https://meo-tools.com/agencies/accounts?page={page}")
-            time.sleep(1)
+        if self.reuse_login:
+            self._save_login(email, password)
+        return True
+
+    def _process_listing(self, target_company: str):
+        """店舗一覧を取得して処理（一覧は Cookie を引き継いだ HTTP セッションで読む）"""
+        with self._create_http_session() as session:
+            page = 1
+            while self.is_running_check():
+                print(f"[MEO] ページ {page} を処理中...")
+                listing = self._fetch_listing(session, page)
+                if listing is None:
+                    # 表がサーバー側で描画されていなければブラウザで読む
+                    listing = self._read_listing_in_browser(page)
+                rows, has_next = listing
+
+                if not rows:
+                    print("[MEO] 店舗がありません")
+                    break
 
-            rows = self.driver.find_elements(By.CSS_SELECTOR, "table tbody tr")
-            if not rows:
-                print("[MEO] 店舗がありません")
-                break
+                # ターゲット会社でフィルタ（指定がある場合）
+                shops = [row for row in rows if not target_company or row["company"] == target_company]
 
-            shops = []
-            for row in rows:
-                try:
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    if len(cells) >= 5:
-                        shop_id = cells[0].text.strip()
-                        shop_name = cells[3].text.strip()
-                        company = cells[4].text.strip()
+                print(f"[MEO] このページの対象店舗数: {len(shops)}")
 
-                        # ターゲット会社でフィルタ（指定がある場合）
-                        if target_company and company != target_company:
-                            continue
+                for shop in shops:
+                    if not self.is_running_check():
+                        break
 
-                        shops.append({"id": shop_id, "name": shop_name, "company": company})
-                except:
-                    pass
-
-            print(f"[MEO] このページの対象店舗数: {len(shops)}")
+                    try:
+                        self._process_shop(shop, page)
+                    except Exception as e:
+                        print(f"[MEO] 店舗処理エラー: {e}")
 
-            for shop in shops:
-                if not self.is_running_check():
+                if has_next:
+                    page += 1
+                else:
                     break
 
-                try:
-                    self._process_shop(shop, page)
-                except Exception as e:
-                    print(f"[MEO] 店舗処理エラー: {e}")
-
-            # 次ページチェック
-            next_buttons = self.driver.find_elements(By.CSS_SELECTOR, "a.paginator-page")
-            has_next = False
-            for btn in next_buttons:
-                if btn.text.isdigit() and int(btn.text) == page + 1:
-                    has_next = True
-                    break
+    def _create_http_session(self) -> requests.Session:
+        """ログイン済みブラウザの Cookie・User-Agent を引き継いだセッションを作成"""
+        session = requests.Session()
+        session.headers["User-Agent"] = self.driver.execute_script("return navigator.userAgent")
+        for c in self.driver.get_cookies():
+            session.cookies.set(c["name"], c["value"], domain=c.get("domain", ""), path=c.get("path", "/"))
+        return session
 
-            if has_next:
-                page += 1
-            else:
-                break
-
-        # ログアウト
+    def _fetch_listing(self, session: requests.Session, page: int) -> Optional[Tuple[List[Dict[str, str]], bool]]:
+        """店舗一覧を HTTP で取得して (行, 次ページ有無) を返す（行が取れなければ None）"""
         try:
-            self.driver.get("https://meo-tools.com/agencies/sign_out")
-            time.sleep(1)
-        except:
-            pass
+            r = session.get(f"https://meo-tools.com/agencies/accounts?page={page}", timeout=15)
+        except requests.RequestException as e:
+            print(f"[MEO] 一覧ページ取得エラー: {e}")
+            return None
+        if r.status_code != 200 or "/agencies/sign_in" in r.url:
+            return None
+
+        root = lxml.html.document_fromstring(r.content, parser=HTML_PARSER)
+        rows = []
+        for tr in root.xpath("//table/tbody/tr"):
+            cells = tr.xpath("./td")
+            if len(cells) >= 5:
+                rows.append({
+                    "id": cells[0].text_content().strip(),
+                    "name": cells[3].text_content().strip(),
+                    "company": cells[4].text_content().strip(),
+                })
+        if not rows:
+            return None
+
+        next_label = str(page + 1)
+        has_next = any(a.text_content().strip() == next_label for a in root.xpath(PAGINATOR_XPATH))
+        return rows, has_next
+
+    def _read_listing_in_browser(self, page: int) -> Tuple[List[Dict[str, str]], bool]:
+        """店舗一覧をブラウザで読み込んで (行, 次ページ有無) を返す"""
+        self.driver.get(f"https://meo-tools.com/agencies/accounts?page={page}")
+        self._wait_for(EC.presence_of_element_located(SEL_TABLE_ROWS))
+        self._listing_ready = True
 
-        if self.progress_callback:
-            self.progress_callback(idx + 1, total)
+        # 行ごとのセル読み取りは1回のスクリプトでまとめて行う
+        rows = self.driver.execute_script(SHOP_ROWS_JS)
+
+        # 次ページチェック
+        has_next = False
+        for btn in self.driver.find_elements(*SEL_PAGINATOR):
+            if btn.text.isdigit() and int(btn.text) == page + 1:
+                has_next = True
+                break
+        return rows, has_next
 
     def _process_shop(self, shop: Dict[str, str], page: int):
         """1店舗のデータを取得"""
         print(f"[MEO] 店舗処理: {shop['name'][:30]}")
 
-        # 店舗一覧ページに戻る
-        self.driver.get(f"https://meo-tools.com/agencies/accounts?page={page}")
-        time.sleep(1)
-
-        # 対象店舗の行を再取得
-        rows = self.driver.find_elements(By.CSS_SELECTOR, "table tbody tr")
-        target_row = None
-        for row in rows:
-            try:
-                cells = row.find_elements(By.TAG_NAME, "td")
-                if len(cells) >= 5 and cells[0].text.strip() == shop["id"]:
-                    target_row = row
-                    break
-            except:
-                pass
+        # 店舗一覧ページに戻る（前の店舗の後も一覧がそのまま残っていれば読み込み直さない）
+        listing_url = f"https://meo-tools.com/agencies/accounts?page={page}"
+        if not self._listing_ready or self.driver.current_url != listing_url:
+            self.driver.get(listing_url)
+            self._wait_for(EC.presence_of_element_located(SEL_TABLE_ROWS))
 
-        if not target_row:
+        # 対象店舗の行とアクションボタンを1回のスクリプトで取得
+        found = self.driver.execute_script(SHOP_ACTION_BUTTON_JS, shop["id"])
+        if not found:
             print(f"[MEO] 店舗が見つかりません: {shop['name']}")
             return
 
-        # アクションボタンをクリック
+        # アクションボタンをクリック（以降はタブを閉じて戻るまで一覧の状態を保証しない）
+        self._listing_ready = False
         try:
-            action_btn = target_row.find_element(By.CSS_SELECTOR, "button[id^='radix-']")
-            action_btn.click()
-            time.sleep(0.3)
+            found["button"].click()
+            self._wait_for(EC.visibility_of_element_located(SEL_MENU_ITEM))
         except:
             print("[MEO] アクションボタンが見つかりません")
             return
 
         # ログインメニューを探す
-        menu_items = self.driver.find_elements(By.CSS_SELECTOR, "[role='menuitem']")
-        login_item = None
-
-        for item in menu_items:
-            item_text = item.text.strip().lower()
-            if any(d in item_text for d in self.DANGER_WORDS):
-                continue
-            if item.text.strip() == "ログイン":
-                login_item = item
-                break
-
+        login_item = self.driver.execute_script(LOGIN_MENU_ITEM_JS, self.DANGER_WORDS)
         if not login_item:
             print("[MEO] ログインメニューが見つかりません")
             return
@@ -249,7 +594,7 @@ class MeoCheckerScraper:
         original_window = self.driver.current_window_handle
         original_windows = self.driver.window_handles
         login_item.click()
-        time.sleep(1.5)
+        self._wait_for(EC.number_of_windows_to_be(len(original_windows) + 1))
 
         new_windows = self.driver.window_handles
         if len(new_windows) > len(original_windows):
@@ -258,13 +603,11 @@ class MeoCheckerScraper:
                     self.driver.switch_to.window(handle)
                     break
 
-        time.sleep(1.5)
+        self._wait_for(EC.url_contains("/users"))
 
         if "/users" not in self.driver.current_url:
             print("[MEO] ダッシュボードではありません")
-            if len(self.driver.window_handles) > 1:
-                self.driver.close()
-                self.driver.switch_to.window(self.driver.window_handles[0])
+            self._close_dashboard_tab()
             return
 
         # ダッシュボードURL保存
@@ -283,11 +626,8 @@ class MeoCheckerScraper:
         # ダッシュボードに戻る
         if "/users" not in self.driver.current_url or "/reports" in self.driver.current_url or "/keywords" in self.driver.current_url:
             self.driver.get(dashboard_url)
-            time.sleep(3)
 
-        dashboard_data = self._get_dashboard_data()
-        insights = self._get_insight_data()
-        review_stats = self._get_review_stats()
+        dashboard_data, insights, review_stats = self._get_dashboard_page_data()
         keywords = self._get_keyword_rankings()
 
         # 結果を整形
@@ -300,24 +640,28 @@ class MeoCheckerScraper:
         print(f"[MEO] 完了: スコア={result.get('totalScore', '-')}")
 
         # タブを閉じて戻る
+        self._close_dashboard_tab()
+
+    def _close_dashboard_tab(self):
+        """ダッシュボードのタブを閉じて一覧のタブに戻る（別タブで開いていた場合は一覧がそのまま残っている）"""
         if len(self.driver.window_handles) > 1:
             self.driver.close()
             self.driver.switch_to.window(self.driver.window_handles[0])
+            self._listing_ready = True
 
     def _run_diagnosis(self, dashboard_url: str) -> bool:
         """診断レポートを生成して完了を待つ"""
         try:
             print("[MEO] 診断結果ページへ移動...")
-            reports_link = self.driver.find_element(By.CSS_SELECTOR, "a[href='/users/reports']")
+            reports_link = self.driver.find_element(*SEL_REPORTS_LINK)
             reports_link.click()
-            time.sleep(1.5)
 
             print("[MEO] 新しい診断を実行...")
-            run_btn = self.driver.find_element(By.XPATH, "//button[contains(., '新しい診断を実行')]")
+            run_btn = self.wait.until(EC.element_to_be_clickable(SEL_RUN_DIAGNOSIS_BUTTON))
             run_btn.click()
 
             print("[MEO] 診断完了を待機中...（最大90秒）")
-            popup_wait = WebDriverWait(self.driver, 90)
+            popup_wait = WebDriverWait(self.driver, 90, poll_frequency=WAIT_POLL_SECONDS)
 
             try:
                 alert = popup_wait.until(EC.alert_is_present())
@@ -326,9 +670,7 @@ class MeoCheckerScraper:
                 alert.accept()
             except:
                 try:
-                    ok_btn = popup_wait.until(EC.element_to_be_clickable((
-                        By.XPATH, "//button[text()='OK' or text()='ok' or text()='Ok']"
-                    )))
+                    ok_btn = popup_wait.until(EC.element_to_be_clickable(SEL_OK_BUTTON))
                     print("[MEO] ✓ 診断完了!")
                     ok_btn.click()
                 except:
@@ -338,91 +680,48 @@ class MeoCheckerScraper:
 
             print("[MEO] ダッシュボードに戻る...")
             self.driver.get(dashboard_url)
-            time.sleep(3)
 
             return True
 
         except Exception as e:
             print(f"[MEO] ❌ 診断実行失敗: {e}")
             self.driver.get(dashboard_url)
-            time.sleep(3)
             return False
 
-    def _get_dashboard_data(self) -> Dict[str, Any]:
-        """ダッシュボードからJSONデータを取得"""
+    def _get_dashboard_page_data(self) -> Tuple[Dict[str, Any], Dict[str, str], Dict[str, str]]:
+        """ダッシュボードの JSON・インサイト数値・口コミ統計を1回のスクリプトで取得"""
         try:
-            dashboard_wait = WebDriverWait(self.driver, 10)
-            dashboard_el = dashboard_wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "[data-react-component='Dashboard']"))
-            )
-            props_json = dashboard_el.get_attribute("data-react-props")
-            return json.loads(props_json)
+            dashboard_wait = WebDriverWait(self.driver, 10, poll_frequency=WAIT_POLL_SECONDS)
+            dashboard_wait.until(EC.presence_of_element_located(SEL_DASHBOARD))
         except Exception as e:
             print(f"[MEO] ダッシュボードデータ取得失敗: {e}")
-            return {}
+        # カードは React で描画されるので、現れるまで待つ
+        self._wait_for(EC.presence_of_element_located(SEL_INSIGHT_CARDS))
+        self._wait_for(EC.presence_of_element_located(SEL_REVIEW_TITLES))
 
-    def _get_insight_data(self) -> Dict[str, str]:
-        """HTMLからインサイト数値を取得"""
-        insights = {}
         try:
-            insight_cards = self.driver.find_elements(By.CSS_SELECTOR, ".grid .bg-white.border.rounded-lg.p-4")
-            for card in insight_cards:
-                try:
-                    label = card.find_element(By.CSS_SELECTOR, "h3").text.strip()
-                    value = card.find_element(By.CSS_SELECTOR, "p.text-2xl").text.strip()
-                    insights[label] = value
-                except:
-                    pass
-        except:
-            pass
+            found = self.driver.execute_script(DASHBOARD_PAGE_JS, ["口コミ合計", "返信済", "未返信"]) or {}
+        except Exception as e:
+            print(f"[MEO] ダッシュボードデータ取得失敗: {e}")
+            found = {}
 
+        dashboard_data = found.get("dashboard") or {}
+        insights = found.get("insights") or {}
         print(f"[MEO] インサイト: {insights}")
-        return insights
-
-    def _get_review_stats(self) -> Dict[str, str]:
-        """口コミ統計を取得"""
-        stats = {}
-        time.sleep(1)
-
-        # h3タイトルから親カードを辿る
-        try:
-            all_h3 = self.driver.find_elements(By.CSS_SELECTOR, "h3.tracking-tight")
-            for h3 in all_h3:
-                title = h3.text.strip()
-                if title in ["口コミ合計", "返信済", "未返信"]:
-                    try:
-                        card = h3.find_element(By.XPATH, "./ancestor::div[contains(@class, 'rounded-lg')]")
-                        value_el = card.find_element(By.CSS_SELECTOR, ".text-2xl.font-bold")
-                        value = value_el.text.strip().replace("件", "")
-                        stats[title] = value
-                    except:
-                        pass
-        except:
-            pass
-
-        # 口コミ増加数の推移
-        try:
-            increase_cards = self.driver.find_elements(By.CSS_SELECTOR, ".grid.grid-cols-3.gap-4 > div.bg-white.border.rounded-lg.p-4")
-            for card in increase_cards:
-                try:
-                    label_el = card.find_element(By.CSS_SELECTOR, "h3.text-sm.font-medium.text-gray-600")
-                    label = label_el.text.strip()
-                    value_el = card.find_element(By.CSS_SELECTOR, "p.text-2xl.font-bold")
-                    value = value_el.text.strip()
-
-                    if "1ヶ月" in label:
-                        stats["1ヶ月増加"] = value
-                    elif "6ヶ月" in label:
-                        stats["6ヶ月増加"] = value
-                    elif "12ヶ月" in label:
-                        stats["12ヶ月増加"] = value
-                except:
-                    pass
-        except:
-            pass
 
+        # 口コミ合計・返信済・未返信と、口コミ増加数の推移
+        reviews = found.get("reviews") or {}
+        stats = dict(reviews.get("totals") or {})
+        for label, value in reviews.get("increases") or []:
+            if "1ヶ月" in label:
+                stats["1ヶ月増加"] = value
+            elif "6ヶ月" in label:
+                stats["6ヶ月増加"] = value
+            elif "12ヶ月" in label:
+                stats["12ヶ月増加"] = value
         print(f"[MEO] 口コミ: {stats}")
-        return stats
+
+        return dashboard_data, insights, stats
 
     def _get_keyword_rankings(self) -> List[Dict[str, str]]:
         """キーワードランキングを取得（ONのもののみ、最大5つ）"""
@@ -430,48 +729,19 @@ class MeoCheckerScraper:
         seen_keywords = set()
 
         try:
-            keyword_link = self.driver.find_element(
-                By.XPATH, "//span[contains(text(), 'キーワードランキング')]/ancestor::a"
-            )
+            keyword_link = self.driver.find_element(*SEL_KEYWORD_RANKING_LINK)
             keyword_link.click()
-            time.sleep(1.5)
+            self._wait_for(EC.url_contains("/keywords"))
+            self._wait_for(EC.presence_of_element_located(SEL_TABLE_ROWS))
 
-            rows = self.driver.find_elements(By.CSS_SELECTOR, "table tbody tr")
-
-            for row in rows:
+            # ON の行のキーワード・順位は1回のスクリプトでまとめて取得
+            for keyword, rank in self.driver.execute_script(KEYWORD_ROWS_JS):
                 if len(keywords) >= 5:
                     break
-
-                try:
-                    switches = row.find_elements(
-                        By.CSS_SELECTOR, "button[role='switch'][data-state='checked']"
-                    )
-                    if not switches:
-                        continue
-
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    if len(cells) < 2:
-                        continue
-
-                    keyword_divs = cells[0].find_elements(By.CSS_SELECTOR, "div > div:first-child")
-                    if not keyword_divs:
-                        continue
-                    keyword = keyword_divs[0].text.strip()
-
-                    if keyword in seen_keywords:
-                        continue
-                    seen_keywords.add(keyword)
-
-                    rank_spans = cells[1].find_elements(By.CSS_SELECTOR, "div > span:first-child")
-                    if rank_spans:
-                        rank = rank_spans[0].text.strip()
-                    else:
-                        rank = cells[1].text.strip().split()[0] if cells[1].text.strip() else ""
-
-                    keywords.append({"keyword": keyword, "rank": rank})
-
-                except:
+                if keyword in seen_keywords:
                     continue
+                seen_keywords.add(keyword)
+                keywords.append({"keyword": keyword, "rank": rank})
 
             print(f"[MEO] キーワード: {len(keywords)}件")
 
@@ -513,37 +783,10 @@ class MeoCheckerScraper:
             "reviews": category_scores.get("reviews", 0),
 
             # 診断項目詳細
-            "reportItems": {
-                "ビジネス名": "○" if report_items.get("ビジネス名") else "×",
-                "メインカテゴリ": "○" if report_items.get("メインカテゴリ") else "×",
-                "ビジネスの説明": "○" if report_items.get("ビジネスの説明") else "×",
-                "開業日": "○" if report_items.get("開業日") else "×",
-                "住所": "○" if report_items.get("住所") else "×",
-                "営業時間設定": "○" if report_items.get("営業時間設定") else "×",
-                "営業時間正確性": "○" if report_items.get("営業時間正確性") else "×",
-                "メニュー、サービス": "○" if report_items.get("メニュー、サービス") else "×",
-                "店舗HP URL": "○" if report_items.get("店舗HP URL") else "×",
-                "電話番号": "○" if report_items.get("電話番号") else "×",
-                "投稿頻度": "○" if report_items.get("投稿頻度") else "×",
-                "写真投稿数": "○" if report_items.get("写真投稿数") else "×",
-                "写真の投稿頻度": "○" if report_items.get("写真の投稿頻度") else "×",
-                "ロゴ&カバー写真": "○" if report_items.get("ロゴ&カバー写真") else "×",
-                "平均評価": "○" if report_items.get("平均評価") else "×",
-                "クチコミ投稿件数": "○" if report_items.get("クチコミ投稿件数") else "×",
-                "クチコミ返信率": "○" if report_items.get("クチコミ返信率") else "×",
-            },
+            "reportItems": {k: "○" if report_items.get(k) else "×" for k in REPORT_ITEM_KEYS},
 
             # インサイト
-            "insights": {
-                "表示回数": insights.get("表示回数", ""),
-                "モバイル": insights.get("モバイル", ""),
-                "PC": insights.get("PC", ""),
-                "平均クリック率": insights.get("平均クリック率", ""),
-                "電話クリック数": insights.get("電話クリック数", ""),
-                "ルート検索回数": insights.get("ルート検索回数", ""),
-                "ウェブサイトクリック数": insights.get("ウェブサイトクリック数", ""),
-                "メニュークリック数": insights.get("メニュークリック数", ""),
-            },
+            "insights": {k: insights.get(k, "") for k in INSIGHT_KEYS},
 
             # 口コミ統計
             "reviewTotal": review_stats.get("口コミ合計", ""),
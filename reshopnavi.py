@@ -3,22 +3,83 @@
 ID総当り方式でリフォーム会社情報を収集
 ※ Seleniumは不要、HTTPリクエストのみ
 """
+import json
+import os
+import re
+import tempfile
+import threading
 import time
-import random
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Callable, Optional
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+
+try:
+    from ._http_utils import RateLimiter, retry_after_seconds
+except ImportError:
+    # 更新ディレクトリから単体モジュールとして読み込まれた場合
+    from scraper._http_utils import RateLimiter, retry_after_seconds
 
 
 BASE_URL = "https://rehome-navi.com"
 HEADERS = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"}
 
+# 並列取得のワーカー数（filters["max_workers"] で上書き可）
+DEFAULT_MAX_WORKERS = 4
+# 1度にワーカーへ投入するID数（停止リクエストへの応答性とメモリを抑える）
+ID_CHUNK_SIZE = 100
+
+# サイト全体へのリクエストレート（filters["requests_per_second"] で上書き可、並列化してもこの速度を超えない）
+REQUESTS_PER_SECOND = 2.5
+REQUEST_BURST = 1
+
+# 429・5xx を受けたときに全ワーカーを止める秒数（Retry-After が秒数で返ればそちらを優先）
+ERROR_BACKOFF_SECONDS = 30
+
+# 404 だった ID のディスクキャッシュ（期限内の再実行ではリクエストしない、filters["use_cache"]=False で無効化）
+MISSING_ID_CACHE_FILE = Path(tempfile.gettempdir()) / "silas-worker" / "reshopnavi_missing_ids.json"
+MISSING_ID_CACHE_TTL = 7 * 24 * 60 * 60  # 秒
+
+# output_path 指定時は結果を NDJSON でも追記し、この件数ごとにフラッシュする
+OUTPUT_FLUSH_EVERY = 100
+
+# 店舗ページなら必ず含まれる dl（チャレンジページ等はデコード・パース前に弾く）
+SHOP_PAGE_SIGNATURE = b"<dl"
+
+# 店舗ページは項目（dl）と会社名の候補（h2）だけを木に組み立てる
+SHOP_STRAINER = SoupStrainer(["dl", "h2"])
+
+# dt の項目名に含まれる文字列 → 保存先キー
+LABEL_FIELDS = {
+    "会社名": "company_name",
+    "電話番号": "phone",
+    "住所": "address",
+    "資本金": "capital",
+    "代表者名": "representative",
+    "会社HP": "website",
+}
+
+# 正規表現はモジュール読み込み時にコンパイル
+LABEL_RE = re.compile("|".join(LABEL_FIELDS))
+COMPANY_SUFFIX_RE = re.compile(r"株式会社|有限会社|合同会社")
+
 # デフォルトID範囲
 DEFAULT_START_ID = 1
 DEFAULT_END_ID = 9500
 
 
+def _create_session() -> requests.Session:
+    """Keep-Alive・コネクションプール付きのセッションを作成（429・5xx は _scrape_shop で全ワーカーを待機させる）"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=32, max_retries=0)
+    session.mount("https://", adapter)
+    return session
+
+
 class ReshopnaviScraper:
     """リショップナビからID総当りでリフォーム会社情報を収集"""
 
@@ -27,16 +88,24 @@ class ReshopnaviScraper:
         progress_callback: Optional[Callable[[int, int], None]] = None,
         result_callback: Optional[Callable[[dict], None]] = None,
         is_running_check: Optional[Callable[[], bool]] = None,
+        output_path: Optional[str] = None,
     ):
         self.progress_callback = progress_callback
         self.result_callback = result_callback
         self.is_running_check = is_running_check or (lambda: True)
+        self.output_path = output_path  # 結果の NDJSON 出力先（スタンドアロン実行用、タスクの filters からは指定できない）
         self.result_count = 0
+        self._backoff_lock = threading.Lock()
+        self._resume_at = 0.0
+        self._missing_ids: set = set()
+        self._rate_limiter = RateLimiter(REQUESTS_PER_SECOND, REQUEST_BURST)
+        self.session = _create_session()
 
     def run(self, filters: dict = None) -> int:
         """スクレイピングを実行"""
         filters = filters or {}
         self.result_count = 0
+        self._resume_at = 0.0
 
         start_id = filters.get("start_id", DEFAULT_START_ID)
         end_id = filters.get("end_id", DEFAULT_END_ID)
@@ -44,96 +113,165 @@ class ReshopnaviScraper:
 
         print(f"[Reshopnavi] ID範囲: {start_id} - {end_id} ({total}件)")
 
-        retry_count = 0
+        max_workers = int(filters.get("max_workers") or DEFAULT_MAX_WORKERS)
+        rate = float(filters.get("requests_per_second") or REQUESTS_PER_SECOND)
+        self._rate_limiter = RateLimiter(rate, REQUEST_BURST)
+        use_cache = filters.get("use_cache", True)
+        if use_cache:
+            self._missing_ids, missing_since = self._load_missing_ids()
+        else:
+            self._missing_ids, missing_since = set(), time.time()
+        skip_ids = frozenset(self._missing_ids)
+        if skip_ids:
+            print(f"[Reshopnavi] 前回404だったID {len(skip_ids)}件をスキップ")
+        stopped = False
 
-        for shop_id in range(start_id, end_id + 1):
-            if not self.is_running_check():
-                print("[Reshopnavi] 停止リクエスト受信")
-                break
+        # 出力先があれば結果をファイルへ1行ずつ書き出す（result_callback にも渡す）
+        output_file = open(self.output_path, "a", encoding="utf-8") if self.output_path else None
 
-            result = self._scrape_shop(shop_id)
-
-            if result == "retry":
-                retry_count += 1
-                if retry_count >= 3:
-                    print(f"[Reshopnavi] Rate limited at {shop_id}, waiting 30s...")
-                    time.sleep(30)
-                    retry_count = 0
-                continue
+        try:
+            # ID単位の取得はワーカーで並列実行し、結果はID順にこのスレッドで処理する
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                for chunk_start in range(start_id, end_id + 1, ID_CHUNK_SIZE):
+                    if stopped or not self.is_running_check():
+                        print("[Reshopnavi] 停止リクエスト受信")
+                        break
 
-            retry_count = 0
+                    chunk_ids = [
+                        i for i in range(chunk_start, min(chunk_start + ID_CHUNK_SIZE, end_id + 1))
+                        if i not in skip_ids
+                    ]
+                    for shop_id, result in zip(chunk_ids, pool.map(self._scrape_shop, chunk_ids)):
+                        if not self.is_running_check():
+                            stopped = True
+                            break
 
-            if result:
-                self.result_count += 1
-                if self.result_callback:
-                    self.result_callback(result)
-                if self.progress_callback:
-                    self.progress_callback(self.result_count, total)
-                print(f"[Reshopnavi] [{shop_id}] ✓ {result.get('company_name', '')[:30]}")
+                        if result:
+                            self.result_count += 1
+                            if output_file:
+                                output_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+                                if self.result_count % OUTPUT_FLUSH_EVERY == 0:
+                                    output_file.flush()
+                            if self.result_callback:
+                                self.result_callback(result)
+                            if self.progress_callback:
+                                self.progress_callback(self.result_count, total)
+                            print(f"[Reshopnavi] [{shop_id}] ✓ {result.get('company_name', '')[:30]}")
 
-            # リクエスト間隔
-            time.sleep(random.uniform(0.3, 0.6))
+                        # 進捗報告（500件ごと）
+                        if shop_id % 500 == 0:
+                            print(f"[Reshopnavi] Progress: {shop_id}/{end_id} ({self.result_count}件取得)")
+        finally:
+            self.session.close()
+            if output_file:
+                output_file.close()
 
-            # 進捗報告（500件ごと）
-            if shop_id % 500 == 0:
-                print(f"[Reshopnavi] Progress: {shop_id}/{end_id} ({self.result_count}件取得)")
+        if use_cache:
+            self._save_missing_ids(missing_since)
 
         print(f"[Reshopnavi] 完了: {self.result_count}件取得")
         return self.result_count
 
     def _scrape_shop(self, shop_id: int) -> Optional[dict]:
-        """個別店舗ページをスクレイピング"""
+        """個別店舗ページをスクレイピング（ワーカースレッドで実行）"""
+        if not self.is_running_check():
+            return None
+        self._wait_for_resume()
+        # リクエスト間隔（全ワーカー共通のレート）
+        self._rate_limiter.acquire()
+        if not self.is_running_check():
+            return None
+
         url = f"{BASE_URL}/shops/{shop_id}"
 
         try:
-            r = requests.get(url, headers=HEADERS, timeout=15)
+            r = self.session.get(url, timeout=15)
 
             if r.status_code == 404:
+                self._missing_ids.add(shop_id)
+                return None
+            if r.status_code == 429 or r.status_code >= 500:
+                # 投入済みのIDも含めて全ワーカーを止める
+                backoff = retry_after_seconds(r.headers.get("Retry-After"))
+                if backoff is None:
+                    backoff = ERROR_BACKOFF_SECONDS
+                print(f"[Reshopnavi] Rate limited at {shop_id} ({r.status_code}), waiting {backoff:g}s...")
+                self._pause(backoff)
                 return None
             if r.status_code != 200:
-                return "retry"
+                return None
 
+            # 店舗ページでなければ本文をデコードせずに終了
+            if SHOP_PAGE_SIGNATURE not in r.content:
+                return None
             if "会社名" not in r.text:
                 return None
 
-            soup = BeautifulSoup(r.text, "html.parser")
+            soup = BeautifulSoup(r.text, "lxml", parse_only=SHOP_STRAINER)
             data = {"shop_id": shop_id, "url": url}
 
-            for dl in soup.find_all("dl"):
-                for dt in dl.find_all("dt"):
-                    dd = dt.find_next("dd")
-                    if not dd:
-                        continue
-
-                    label = dt.get_text(strip=True)
-                    value = dd.get_text(strip=True)
-
-                    if "会社名" in label:
-                        data["company_name"] = value
-                    elif "電話番号" in label:
-                        data["phone"] = value
-                    elif "住所" in label:
-                        data["address"] = value
-                    elif "資本金" in label:
-                        data["capital"] = value
-                    elif "代表者名" in label:
-                        data["representative"] = value
-                    elif "会社HP" in label:
-                        link = dd.find("a")
-                        data["website"] = link.get("href", "") if link else value
+            # dt を1回の走査で見て、対象項目のときだけ直後の dd を取る
+            for dt in soup.find_all("dt"):
+                m = LABEL_RE.search(dt.get_text(strip=True))
+                if not m:
+                    continue
+                dd = dt.find_next_sibling("dd")
+                if not dd:
+                    continue
+                field = LABEL_FIELDS[m.group()]
+
+                value = dd.get_text(strip=True)
+                if field == "website":
+                    link = dd.find("a")
+                    data["website"] = link.get("href", "") if link else value
+                else:
+                    data[field] = value
 
             # 会社名がなければh2から取得
             if not data.get("company_name"):
                 for h2 in soup.find_all("h2"):
                     text = h2.get_text(strip=True)
-                    if "株式会社" in text or "有限会社" in text or "合同会社" in text:
+                    if COMPANY_SUFFIX_RE.search(text):
                         data["company_name"] = text
                         break
 
             return data if data.get("company_name") else None
 
         except requests.exceptions.Timeout:
-            return "retry"
+            return None
         except Exception as e:
             print(f"[Reshopnavi] Error at {shop_id}: {e}")
             return None
+
+    def _load_missing_ids(self):
+        """期限内の 404 ID キャッシュを (ID集合, 最初の保存時刻) で返す（なければ空）"""
+        try:
+            cached = json.loads(MISSING_ID_CACHE_FILE.read_text(encoding="utf-8"))
+            if time.time() - cached["since"] < MISSING_ID_CACHE_TTL:
+                return set(cached["ids"]), cached["since"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return set(), time.time()
+
+    def _save_missing_ids(self, since: float):
+        """404 ID キャッシュを保存（最初の保存時刻を引き継ぎ、期限切れで全IDを取り直す）"""
+        try:
+            MISSING_ID_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = MISSING_ID_CACHE_FILE.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_file.write_text(json.dumps({"since": since, "ids": sorted(self._missing_ids)}), encoding="utf-8")
+            os.replace(tmp_file, MISSING_ID_CACHE_FILE)
+        except OSError as e:
+            print(f"[Reshopnavi] キャッシュ書き込みエラー: {e}")
+
+    def _pause(self, seconds: float):
+        """全ワーカーのリクエストを seconds 秒止める（既により長い待機中ならそのまま）"""
+        with self._backoff_lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def _wait_for_resume(self):
+        """バックオフ中なら再開時刻まで待つ（停止リクエストには即応する）"""
+        while self.is_running_check():
+            delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(min(delay, 1.0))
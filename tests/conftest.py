@@ -0,0 +1,17 @@
+"""テスト共通設定: リポジトリ直下を本番と同じ ``scraper`` パッケージとして import できるようにする."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+if "scraper" not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        "scraper", ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+    )
+    _package = importlib.util.module_from_spec(_spec)
+    sys.modules["scraper"] = _package
+    _spec.loader.exec_module(_package)
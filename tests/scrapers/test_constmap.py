@@ -0,0 +1,95 @@
+"""constmap（一覧ページの詳細URL抽出・詳細ページのパース）のフィクスチャテスト."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from scraper.constmap import ConstmapScraper, _detail_region, _extract_detail_urls
+
+FIXTURES = Path(__file__).parent / "fixtures"
+BASE_URL = "https://sumitec-kansai.com"
+
+
+def _response(body: bytes, chunk_size: int) -> MagicMock:
+    r = MagicMock()
+    r.sent = []
+
+    def iter_content(size):
+        for i in range(0, len(body), chunk_size):
+            r.sent.append(body[i:i + chunk_size])
+            yield r.sent[-1]
+
+    r.iter_content.side_effect = iter_content
+    return r
+
+
+@pytest.fixture
+def listing() -> bytes:
+    return (FIXTURES / "constmap_list.html").read_bytes()
+
+
+@pytest.mark.parametrize("chunk_size", [65536, 128])
+def test_extract_detail_urls_dedups_in_page_order(listing, chunk_size) -> None:
+    urls, _ = _extract_detail_urls(_response(listing, chunk_size), BASE_URL)
+    # 相対URLは base_url を付けて絶対URLの同一リンクと重複排除し、初出順を保つ
+    # 業者ID以外（エリア・一覧・#付き）とフッター内のリンクは含めない
+    assert urls == [
+        f"{BASE_URL}/contractor/1520",
+        f"{BASE_URL}/contractor/1488/",
+        f"{BASE_URL}/contractor/903",
+        f"{BASE_URL}/contractor/2001",
+    ]
+
+
+def test_extract_detail_urls_stops_reading_at_footer(listing) -> None:
+    r = _response(listing, 128)
+    _, digest = _extract_detail_urls(r, BASE_URL)
+
+    read = b"".join(r.sent)
+    assert b"<footer" in read
+    assert len(read) < len(listing)
+    # ページの同一判定用ハッシュは読み込んだ分だけから作る
+    assert digest == _extract_detail_urls(_response(read, 128), BASE_URL)[1]
+
+
+def test_extract_detail_urls_digest_changes_with_listing(listing) -> None:
+    _, digest = _extract_detail_urls(_response(listing, 65536), BASE_URL)
+    changed = listing.replace(b"/contractor/2001", b"/contractor/2002")
+    urls, changed_digest = _extract_detail_urls(_response(changed, 65536), BASE_URL)
+    assert urls[-1] == f"{BASE_URL}/contractor/2002"
+    assert changed_digest != digest
+
+
+@pytest.fixture
+def detail() -> bytes:
+    return (FIXTURES / "constmap_detail.html").read_bytes()
+
+
+def test_detail_region_starts_at_company_name(detail) -> None:
+    region = _detail_region(detail)
+    assert region.startswith(b'<h2 class="h mainTxt">')
+    assert region.endswith(b"</table>")
+    assert "注目の住宅会社".encode("utf-8") not in region
+
+
+def test_detail_region_without_company_name_is_whole_page(detail) -> None:
+    html = detail.replace(b'class="h mainTxt"', b'class="h"')
+    assert _detail_region(html) == html
+
+
+def test_parse_detail(detail) -> None:
+    assert ConstmapScraper._parse_detail(detail) == {
+        "company_name": "株式会社なにわホーム",
+        # テキストノードごとに strip して連結する（BeautifulSoup の get_text(strip=True) と同じ）
+        "address": "大阪府大阪市中央区本町2-3-4なにわビル5F",
+        "phone": "06-6123-4567",
+        "website": "https://naniwa-home.example.jp/",
+    }
+
+
+def test_parse_detail_without_company_name(detail) -> None:
+    html = detail.replace("株式会社なにわホーム<".encode("utf-8"), b"<")
+    assert ConstmapScraper._parse_detail(html) is None
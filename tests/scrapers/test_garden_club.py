@@ -0,0 +1,85 @@
+"""garden_club（一覧ページの逐次パース）のフィクスチャテスト."""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Optional
+from unittest.mock import MagicMock
+
+import pytest
+from bs4 import BeautifulSoup
+
+from scraper.garden_club import BASE_URL, _parse_listing
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _response(body: bytes, chunk_size: int) -> MagicMock:
+    r = MagicMock()
+    r.iter_content.side_effect = lambda size: (body[i:i + chunk_size] for i in range(0, len(body), chunk_size))
+    return r
+
+
+def _baseline_parse_listing(html: str) -> tuple:
+    """書き換え前の実装（BeautifulSoup で全体をパースしてから店舗リンクと次ページURLを探す）"""
+    soup = BeautifulSoup(html, "html.parser")
+
+    shops = []
+    seen = set()
+    list_table = soup.find("table", id="list") or soup.find("table", class_="body")
+    if list_table:
+        for a in list_table.find_all("a", href=True):
+            href = a["href"]
+            text = a.get_text(strip=True)
+            if href.startswith("./") and href.endswith(".html") and text:
+                if re.match(r"^\d+\.html$", href[2:]):
+                    full_url = BASE_URL + href[2:]
+                    if full_url not in seen:
+                        seen.add(full_url)
+                        shops.append((text, full_url))
+
+    next_url: Optional[str] = None
+    for a in soup.find_all("a", href=True):
+        text = a.get_text(strip=True)
+        if "次の" in text or text == "次へ":
+            href = a["href"]
+            if href.startswith("?"):
+                next_url = BASE_URL + "list.php" + href
+            elif href.startswith("./"):
+                next_url = BASE_URL + href[2:]
+            elif not href.startswith("http"):
+                next_url = BASE_URL + href
+            else:
+                next_url = href
+            break
+    return shops, next_url
+
+
+@pytest.fixture
+def listing() -> bytes:
+    return (FIXTURES / "garden_club_list.html").read_bytes()
+
+
+@pytest.mark.parametrize("chunk_size", [65536, 97])
+def test_parse_listing_matches_baseline(listing, chunk_size) -> None:
+    assert _parse_listing(_response(listing, chunk_size)) == _baseline_parse_listing(listing.decode("utf-8"))
+
+
+def test_parse_listing_fixture(listing) -> None:
+    shops, next_url = _parse_listing(_response(listing, 65536))
+    assert shops == [
+        ("株式会社グリーンテラス", BASE_URL + "1203.html"),
+        ("エクステリア山田", BASE_URL + "1187.html"),
+        ("庭工房 さくら", BASE_URL + "988.html"),
+        ("有限会社ガーデンライフ", BASE_URL + "1502.html"),
+    ]
+    assert next_url == BASE_URL + "list.php?key=%E6%9D%B1%E4%BA%AC%E9%83%BD&page=2"
+
+
+def test_parse_listing_last_page_has_no_next_url(listing) -> None:
+    last_page = re.sub(rb'<div class="pager">.*?</div>', b"", listing, flags=re.S)
+    last_page = last_page.replace("次のエリア".encode("utf-8"), "神奈川県".encode("utf-8"))
+    shops, next_url = _parse_listing(_response(last_page, 65536))
+    assert len(shops) == 4
+    assert next_url is None
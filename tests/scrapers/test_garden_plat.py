@@ -0,0 +1,41 @@
+"""garden_plat（欠番IDキャッシュ）のユニットテスト."""
+
+from __future__ import annotations
+
+import pytest
+
+from scraper import garden_plat
+from scraper.garden_plat import GardenplatScraper
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "garden_plat"
+    monkeypatch.setattr(garden_plat, "CACHE_DIR", cache_dir)
+    monkeypatch.setattr(garden_plat, "DEAD_IDS_DB", cache_dir / "dead_ids.sqlite3")
+    return cache_dir
+
+
+def test_load_dead_ids_without_cache_dir_is_empty(cache_dir, capsys) -> None:
+    assert GardenplatScraper._load_dead_ids() == frozenset()
+    assert "欠番ID読み込みエラー" not in capsys.readouterr().out
+    assert not cache_dir.exists()
+
+
+def test_dead_ids_round_trip(cache_dir) -> None:
+    scraper = GardenplatScraper()
+    scraper._new_dead_ids = [3, 5, 3]
+    scraper._save_dead_ids()
+
+    assert scraper._new_dead_ids == []
+    assert GardenplatScraper._load_dead_ids() == frozenset({3, 5})
+
+
+def test_expired_dead_ids_are_rechecked(cache_dir, monkeypatch) -> None:
+    scraper = GardenplatScraper()
+    scraper._new_dead_ids = [7]
+    scraper._save_dead_ids()
+
+    now = garden_plat.time.time()
+    monkeypatch.setattr(garden_plat.time, "time", lambda: now + garden_plat.CACHE_TTL + 1)
+    assert GardenplatScraper._load_dead_ids() == frozenset()
@@ -0,0 +1,54 @@
+"""ieto（ビルダーページの SNS リンク抽出）のフィクスチャテスト."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from scraper.ieto import IetoScraper
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture
+def soup() -> BeautifulSoup:
+    html = (FIXTURES / "ieto_builder_sns.html").read_text(encoding="utf-8")
+    return BeautifulSoup(html, "lxml")
+
+
+def _baseline_extract_sns(soup: BeautifulSoup) -> dict:
+    """書き換え前の実装（前から順に見て後のリンクで上書きする）"""
+    sns = {"instagram": "", "facebook": "", "x": "", "line": ""}
+    sns_area = soup.select_one(".builder--info-sns")
+    if sns_area:
+        for a in sns_area.find_all("a"):
+            link = a.get("href", "")
+            if "instagram" in link:
+                sns["instagram"] = link
+            elif "facebook" in link:
+                sns["facebook"] = link
+            elif "x.com" in link:
+                sns["x"] = link
+            elif "line.me" in link:
+                sns["line"] = link
+    return sns
+
+
+def test_extract_sns_last_link_wins(soup) -> None:
+    assert IetoScraper()._extract_sns(soup) == {
+        "instagram": "https://www.instagram.com/sample_home/",
+        "facebook": "https://www.facebook.com/samplehome",
+        "x": "https://x.com/sample_home",
+        "line": "https://line.me/R/ti/p/@samplehome",
+    }
+
+
+def test_extract_sns_matches_baseline(soup) -> None:
+    assert IetoScraper()._extract_sns(soup) == _baseline_extract_sns(soup)
+
+
+def test_extract_sns_without_sns_area() -> None:
+    soup = BeautifulSoup('<a href="https://x.com/ieto_official">X</a>', "lxml")
+    assert IetoScraper()._extract_sns(soup) == {"instagram": "", "facebook": "", "x": "", "line": ""}
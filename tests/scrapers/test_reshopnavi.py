@@ -0,0 +1,97 @@
+"""reshopnavi（店舗ページの dt/dd 抽出）のフィクスチャテスト."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from bs4 import BeautifulSoup
+
+from scraper.reshopnavi import BASE_URL, ReshopnaviScraper
+
+FIXTURES = Path(__file__).parent / "fixtures"
+SHOP_ID = 1234
+
+
+def _baseline_parse_shop(html: str, shop_id: int) -> dict:
+    """書き換え前の実装（全 dl の dt を if/elif で振り分け、find_next で dd を取る）"""
+    soup = BeautifulSoup(html, "html.parser")
+    data = {"shop_id": shop_id, "url": f"{BASE_URL}/shops/{shop_id}"}
+
+    for dl in soup.find_all("dl"):
+        for dt in dl.find_all("dt"):
+            dd = dt.find_next("dd")
+            if not dd:
+                continue
+
+            label = dt.get_text(strip=True)
+            value = dd.get_text(strip=True)
+
+            if "会社名" in label:
+                data["company_name"] = value
+            elif "電話番号" in label:
+                data["phone"] = value
+            elif "住所" in label:
+                data["address"] = value
+            elif "資本金" in label:
+                data["capital"] = value
+            elif "代表者名" in label:
+                data["representative"] = value
+            elif "会社HP" in label:
+                link = dd.find("a")
+                data["website"] = link.get("href", "") if link else value
+
+    if not data.get("company_name"):
+        for h2 in soup.find_all("h2"):
+            text = h2.get_text(strip=True)
+            if "株式会社" in text or "有限会社" in text or "合同会社" in text:
+                data["company_name"] = text
+                break
+
+    return data if data.get("company_name") else None
+
+
+def _scrape(html: str) -> dict:
+    scraper = ReshopnaviScraper()
+    response = MagicMock(status_code=200, headers={}, content=html.encode("utf-8"), text=html)
+    scraper.session = MagicMock()
+    scraper.session.get.return_value = response
+    return scraper._scrape_shop(SHOP_ID)
+
+
+@pytest.fixture
+def shop_html() -> str:
+    return (FIXTURES / "reshopnavi_shop.html").read_text(encoding="utf-8")
+
+
+def test_scrape_shop_fields(shop_html) -> None:
+    assert _scrape(shop_html) == {
+        "shop_id": SHOP_ID,
+        "url": f"{BASE_URL}/shops/{SHOP_ID}",
+        "company_name": "株式会社リフォームさくら",
+        "representative": "桜井太郎",
+        "address": "〒150-0002東京都渋谷区渋谷2-10-5さくらビル3F",
+        "phone": "0120-000-000",
+        "capital": "1,000万円",
+        "website": "https://sakura-reform.example.jp/",
+    }
+
+
+def test_scrape_shop_matches_baseline(shop_html) -> None:
+    assert _scrape(shop_html) == _baseline_parse_shop(shop_html, SHOP_ID)
+
+
+def test_scrape_shop_falls_back_to_h2_company_name(shop_html) -> None:
+    # 会社名の dt がないページ（本文に「会社名」はある）では h2 の法人名を使う
+    html = shop_html.replace("<dt>会社名</dt>\n      <dd>株式会社リフォームさくら</dd>", "")
+    html = html.replace("さくらリフォーム</h2>", "有限会社さくらリフォーム</h2>")
+    html = html.replace("<h2>会社概要</h2>", "<h2>会社名・会社概要</h2>")
+    result = _scrape(html)
+    assert result["company_name"] == "有限会社さくらリフォーム"
+    assert result == _baseline_parse_shop(html, SHOP_ID)
+
+
+def test_scrape_shop_without_company_name_is_none(shop_html) -> None:
+    html = shop_html.replace("会社名", "名称")
+    assert _scrape(html) is None
@@ -0,0 +1,387 @@
+"""executor（タスク制御・引数組み立て・BrowserPool）のユニットテスト."""
+
+from __future__ import annotations
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+import executor
+from executor import ScraperSpec, ScrapingExecutor
+
+
+class _BlockingScraper:
+    """停止されるまで回り続け、停止後は release されるまで戻らないスクレイパー"""
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def __init__(self, progress_callback=None, result_callback=None, is_running_check=None):
+        self.is_running_check = is_running_check
+
+    def run(self, filters):
+        type(self).started.set()
+        while self.is_running_check():
+            threading.Event().wait(0.01)
+        type(self).release.wait(5)
+        return 0
+
+
+@pytest.fixture
+def blocking_executor(monkeypatch):
+    _BlockingScraper.started = threading.Event()
+    _BlockingScraper.release = threading.Event()
+    monkeypatch.setitem(
+        executor.SCRAPERS, "blocking", ScraperSpec("blocking", "_BlockingScraper", "テスト", executor._filters_args),
+    )
+    monkeypatch.setattr(executor, "_import_scraper", lambda module, cls: _BlockingScraper)
+    monkeypatch.setattr(ScrapingExecutor, "_prewarm_scrapers", lambda self: None)
+    monkeypatch.setattr(ScrapingExecutor, "_kill_browser_processes", lambda self, pids: None)
+    client = MagicMock(spec=["send_error", "send_completed", "send_stopped", "send_progress", "send_result"])
+    ex = ScrapingExecutor(client)
+    yield ex, client
+    _BlockingScraper.release.set()
+    ex._pool.shutdown(wait=True)
+
+
+def _request(task_id):
+    return {"task_id": task_id, "scraper_type": "blocking", "filters": {}}
+
+
+def test_stop_then_new_request_does_not_revive_stopped_task(blocking_executor):
+    ex, client = blocking_executor
+    ex.handle_request(_request("a"))
+    assert _BlockingScraper.started.wait(5)
+
+    ex.stop()
+    assert not ex.is_running()
+
+    # 停止したタスクのワーカーが終わるまでは新しいタスクを受け付けない
+    ex.handle_request(_request("b"))
+    client.send_error.assert_called_once()
+    assert client.send_error.call_args[0][0] == "b"
+
+    _BlockingScraper.release.set()
+    ex._pool.submit(lambda: None).result(5)  # 1ワーカーのプールなのでタスク a の終了を待てる
+    client.send_stopped.assert_called_once_with("a", 0)
+    client.send_completed.assert_not_called()
+
+    # 終了後の新しいタスクは停止状態を引き継がない
+    _BlockingScraper.started = threading.Event()
+    ex.handle_request(_request("c"))
+    assert _BlockingScraper.started.wait(5)
+    assert ex.is_running()
+    ex.stop()
+    ex._pool.submit(lambda: None).result(5)
+    assert client.send_stopped.call_args[0][0] == "c"
+    assert not ex._is_running
+
+
+def test_stop_discards_pooled_driver_instead_of_leaking_it(monkeypatch):
+    monkeypatch.setattr(ScrapingExecutor, "_prewarm_scrapers", lambda self: None)
+    monkeypatch.setattr(ScrapingExecutor, "_kill_browser_processes", lambda self, pids: None)
+    ex = ScrapingExecutor(MagicMock())
+    driver = MagicMock()
+    scraper = MagicMock(spec=["driver"])
+    scraper.driver = ex._browser_pool.acquire("test", lambda: driver)
+    with ex._lock:
+        ex._is_running = True
+        ex._stop_event = threading.Event()
+        ex._current_scraper = scraper
+
+    ex.stop()
+
+    driver.quit.assert_called()
+    assert not ex._browser_pool._in_use
+    # スクレイパー側の後片付け（release）は何もせず、待機中にも戻らない
+    ex._browser_pool.release(scraper.driver)
+    assert not ex._browser_pool._idle.get("test")
+
+
+def test_stop_keeps_idle_pooled_drivers(monkeypatch):
+    monkeypatch.setattr(ScrapingExecutor, "_prewarm_scrapers", lambda self: None)
+    killed = []
+    monkeypatch.setattr(ScrapingExecutor, "_kill_browser_processes", lambda self, pids: killed.extend(pids))
+    ex = ScrapingExecutor(MagicMock())
+    pool = ex._browser_pool
+    idle_driver = MagicMock()
+    idle_driver.service.process.pid = 100
+    pool.release(pool.acquire("test", lambda: idle_driver))
+    busy_driver = MagicMock()
+    busy_driver.service.process.pid = 200
+    pool.acquire("test2", lambda: busy_driver)
+    with ex._lock:
+        ex._is_running = True
+        ex._stop_event = threading.Event()
+
+    ex.stop()
+
+    assert killed == [200]
+    busy_driver.quit.assert_called()
+    idle_driver.quit.assert_not_called()
+    assert pool._idle["test"][0][0] is idle_driver
+
+
+class _LegacyScraper:
+    """browser_pool 引数に対応する前の更新版スクレイパー"""
+
+    def __init__(self, progress_callback=None, result_callback=None, is_running_check=None):
+        pass
+
+    def run(self, filters):
+        return 3
+
+
+def test_browser_pool_is_only_passed_when_accepted(monkeypatch):
+    monkeypatch.setattr(ScrapingExecutor, "_prewarm_scrapers", lambda self: None)
+    monkeypatch.setattr(executor, "_import_scraper", lambda module, cls: _LegacyScraper)
+    client = MagicMock(spec=["send_error", "send_completed", "send_stopped", "send_progress", "send_result"])
+    ex = ScrapingExecutor(client)
+    spec = ScraperSpec("legacy", "_LegacyScraper", "テスト", executor._filters_args, uses_browser=True)
+
+    ex._run_scraper("t", spec, [], {}, threading.Event())
+
+    client.send_error.assert_not_called()
+    client.send_completed.assert_called_once_with("t")
+    assert executor._accepts_kwarg(executor.BrowserPool, "max_uses")
+    assert not executor._accepts_kwarg(_LegacyScraper, "browser_pool")
+
+
+def test_meo_checker_args_only_pass_optional_kwargs_when_set():
+    accounts = [{"email": "a@example.com", "password": "x"}]
+    assert executor._meo_checker_args([], {"accounts": accounts}) == ((accounts,), {"run_diagnosis": True})
+
+    args, kwargs = executor._meo_checker_args(
+        [], {"accounts": accounts, "runDiagnosis": False, "accountWorkers": 3, "reuseLogin": True},
+    )
+    assert kwargs == {"run_diagnosis": False, "account_workers": 3, "reuse_login": True}
+
+
+# ---------------- run() 引数の組み立て ----------------
+
+
+def test_google_maps_args_require_keywords():
+    with pytest.raises(executor.InvalidRequest):
+        executor._google_maps_args([], {})
+    assert executor._google_maps_args(["工務店"], {"a": 1}) == ((["工務店"], {"a": 1}), {})
+
+
+def test_houzz_args_require_professions_and_prefectures():
+    with pytest.raises(executor.InvalidRequest):
+        executor._houzz_args([], {"prefectures": ["東京都"]})
+    with pytest.raises(executor.InvalidRequest):
+        executor._houzz_args([], {"professions": ["general-contractor"]})
+    filters = {"professions": ["general-contractor"], "prefectures": ["東京都"]}
+    assert executor._houzz_args([], filters) == ((["general-contractor"], ["東京都"], filters), {})
+
+
+def test_garden_club_args_require_prefectures():
+    with pytest.raises(executor.InvalidRequest):
+        executor._garden_club_args([], {})
+    filters = {"prefectures": ["東京都"], "max_workers": 2}
+    assert executor._garden_club_args([], filters) == ((["東京都"], filters), {})
+
+
+def test_id_range_args_pass_filters_through():
+    filters = {"start_id": 10, "end_id": 20, "max_workers": 2}
+    assert executor._id_range_args(9500)([], filters) == ((filters,), {})
+
+
+@pytest.mark.parametrize(
+    "builder, attr, key",
+    [
+        (executor._ietatta_args, "IETATTA_REGIONS", "regions"),
+        (executor._constmap_args, "CONSTMAP_REGIONS", "regions"),
+    ],
+)
+def test_region_args_default_regions_and_keep_other_filters(monkeypatch, builder, attr, key):
+    monkeypatch.setattr(executor, "_import_attr", lambda module, name: {"r1": {}, "r2": {}})
+    (filters,), kwargs = builder([], {"max_workers": 2})
+    assert filters == {"max_workers": 2, key: ["r1", "r2"]}
+    assert kwargs == {}
+
+    (filters,), _ = builder([], {key: ["r2"]})
+    assert filters[key] == ["r2"]
+
+
+def test_ieto_args_pass_filters_through(monkeypatch):
+    monkeypatch.setattr(executor, "_import_attr", lambda module, name: {"ieto_okayama": "岡山"})
+    filters = {"areas": ["ieto_okayama"], "max_workers": 2}
+    assert executor._ieto_args([], filters) == ((filters,), {})
+
+
+def test_meo_checker_args_require_accounts():
+    with pytest.raises(executor.InvalidRequest):
+        executor._meo_checker_args([], {})
+
+
+def test_every_spec_builder_accepts_keywords_and_filters(monkeypatch):
+    monkeypatch.setattr(executor, "_import_attr", lambda module, name: {})
+    for name, spec in executor.SCRAPERS.items():
+        filters = {
+            "accounts": [{"email": "a", "password": "b"}],
+            "professions": ["p"],
+            "prefectures": ["東京都"],
+        }
+        args, kwargs = spec.build_args(["kw"], filters)
+        assert isinstance(args, tuple) and isinstance(kwargs, dict), name
+
+
+# ---------------- BrowserPool ----------------
+
+
+def _driver():
+    driver = MagicMock()
+    driver.session_id = "s"
+    return driver
+
+
+def test_browser_pool_reuses_released_driver_per_key():
+    pool = executor.BrowserPool()
+    driver = _driver()
+    assert pool.acquire("a", lambda: driver) is driver
+    pool.release(driver)
+
+    driver.delete_all_cookies.assert_called_once()
+    driver.get.assert_called_with("about:blank")
+    assert pool.acquire("a", _driver) is driver
+    # 別キーには貸し出さない
+    other = pool.acquire("b", _driver)
+    assert other is not driver
+
+
+def test_browser_pool_quits_driver_after_max_uses():
+    pool = executor.BrowserPool(max_uses=2)
+    driver = _driver()
+    pool.release(pool.acquire("a", lambda: driver))
+    pool.release(pool.acquire("a", _driver))
+    driver.quit.assert_called_once()
+    assert not pool._idle["a"]
+
+
+def test_browser_pool_drops_expired_idle_driver(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(executor.time, "monotonic", lambda: now[0])
+    pool = executor.BrowserPool(max_age_seconds=60)
+    driver = _driver()
+    pool.release(pool.acquire("a", lambda: driver))
+
+    now[0] += 61
+    fresh = _driver()
+    assert pool.acquire("a", lambda: fresh) is fresh
+    driver.quit.assert_called_once()
+
+
+def test_browser_pool_drops_dead_driver():
+    pool = executor.BrowserPool()
+    driver = _driver()
+    pool.release(pool.acquire("a", lambda: driver))
+    type(driver).current_url = property(lambda self: (_ for _ in ()).throw(RuntimeError("dead")))
+
+    fresh = _driver()
+    assert pool.acquire("a", lambda: fresh) is fresh
+
+
+def test_browser_pool_keeps_at_most_max_idle_per_key():
+    pool = executor.BrowserPool(max_idle_per_key=1)
+    first, second = _driver(), _driver()
+    pool.acquire("a", lambda: first)
+    pool.acquire("a", lambda: second)
+    pool.release(first)
+    pool.release(second)
+    second.quit.assert_called_once()
+    assert [entry[0] for entry in pool._idle["a"]] == [first]
+
+    pool.close_all()
+    first.quit.assert_called_once()
+
+
+# ---------------- _ResultBatcher ----------------
+
+
+def test_result_batcher_sends_full_batch_and_latest_progress(monkeypatch):
+    monkeypatch.setattr(executor, "RESULT_BATCH_SIZE", 2)
+    monkeypatch.setattr(executor, "RESULT_FLUSH_INTERVAL", 60)
+    client = MagicMock(spec=["send_results", "send_progress"])
+    batcher = executor._ResultBatcher(client, "t")
+
+    batcher.set_progress(1, 10)
+    batcher.set_progress(2, 10)
+    batcher.add_result({"id": 1})
+    client.send_results.assert_not_called()
+    batcher.add_result({"id": 2})
+
+    client.send_results.assert_called_once_with("t", [{"id": 1}, {"id": 2}])
+    client.send_progress.assert_called_once_with("t", 2, 10)
+
+
+def test_result_batcher_falls_back_to_send_result(monkeypatch):
+    monkeypatch.setattr(executor, "RESULT_FLUSH_INTERVAL", 60)
+    client = MagicMock(spec=["send_result", "send_progress"])
+    batcher = executor._ResultBatcher(client, "t")
+    batcher.add_result({"id": 1})
+    batcher.add_result({"id": 2})
+    batcher.flush()
+
+    assert [c.args for c in client.send_result.call_args_list] == [("t", {"id": 1}), ("t", {"id": 2})]
+    client.send_progress.assert_not_called()
+
+
+# ---------------- スクレイパーモジュールの読み込み ----------------
+
+
+def test_concurrent_loads_of_updated_module_do_not_collide(monkeypatch, tmp_path):
+    (tmp_path / "racemod.py").write_text("import time\ntime.sleep(0.2)\nSOURCE = 'updated'\n", encoding="utf-8")
+    monkeypatch.setattr(executor, "_get_update_dir", lambda: tmp_path)
+    monkeypatch.setattr(executor.sys, "path", list(executor.sys.path))
+    executor._scraper_modules.clear()
+
+    results, errors = [], []
+
+    def load(mtime_ns):
+        try:
+            results.append(executor._load_scraper_module("racemod", mtime_ns))
+        except Exception as e:  # バンドル版 scraper.racemod はないので、フォールバックしたら失敗する
+            errors.append(e)
+
+    # キャッシュキーが異なる2つの呼び出し（先読みと更新検知直後のタスクに相当）を同時に走らせる
+    threads = [threading.Thread(target=load, args=(mtime,)) for mtime in (1, 2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+
+    try:
+        assert errors == []
+        assert [m.SOURCE for m in results] == ["updated", "updated"]
+    finally:
+        executor.sys.modules.pop("racemod", None)
+        executor._scraper_modules.clear()
+
+
+def test_failed_updated_import_is_retried_instead_of_caching_bundled_fallback(monkeypatch, tmp_path):
+    update_dir = tmp_path / "updates"
+    bundle_dir = tmp_path / "bundle"
+    (bundle_dir / "scraper").mkdir(parents=True)
+    update_dir.mkdir()
+    (bundle_dir / "scraper" / "__init__.py").write_text("", encoding="utf-8")
+    (bundle_dir / "scraper" / "retrymod.py").write_text("SOURCE = 'bundled'\n", encoding="utf-8")
+    (update_dir / "retrymod.py").write_text("raise RuntimeError('broken update')\n", encoding="utf-8")
+    monkeypatch.setattr(executor, "_get_update_dir", lambda: update_dir)
+    monkeypatch.setattr(executor.sys, "path", [str(bundle_dir)] + executor.sys.path)
+    saved_scraper = executor.sys.modules.pop("scraper", None)
+    executor._scraper_modules.clear()
+
+    try:
+        assert executor._load_scraper_module("retrymod", 1).SOURCE == "bundled"
+        # 更新版を直したら、同じ mtime キーでも次の呼び出しで更新版が使われる
+        (update_dir / "retrymod.py").write_text("SOURCE = 'updated'\n", encoding="utf-8")
+        assert executor._load_scraper_module("retrymod", 1).SOURCE == "updated"
+        assert executor._load_scraper_module("retrymod", 1) is executor._scraper_modules[("retrymod", 1)]
+    finally:
+        for name in ("retrymod", "scraper.retrymod", "scraper"):
+            executor.sys.modules.pop(name, None)
+        if saved_scraper is not None:
+            executor.sys.modules["scraper"] = saved_scraper
+        executor._scraper_modules.clear()
@@ -0,0 +1,57 @@
+"""_http_utils（スクレイパー共通の HTTP 部品）のユニットテスト."""
+
+from __future__ import annotations
+
+import time
+from email.utils import formatdate
+from unittest.mock import MagicMock
+
+from scraper._http_utils import AdaptiveRateLimiter, RateLimiter, read_text, retry_after_seconds
+
+
+def _response(chunks: list, encoding: str | None = "utf-8") -> MagicMock:
+    r = MagicMock()
+    r.iter_content.return_value = iter(chunks)
+    r.encoding = encoding
+    return r
+
+
+def test_retry_after_seconds_parses_delta_and_http_date() -> None:
+    assert retry_after_seconds(" 30 ") == 30.0
+    assert 50 <= retry_after_seconds(formatdate(time.time() + 60, usegmt=True)) <= 60
+    assert retry_after_seconds(formatdate(time.time() - 60, usegmt=True)) == 0.0
+
+
+def test_retry_after_seconds_returns_none_when_unparsable() -> None:
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds("") is None
+    assert retry_after_seconds("soon") is None
+
+
+def test_read_text_joins_chunks_and_decodes() -> None:
+    body = "株式会社テスト".encode("utf-8")
+    assert read_text(_response([body[:5], body[5:]]), 1024) == "株式会社テスト"
+    assert read_text(_response([b"abc"], encoding=None), 1024) == "abc"
+
+
+def test_read_text_returns_none_over_limit() -> None:
+    assert read_text(_response([b"a" * 600, b"a" * 600]), 1000) is None
+
+
+def test_rate_limiter_allows_burst_then_waits() -> None:
+    limiter = RateLimiter(rate=20.0, burst=2)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.04
+
+
+def test_adaptive_rate_limiter_slows_down_and_recovers() -> None:
+    limiter = AdaptiveRateLimiter(rate=2.0, burst=1, min_rate=0.5, recovery_step=0.25)
+    limiter.slow_down()
+    limiter.slow_down()
+    limiter.slow_down()
+    assert limiter.rate == 0.5
+    for _ in range(10):
+        limiter.recover()
+    assert limiter.rate == 2.0